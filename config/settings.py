@@ -11,6 +11,12 @@ EXAMPLE_PDFS_DIR = DATA_DIR / "example_pdfs"
 KNOWLEDGE_BASE_DIR = DATA_DIR / "knowledge_base"
 FEEDBACK_DIR = DATA_DIR / "feedback"
 GENERATED_DOCS_DIR = DATA_DIR / "generated_docs"
+CACHE_DIR = DATA_DIR / "cache"
+EXTRACTION_CACHE_DIR = CACHE_DIR / "extractions"  # Gemini extraction responses per PDF hash
+GEMINI_FILES_REGISTRY = CACHE_DIR / "gemini_files.json"  # Uploaded file handles per content hash
+PAGE_RANGE_DIR = CACHE_DIR / "page_ranges"  # Page-range sub-PDFs for parallel extraction
+INGEST_MANIFEST = CACHE_DIR / "ingest_manifest.json"  # Bulk ingestion checkpoint (file hash -> status)
+GENERATION_CACHE_DIR = CACHE_DIR / "generations"  # Generated documents per (project, type, prompt, model, config)
 
 # API Configuration
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
@@ -19,6 +25,13 @@ GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 GEMINI_MODEL = "gemini-2.5-flash"
 EMBEDDING_MODEL = "gemini-embedding-001"
 EMBEDDING_DIMENSION = 768  # Recommended dimension for Gemini embeddings (768, 1536, or 3072)
+EMBEDDING_BATCH_SIZE = 100  # Texts per embed_content request (API maximum)
+EMBEDDING_BATCH_MAX_TOKENS = 20000  # Estimated tokens per embed_content request
+EMBEDDING_MAX_INPUT_TOKENS = 2048  # Longer texts are truncated by the embedding model
+
+# Gemini generate request limits per process (src/rate_limiter.py); bulk ingestion workers split them
+GEMINI_MAX_CONCURRENT_REQUESTS = int(os.getenv("GEMINI_MAX_CONCURRENT_REQUESTS", "6"))
+GEMINI_REQUESTS_PER_MINUTE = int(os.getenv("GEMINI_REQUESTS_PER_MINUTE", "60"))  # 0 = unlimited
 
 # RAG settings
 # Chroma stores data automatically in KNOWLEDGE_BASE_DIR
@@ -26,10 +39,105 @@ EMBEDDING_DIMENSION = 768  # Recommended dimension for Gemini embeddings (768, 1
 VECTOR_INDEX_PATH = KNOWLEDGE_BASE_DIR / "embeddings.ann"  # Not used with Chroma
 CHUNKS_PATH = KNOWLEDGE_BASE_DIR / "chunks.json"  # Not used with Chroma
 TOP_K_RETRIEVAL = 5
+QUERY_TIME_CONFIDENCE = True  # Apply confirmation boost + temporal decay when ranking
+
+# Near-duplicate detection at ingestion (MinHash): paraphrased feedback/insight
+# chunks are merged into the existing chunk (confirmation_count += 1) instead of added
+DEDUP_SOURCE_TYPES = ["feedback", "insight"]
+DEDUP_SIMILARITY_THRESHOLD = 0.7  # Estimated Jaccard similarity of character shingles
+
+# Knowledge base compaction (python -m src.rag_system.compaction)
+COMPACTION_SOURCE_DIRS = [DATA_DIR, PROJECT_ROOT]  # Where source_reference files are looked up
+COMPACTION_MIN_CONFIDENCE = 0.5  # Feedback/insight chunks below this can expire...
+COMPACTION_MAX_AGE_DAYS = 180  # ...once unconfirmed for this many days
+COMPACTION_BATCH_SIZE = 500
+
+# Bulk directory ingestion (python -m src.rag_system.bulk_ingest <dir>)
+BULK_INGEST_PROCESSES = 2  # Files extracted concurrently, one PDFExtractor per process
+BULK_INGEST_EMBED_THREADS = 4  # Concurrent embedding requests
+BULK_INGEST_BATCH_SIZE = 100  # Chunks per embedding request and vector store write
+
+# Batch project parsing (python -m src.project_batch <specs>)
+PROJECT_BATCH_WORKERS = 8  # Specifications parsed concurrently
+PROJECT_BATCH_RETRIES = 1  # Extra attempts for specifications whose Gemini request failed
+
+# Multi-process deployment
+# - KB_SERVICE_URL: workers use the knowledge-base service (python -m src.rag_system.kb_service)
+#   instead of opening KNOWLEDGE_BASE_DIR themselves
+# - CHROMA_SERVER_HOST: VectorStore talks to a local Chroma server instead of PersistentClient
+KB_SERVICE_URL = os.getenv("KB_SERVICE_URL")
+KB_SERVICE_HOST = os.getenv("KB_SERVICE_HOST", "127.0.0.1")
+KB_SERVICE_PORT = int(os.getenv("KB_SERVICE_PORT", "8765"))
+CHROMA_SERVER_HOST = os.getenv("CHROMA_SERVER_HOST")
+CHROMA_SERVER_PORT = int(os.getenv("CHROMA_SERVER_PORT", "8000"))
+
+# Extraction settings
+# Upload each PDF once with the Gemini files API and reference it in later prompts
+# (false: send inline bytes, e.g. offline tests or keys without files API access)
+GEMINI_FILES_API = os.getenv("GEMINI_FILES_API", "true").lower() == "true"
+GEMINI_FILE_TTL_HOURS = 46  # Uploaded files expire after 48h; re-upload a little earlier
+COMBINED_EXTRACTION = True  # Content + metadata + insights in one schema-constrained call
+JSON_REPAIR_ATTEMPTS = 1  # Text-only repair requests for a response that fails schema validation
+
+# Text-layer-first extraction: pages with a usable PyPDF2 text layer are read
+# locally, only scanned / image-only / garbled pages are sent to Gemini
+TEXT_LAYER_FIRST = True
+TEXT_LAYER_MIN_CHARS = 50  # Fewer extracted characters than this: treat as image-only
+TEXT_LAYER_MIN_QUALITY = 0.85  # Minimum share of letters, digits, whitespace and punctuation
+
+# Project specification parsing (ProjectInputParser)
+LOCAL_PROJECT_EXTRACTION = True  # Read explicitly stated fields locally (regex/lexicon) before asking Gemini
+LOCAL_EXTRACTION_MIN_CONFIDENCE = 0.8  # Local values below this are asked from Gemini
+
+# Structure-aware chunking (src/pdf_processing/chunker.py)
+CHUNK_MAX_TOKENS = 800  # Example documents
+REGULATION_CHUNK_MAX_TOKENS = 1500  # BR18 - keeps long § paragraphs whole
+CHUNK_MIN_TOKENS = 400  # A new heading starts a new chunk once the current one has this many tokens
+STREAM_RECHUNK_CHARS = 2000  # Streamed extraction: new characters between two chunking passes
+STREAMING_EXTRACTION = True  # GUI example upload: chunk and embed while Gemini is still generating
+
+# Parallel page-range extraction of large PDFs (e.g. BR18.pdf, 96 pages)
+PARALLEL_EXTRACTION_PAGES_PER_RANGE = 8  # Keeps each response well below MAX_TOKENS
+PARALLEL_EXTRACTION_WORKERS = 4  # Concurrent Gemini requests
+PARALLEL_EXTRACTION_RETRIES = 2  # Extra attempts for ranges that failed
+
+# Extraction debug output (PDFExtractor debug_mode)
+# - compact: gzip JSONL records written on a background thread, content stored once,
+#   chunks as offsets (read back with python -m src.pdf_processing.debug_writer)
+# - full: legacy pretty-printed JSON + text files per extraction
+# - off: no debug output
+DEBUG_OUTPUT_MODE = os.getenv("DEBUG_OUTPUT_MODE", "compact").lower()
+DEBUG_SAMPLE_RATE = float(os.getenv("DEBUG_SAMPLE_RATE", "1.0"))  # Fraction of extractions recorded
+DEBUG_RETENTION_DAYS = 14
+DEBUG_MAX_BYTES = 50 * 1024 * 1024  # Oldest compact debug files are deleted beyond this
 
 # Document generation settings
 TEMPERATURE = 0.3  # Lower for more consistent document generation
 MAX_TOKENS = 65536 # can be increased to 65,536 to acoomodate larger documents, since that is flash 2.5 max output length
+PROMPT_CONTEXT_MAX_TOKENS = 24000  # Retrieved RAG context per generation prompt (estimated tokens)
+PACKAGE_GENERATION_WORKERS = 6  # Documents of a package generated concurrently
+STREAMING_GENERATION = True  # GUI and demo: write generated documents to file as the text arrives
+STREAM_PROGRESS_CHARS = 2000  # Several documents streaming: one progress line per document per this many characters
+GENERATION_CACHE = os.getenv("GENERATION_CACHE", "true").lower() != "false"  # Reuse unchanged documents
+GENERATION_CACHE_TTL_SECONDS = 7 * 24 * 3600  # Cached documents are regenerated after a week
+
+# Dependency-aware package generation: a document waits for the documents it builds on
+# and gets compact summaries of them in its prompt instead of more retrieved chunks
+DOCUMENT_DEPENDENCIES = {
+    "SLUT": ["KRAP", "KPLA"],  # Final declaration sums up the control plan and control report
+    "START": ["DBK", "BSR"],  # Start declaration lists what classification and fire strategy contain
+    "DKV": ["FUNK"],  # Operations & maintenance follows the function description
+}
+UPSTREAM_SUMMARY_MAX_TOKENS = 800  # Summary of each upstream document
+DOWNSTREAM_CONTEXT_MAX_TOKENS = 8000  # Retrieved context for documents that get upstream summaries
+
+# Shared per-project prompt prefix (project facts + BR18 regulations for the fire class),
+# registered once with Gemini context caching and reused by every document of the project
+SHARED_PROMPT_PREFIX = True
+SHARED_PREFIX_REGULATION_CHUNKS = 8  # Regulation chunks retrieved once per fire classification
+SHARED_PREFIX_MAX_TOKENS = 12000
+SHARED_PREFIX_CACHE_TTL_SECONDS = 3600
+SHARED_PREFIX_MIN_CACHE_TOKENS = 1024  # Smaller prefixes are sent inline (Gemini's explicit caching minimum)
 
 # Fire classification document requirements (BR18)
 DOCUMENT_REQUIREMENTS = {
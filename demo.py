@@ -21,7 +21,7 @@ import uuid
 sys.path.insert(0, str(Path(__file__).parent))
 
 from src.pdf_processing import PDFExtractor
-from src.rag_system import VectorStore
+from src.rag_system import RemoteVectorStore, create_vector_store
 from src.document_templates import DocumentTemplateEngine
 from src.learning_engine import FeedbackAnalyzer
 from src.models import (
@@ -33,7 +33,9 @@ from src.models import (
     MunicipalityFeedback,
     KnowledgeChunk
 )
-from config.settings import EXAMPLE_PDFS_DIR, FEEDBACK_DIR, GENERATED_DOCS_DIR, KNOWLEDGE_BASE_DIR
+from config.settings import (
+    EXAMPLE_PDFS_DIR, FEEDBACK_DIR, GENERATED_DOCS_DIR, KNOWLEDGE_BASE_DIR, STREAMING_GENERATION, STREAM_PROGRESS_CHARS
+)
 import shutil
 
 
@@ -42,7 +44,7 @@ class BR18DemoSystem:
 
     def __init__(self):
         self.pdf_extractor = PDFExtractor()
-        self.vector_store = VectorStore()
+        self.vector_store = create_vector_store()
         self.template_engine = DocumentTemplateEngine(vector_store=self.vector_store)  # Pass vector store for BR18 retrieval
         self.feedback_analyzer = FeedbackAnalyzer()
         self.learning_iterations = []
@@ -88,8 +90,9 @@ class BR18DemoSystem:
             except Exception as e:
                 print(f"⚠️  Warning clearing feedback: {e}")
 
-        # 4. Clear knowledge base (Chroma data)
-        if KNOWLEDGE_BASE_DIR.exists():
+        # 4. Clear knowledge base (Chroma data) - in service mode the service owns
+        # these files and the clear() above already emptied its collection
+        if not isinstance(self.vector_store, RemoteVectorStore) and KNOWLEDGE_BASE_DIR.exists():
             try:
                 # Only remove Chroma's internal files, not example PDFs
                 for item in KNOWLEDGE_BASE_DIR.iterdir():
@@ -121,7 +124,7 @@ class BR18DemoSystem:
         print("="*80)
 
         # Reinitialize vector store to ensure it's ready
-        self.vector_store = VectorStore()
+        self.vector_store = create_vector_store()
 
     def step1_extract_example_documents(self):
         """Step 1: Extract and index example BR18 documents"""
@@ -145,15 +148,15 @@ class BR18DemoSystem:
             print(f"  - Metadata: {result['metadata'].get('document_type', 'Unknown')}")
 
             # Create knowledge chunks
-            for i, chunk_text in enumerate(result['chunks']):
+            for i, structured_chunk in enumerate(result['chunks']):
                 chunk = KnowledgeChunk(
                     chunk_id=str(uuid.uuid4()),
                     source_type="approved_doc",
                     source_reference=pdf_path.name,
                     municipality=result['metadata'].get('municipality'),
                     document_type=result['metadata'].get('document_type'),
-                    content=chunk_text,
-                    metadata=result['metadata']
+                    content=structured_chunk.content,
+                    metadata={**result['metadata'], **structured_chunk.chunk_metadata()}
                 )
                 all_chunks.append(chunk)
 
@@ -202,34 +205,69 @@ class BR18DemoSystem:
             # Generate documents
             print(f"\n  Generating document package...")
 
-            for doc_type_str in required_docs:
-                try:
-                    from src.models import DocumentType
-                    doc_type = DocumentType(doc_type_str)
-
-                    # Get RAG context for this document type
-                    query = f"{doc_type_str} requirements {project.fire_classification.value} {project.municipality}"
-                    rag_context = self.vector_store.retrieve_context(
-                        query,
-                        municipality=None,  # Use all available knowledge
-                        document_type=None
-                    )
-
-                    # Generate document
-                    doc = self.template_engine.generate_document(project, doc_type, rag_context)
-                    generated_docs.append(doc)
+            def context_for(doc_type, project=project):
+                # Get RAG context for this document type
+                query = f"{doc_type.value} requirements {project.fire_classification.value} {project.municipality}"
+                return self.vector_store.retrieve_context(
+                    query,
+                    municipality=None,  # Use all available knowledge
+                    document_type=None
+                )
 
-                    print(f"    ✓ {doc_type_str}: {len(doc.content)} chars")
+            # Streamed documents are appended to their file as the text arrives; a single
+            # document is echoed to the console, several get progress lines
+            open_files = {}
+            written = {}
+            echo = len(required_docs) == 1
 
-                    # Save document
+            def on_delta(stream, delta):
+                doc_type = stream.document_type.value
+                if doc_type not in open_files:
+                    doc_path = GENERATED_DOCS_DIR / f"{stream.document_id}_{doc_type}.txt"
+                    doc_path.parent.mkdir(parents=True, exist_ok=True)
+                    open_files[doc_type] = open(doc_path, 'w', encoding='utf-8')
+                    written[doc_type] = 0
+                    print(f"    … {doc_type}: writing {doc_path.name}")
+                open_files[doc_type].write(delta)
+                open_files[doc_type].flush()
+                if echo:
+                    sys.stdout.write(delta)
+                    sys.stdout.flush()
+                    return
+                before, written[doc_type] = written[doc_type], written[doc_type] + len(delta)
+                if before // STREAM_PROGRESS_CHARS < written[doc_type] // STREAM_PROGRESS_CHARS:
+                    print(f"    … {doc_type}: {written[doc_type]} chars")
+
+            # Documents are generated concurrently and reported as they finish
+            for event in self.template_engine.generate_package(
+                project, required_docs, context_for,
+                on_delta=on_delta if STREAMING_GENERATION else None
+            ):
+                streamed = open_files.pop(event.document_type, None)
+                if streamed:
+                    streamed.close()
+                    if echo:
+                        print()
+                if event.status == "failed":
+                    print(f"    ⚠ {event.document_type}: Error - {event.error}")
+                    if streamed:
+                        # Don't leave a truncated document among the generated ones
+                        Path(streamed.name).unlink(missing_ok=True)
+                        print(f"    ⚠ {event.document_type}: removed partial file {Path(streamed.name).name}")
+                    continue
+                doc = event.document
+                generated_docs.append(doc)
+
+                cached = ", cached" if doc.from_cache else ""
+                print(f"    ✓ {event.document_type}: {len(doc.content)} chars ({event.seconds:.1f}s{cached})")
+
+                # Save document (already written if it was streamed)
+                if not streamed:
                     doc_path = GENERATED_DOCS_DIR / f"{doc.document_id}_{doc.document_type.value}.txt"
                     doc_path.parent.mkdir(parents=True, exist_ok=True)
                     with open(doc_path, 'w', encoding='utf-8') as f:
                         f.write(doc.content)
 
-                except Exception as e:
-                    print(f"    ⚠ {doc_type_str}: Error - {e}")
-
         return generated_docs
 
     def step3_simulate_municipality_feedback(self, generated_docs, use_content_analysis: bool = True):
@@ -403,30 +441,32 @@ class BR18DemoSystem:
             # Generate documents (now with learned insights!)
             print(f"\n  Generating improved {'quick demo' if quick_mode else 'complete'} package with learned knowledge...")
 
-            for doc_type_str in required_docs:
-                try:
-                    from src.models import DocumentType
-                    doc_type = DocumentType(doc_type_str)
-
-                    # Get RAG context - now includes learned insights!
-                    query = f"{doc_type_str} requirements {project.fire_classification.value} {project.municipality}"
-                    rag_context = self.vector_store.retrieve_context(
-                        query,
-                        municipality=None,  # Retrieve all knowledge including insights
-                        document_type=None
-                    )
+            insights_used = {}
 
-                    # Count how many are from insights
-                    insight_chunks = [c for c in rag_context if "LEARNED PATTERN:" in c or "Confidence:" in c]
+            def context_for(doc_type, project=project):
+                # Get RAG context - now includes learned insights!
+                query = f"{doc_type.value} requirements {project.fire_classification.value} {project.municipality}"
+                rag_context = self.vector_store.retrieve_context(
+                    query,
+                    municipality=None,  # Retrieve all knowledge including insights
+                    document_type=None
+                )
 
-                    # Generate improved document
-                    doc = self.template_engine.generate_document(project, doc_type, rag_context)
-                    generated_docs.append(doc)
+                # Count how many are from insights
+                insights_used[doc_type.value] = len(
+                    [c for c in rag_context if "LEARNED PATTERN:" in c or "Confidence:" in c]
+                )
+                return rag_context
 
-                    print(f"    ✓ {doc_type_str}: {len(doc.content)} chars ({len(insight_chunks)} learned insights used)")
+            # Generate improved documents concurrently, reported as they finish
+            for event in self.template_engine.generate_package(project, required_docs, context_for):
+                if event.status == "failed":
+                    print(f"    ⚠ {event.document_type}: Error - {event.error}")
+                    continue
+                generated_docs.append(event.document)
 
-                except Exception as e:
-                    print(f"    ⚠ {doc_type_str}: Error - {e}")
+                print(f"    ✓ {event.document_type}: {len(event.document.content)} chars "
+                      f"({insights_used.get(event.document_type, 0)} learned insights used)")
 
         return generated_docs
 
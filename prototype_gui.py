@@ -9,6 +9,7 @@ import customtkinter as ctk
 import os
 import sys
 import threading
+import time
 from tkinter import filedialog, messagebox
 import json
 from pathlib import Path
@@ -32,6 +33,9 @@ from src.models import (
 )
 from src.project_parser import ProjectInputParser
 from src.municipal_response_parser import MunicipalResponseParser
+from config.settings import (
+    REGULATION_CHUNK_MAX_TOKENS, STREAMING_EXTRACTION, STREAMING_GENERATION, STREAM_PROGRESS_CHARS
+)
 
 # Configure CustomTkinter
 ctk.set_appearance_mode("dark")
@@ -933,10 +937,10 @@ class BR18PrototypeGUI(ctk.CTk):
     # Tab 1: Parse Project (Del 1) callbacks
 
     def select_project_pdf(self):
-        """Select a project specification PDF for parsing"""
+        """Select a project specification (PDF or text) for parsing"""
         file = filedialog.askopenfilename(
-            title="Select Project Specification PDF",
-            filetypes=[("PDF files", "*.pdf"), ("All files", "*.*")]
+            title="Select Project Specification",
+            filetypes=[("PDF files", "*.pdf"), ("Text files", "*.txt"), ("All files", "*.*")]
         )
 
         if file:
@@ -954,7 +958,7 @@ class BR18PrototypeGUI(ctk.CTk):
             sys.stdout = TextRedirector(self.output_queue)
             try:
                 # Parse PDF
-                self.extracted_project_data = self.project_parser.parse_project_pdf(self.project_spec_pdf)
+                self.extracted_project_data = self.project_parser.parse_project_file(self.project_spec_pdf)
 
                 # Create BuildingProject
                 project = self.project_parser.create_building_project(self.extracted_project_data)
@@ -1126,13 +1130,22 @@ Required Document Types:
 
                 # Process each selected PDF
                 all_chunks = []
+                streaming = None
+                if STREAMING_EXTRACTION:
+                    from src.rag_system.streaming_ingest import StreamingIngestor
+                    streaming = StreamingIngestor(self.demo_system.pdf_extractor, self.demo_system.vector_store)
+
                 for pdf_path in self.selected_pdf_files:
                     print(f"\n{'='*80}")
                     print(f"Processing: {Path(pdf_path).name}")
                     print(f"{'='*80}")
 
                     # Extract content, metadata, and insights
-                    result = self.demo_system.pdf_extractor.process_br18_example(pdf_path, extract_insights=True)
+                    if streaming:
+                        # Chunks are embedded while the content is still streaming in, then stored together
+                        result = streaming.ingest(pdf_path, extract_insights=True)
+                    else:
+                        result = self.demo_system.pdf_extractor.process_br18_example(pdf_path, extract_insights=True)
 
                     print(f"  ✓ Extracted {len(result['content'])} characters")
                     print(f"  ✓ Created {result['chunk_count']} chunks")
@@ -1141,13 +1154,17 @@ Required Document Types:
                     if result.get('insights'):
                         print(f"  ✓ Extracted document-type-specific insights")
 
+                    if streaming:
+                        continue
+
                     # Create knowledge chunks from content
-                    for chunk_text in result['chunks']:
+                    for structured_chunk in result['chunks']:
                         from src.models import KnowledgeChunk
                         import uuid
 
-                        # Merge insights into metadata
+                        # Merge insights and the chunk's § / heading path into metadata
                         chunk_metadata = result['metadata'].copy()
+                        chunk_metadata.update(structured_chunk.chunk_metadata())
                         if result.get('insights'):
                             chunk_metadata['insights'] = result['insights']
 
@@ -1157,7 +1174,7 @@ Required Document Types:
                             source_reference=Path(pdf_path).name,
                             municipality=result['metadata'].get('municipality'),
                             document_type=result['metadata'].get('document_type'),
-                            content=chunk_text,
+                            content=structured_chunk.content,
                             metadata=chunk_metadata
                         )
                         all_chunks.append(chunk)
@@ -1228,63 +1245,27 @@ IMPORTANT - Preserve structure and paragraph references:
 Format the output as structured text with clear section breaks.
 Keep paragraph numbers (§) with their corresponding text."""
 
-                print("🔍 Extracting BR18 content with Gemini Vision...")
-                content = self.demo_system.pdf_extractor.extract_with_gemini(
+                # Pages and § sections are fingerprinted: a new BR18 version only
+                # re-extracts, re-chunks and re-embeds what changed
+                print("🔍 Diffing BR18 against the stored version...")
+                from src.rag_system.regulation_ingest import RegulationIngestor
+                report = RegulationIngestor(
+                    self.demo_system.pdf_extractor,
+                    self.demo_system.vector_store,
+                    max_tokens=REGULATION_CHUNK_MAX_TOKENS
+                ).ingest(
                     br18_path,
-                    extraction_prompt=regulation_prompt
-                )
-                print(f"✅ Extracted {len(content)} characters, {len(content.split())} words\n")
-
-                # Chunk with larger size to preserve § paragraph context
-                print("✂️  Creating regulation chunks (800 words/chunk)...")
-                chunks = self.demo_system.pdf_extractor.chunk_document(
-                    content,
-                    chunk_size=800,
-                    overlap=100
-                )
-                print(f"✅ Created {len(chunks)} regulation chunks\n")
-
-                # Create knowledge chunks
-                print("📊 Adding BR18 regulation to vector store...")
-                from src.models import KnowledgeChunk
-                import uuid
-                from datetime import datetime
-
-                knowledge_chunks = []
-                for i, chunk_text in enumerate(chunks):
-                    chunk = KnowledgeChunk(
-                        chunk_id=str(uuid.uuid4()),
-                        source_type="regulation",  # Mark as regulation
-                        source_reference="BR18.pdf",
-                        municipality=None,  # Applies to all municipalities
-                        document_type=None,  # Not a specific doc type
-                        content=chunk_text,
-                        metadata={
-                            "regulation_name": "BR18",
-                            "regulation_year": "2018",
-                            "section": "Fire Safety",
-                            "chunk_index": i,
-                            "total_chunks": len(chunks),
-                            "added_date": datetime.now().isoformat()
-                        }
-                    )
-                    knowledge_chunks.append(chunk)
-
-                # Check if BR18 already exists and delete old version
-                print("\n🔍 Checking for existing BR18 regulation...")
-                deleted_count = self.demo_system.vector_store.delete_by_source(
                     source_reference="BR18.pdf",
-                    source_type="regulation"
+                    extraction_prompt=regulation_prompt,
+                    regulation_metadata={"regulation_name": "BR18", "regulation_year": "2018"}
                 )
+                chunk_count = report["segments"]
+                # Regulation chunks retrieved for the shared prompt prefix are now stale
+                self.demo_system.template_engine.clear_regulation_context()
 
-                if deleted_count > 0:
-                    print(f"🗑️  Removed {deleted_count} chunks from old BR18 version")
-                    print(f"📝 Replacing with new BR18 version...")
-
-                # Add new BR18 to vector store
-                self.demo_system.vector_store.add_chunks_batch(knowledge_chunks)
-
-                print(f"\n✅ BR18 regulation successfully {'updated' if deleted_count > 0 else 'added'}!")
+                print(f"\n✅ BR18 regulation successfully {'added' if report['first_ingestion'] else 'updated'}!")
+                print(f"   Sections: {report['added_segments']} new/changed, {report['unchanged_segments']} unchanged, "
+                      f"{report['removed_chunks']} old chunks removed")
                 stats = self.demo_system.vector_store.get_stats()
                 print(f"\n📈 Vector Store Statistics:")
                 print(f"   Total chunks: {stats['total_chunks']}")
@@ -1293,7 +1274,7 @@ Keep paragraph numbers (§) with their corresponding text."""
 
                 # Update status label
                 self.br18_status_label.configure(
-                    text=f"Status: ✅ Loaded ({len(chunks)} chunks)",
+                    text=f"Status: ✅ Loaded ({chunk_count} chunks)",
                     text_color="#10b981"
                 )
 
@@ -1628,9 +1609,8 @@ Keep paragraph numbers (§) with their corresponding text."""
         except Exception as e:
             messagebox.showerror("Error", f"Could not open folder:\n{str(e)}\n\nPath: {abs_path}")
 
-    def save_document_to_file(self, doc, prefix="", demo_mode=False):
-        """Save a generated document to file"""
-        import os
+    def document_file_path(self, project, document_type, prefix="", demo_mode=False):
+        """Output path for a generated document"""
         from datetime import datetime
 
         # Create output directory based on demo mode
@@ -1642,40 +1622,48 @@ Keep paragraph numbers (§) with their corresponding text."""
 
         # Create filename with knowledge indicator
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        safe_project_name = "".join(c for c in doc.project.project_name if c.isalnum() or c in (' ', '-', '_')).strip()
+        safe_project_name = "".join(c for c in project.project_name if c.isalnum() or c in (' ', '-', '_')).strip()
         safe_project_name = safe_project_name.replace(' ', '_')
 
         # Add knowledge indicator to filename
         knowledge_indicator = "without_knowledge" if demo_mode else "with_knowledge"
 
         if prefix:
-            filename = f"{safe_project_name}_{doc.document_type.value}_{knowledge_indicator}_{prefix}_{timestamp}.txt"
+            filename = f"{safe_project_name}_{document_type.value}_{knowledge_indicator}_{prefix}_{timestamp}.txt"
         else:
-            filename = f"{safe_project_name}_{doc.document_type.value}_{knowledge_indicator}_{timestamp}.txt"
+            filename = f"{safe_project_name}_{document_type.value}_{knowledge_indicator}_{timestamp}.txt"
+
+        return output_dir / filename
+
+    def write_document_header(self, f, project, document_type, generated_at, document_id):
+        """Write the project header that precedes a document's content"""
+        f.write(f"{'='*80}\n")
+        f.write(f"BR18 DOCUMENT - {document_type.value}\n")
+        f.write(f"{'='*80}\n\n")
+        f.write(f"Project: {project.project_name}\n")
+        f.write(f"Address: {project.address}\n")
+        f.write(f"Municipality: {project.municipality}\n")
+        f.write(f"Fire Classification: {project.fire_classification.value}\n")
+        f.write(f"Building Type: {project.building_type}\n")
+        f.write(f"Total Area: {project.total_area_m2} m²\n")
+        f.write(f"Floors: {project.floors}\n")
+        f.write(f"Max Occupancy: {project.occupancy}\n\n")
+        f.write(f"Consultant: {project.consultant_name}\n")
+        f.write(f"Certificate: {project.consultant_certificate}\n")
+        f.write(f"Client: {project.client_name}\n\n")
+        f.write(f"Generated: {generated_at.strftime('%Y-%m-%d %H:%M:%S')}\n")
+        f.write(f"Document ID: {document_id}\n")
+        f.write(f"\n{'='*80}\n")
+        f.write(f"DOCUMENT CONTENT\n")
+        f.write(f"{'='*80}\n\n")
 
-        filepath = output_dir / filename
+    def save_document_to_file(self, doc, prefix="", demo_mode=False):
+        """Save a generated document to file"""
+        filepath = self.document_file_path(doc.project, doc.document_type, prefix, demo_mode)
 
         # Write document content
         with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(f"{'='*80}\n")
-            f.write(f"BR18 DOCUMENT - {doc.document_type.value}\n")
-            f.write(f"{'='*80}\n\n")
-            f.write(f"Project: {doc.project.project_name}\n")
-            f.write(f"Address: {doc.project.address}\n")
-            f.write(f"Municipality: {doc.project.municipality}\n")
-            f.write(f"Fire Classification: {doc.project.fire_classification.value}\n")
-            f.write(f"Building Type: {doc.project.building_type}\n")
-            f.write(f"Total Area: {doc.project.total_area_m2} m²\n")
-            f.write(f"Floors: {doc.project.floors}\n")
-            f.write(f"Max Occupancy: {doc.project.occupancy}\n\n")
-            f.write(f"Consultant: {doc.project.consultant_name}\n")
-            f.write(f"Certificate: {doc.project.consultant_certificate}\n")
-            f.write(f"Client: {doc.project.client_name}\n\n")
-            f.write(f"Generated: {doc.generated_at.strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"Document ID: {doc.document_id}\n")
-            f.write(f"\n{'='*80}\n")
-            f.write(f"DOCUMENT CONTENT\n")
-            f.write(f"{'='*80}\n\n")
+            self.write_document_header(f, doc.project, doc.document_type, doc.generated_at, doc.document_id)
             f.write(doc.content)
 
         print(f"     💾 Saved to: {filepath}")
@@ -1709,33 +1697,80 @@ Keep paragraph numbers (§) with their corresponding text."""
                     print(f"   Documents will not use RAG context from knowledge base")
                     print(f"   This demonstrates the 'without knowledge' baseline\n")
 
-                for doc_type_str in selected:
-                    doc_type = DocumentType(doc_type_str)
-
+                def context_for(doc_type):
                     # Get RAG context (skip in demo mode to show "without knowledge")
                     if use_demo_mode:
-                        rag_context = []  # No context = without knowledge baseline
-                        print(f"  📝 Generating {doc_type_str} (WITHOUT knowledge)...")
-                    else:
-                        rag_context = self.demo_system.vector_store.retrieve_context(
-                            query=f"{doc_type_str} document for {self.current_project.municipality}",
-                            top_k=5
-                        )
-                        print(f"  📝 Generating {doc_type_str} (WITH knowledge - {len(rag_context)} context chunks)...")
-
-                    # Generate document
-                    doc = self.demo_system.template_engine.generate_document(
-                        self.current_project,
-                        doc_type,
-                        rag_context
+                        print(f"  📝 Generating {doc_type.value} (WITHOUT knowledge)...")
+                        return []  # No context = without knowledge baseline
+                    rag_context = self.demo_system.vector_store.retrieve_context(
+                        query=f"{doc_type.value} document for {self.current_project.municipality}",
+                        top_k=5
                     )
+                    print(f"  📝 Generating {doc_type.value} (WITH knowledge - {len(rag_context)} context chunks)...")
+                    return rag_context
+
+                # Stream documents concurrently; each file is written as its text arrives
+                started = time.perf_counter()
+                open_files = {}
+                written = {}
+                echo = len(selected) == 1  # Show the text itself when there is only one document
+
+                def on_delta(stream, delta):
+                    # Called from the worker generating this document only
+                    doc_type = stream.document_type.value
+                    if doc_type not in open_files:
+                        filepath = self.document_file_path(stream.project, stream.document_type, demo_mode=use_demo_mode)
+                        f = open(filepath, 'w', encoding='utf-8')
+                        self.write_document_header(f, stream.project, stream.document_type,
+                                                   stream.generated_at, stream.document_id)
+                        open_files[doc_type] = (f, filepath)
+                        written[doc_type] = 0
+                        print(f"     ✍️  {doc_type} writing to {filepath.name} "
+                              f"(first text after {time.perf_counter() - started:.1f}s)")
+                        if echo:
+                            print()
+                    f = open_files[doc_type][0]
+                    f.write(delta)
+                    f.flush()
+                    if echo:
+                        sys.stdout.write(delta)
+                        return
+                    before, written[doc_type] = written[doc_type], written[doc_type] + len(delta)
+                    if before // STREAM_PROGRESS_CHARS < written[doc_type] // STREAM_PROGRESS_CHARS:
+                        print(f"     … {doc_type}: {written[doc_type]} chars")
+
+                failed = []
+                for event in self.demo_system.template_engine.generate_package(
+                    self.current_project, selected, context_for,
+                    on_delta=on_delta if STREAMING_GENERATION else None
+                ):
+                    f, filepath = open_files.pop(event.document_type, (None, None))
+                    if f:
+                        f.close()
+                    if echo:
+                        print()
+                    if event.status == "failed":
+                        failed.append(event.document_type)
+                        print(f"     ❌ {event.document_type} failed: {event.error}")
+                        if filepath:
+                            print(f"     ⚠️  Partial text kept in: {filepath}")
+                        continue
+                    doc = event.document
                     self.generated_documents.append(doc)
-                    print(f"     ✅ Generated ({len(doc.content)} chars)")
+                    source = "reused from cache" if doc.from_cache else "generated"
+                    print(f"     ✅ {event.document_type} {source} ({len(doc.content)} chars) "
+                          f"[{event.completed}/{event.total}, {event.seconds:.1f}s]")
+                    if filepath:
+                        print(f"     💾 Saved to: {filepath}")
+                    else:
+                        # Empty response - nothing was streamed
+                        self.save_document_to_file(doc, demo_mode=use_demo_mode)
 
-                    # Save document to file (pass demo_mode flag)
-                    self.save_document_to_file(doc, demo_mode=use_demo_mode)
+                self.generated_documents.sort(key=lambda doc: selected.index(doc.document_type.value))
+                if failed:
+                    print(f"\n⚠️  {len(failed)} of {len(selected)} documents failed: {', '.join(failed)}")
 
-                print(f"\n✅ All {len(selected)} documents generated successfully!")
+                print(f"\n✅ {len(self.generated_documents)} of {len(selected)} documents generated!")
 
                 if use_demo_mode:
                     print(f"\n📁 Documents saved to: data/generated_docs/without_knowledge/")
@@ -1917,6 +1952,12 @@ Keep paragraph numbers (§) with their corresponding text."""
                     else:
                         self.kb_viewer.insert("end", f"Confidence: {conf}\n")
 
+                    # Query-time confidence (confirmations + temporal decay)
+                    effective = chunk.metadata.get('effective_confidence')
+                    if isinstance(effective, (int, float)):
+                        confirmations = chunk.metadata.get('confirmation_count', 0)
+                        self.kb_viewer.insert("end", f"  → Current: {effective:.2f} ({confirmations} confirmations)\n")
+
                     # Show calculation breakdown if available
                     breakdown = chunk.metadata.get('confidence_breakdown')
                     if breakdown:
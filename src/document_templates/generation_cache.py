@@ -0,0 +1,186 @@
+"""
+Generation Cache - On-disk cache of generated documents
+
+Regenerating an unchanged project (clicking Generate twice, rerunning the demo)
+used to pay for the full generation again. Documents are cached keyed by the
+project, document type, the complete prompt (which holds the retrieved
+context), the shared prompt prefix, GEMINI_MODEL, TEMPERATURE and MAX_TOKENS,
+so any change to one of them misses. Entries expire after
+GENERATION_CACHE_TTL_SECONDS.
+
+A cached document is returned as it was first generated (same document_id),
+with from_cache, cache_key and cached_at recording where it came from.
+
+Usage:
+    python -m src.document_templates.generation_cache stats
+    python -m src.document_templates.generation_cache clear [--older-than DAYS]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Optional
+
+from pydantic import ValidationError
+
+from config.settings import GENERATION_CACHE_DIR, GENERATION_CACHE_TTL_SECONDS
+from src.models import BuildingProject, DocumentType, GeneratedDocument
+
+
+class GenerationCache:
+    """Content-addressed cache of GeneratedDocument outputs"""
+
+    def __init__(
+        self,
+        cache_dir: Path = GENERATION_CACHE_DIR,
+        enabled: bool = True,
+        ttl_seconds: Optional[int] = GENERATION_CACHE_TTL_SECONDS
+    ):
+        """
+        Initialize the cache
+
+        Args:
+            cache_dir: Directory holding one JSON file per cached document
+            enabled: When False, get() always misses and put() does nothing
+            ttl_seconds: Entries older than this are misses (None or 0 = never expire)
+        """
+        self.cache_dir = Path(cache_dir)
+        self.enabled = enabled
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(
+        project: BuildingProject,
+        document_type: DocumentType,
+        prompt: str,
+        model: str,
+        config: Optional[Dict] = None,
+        prefix: str = ""
+    ) -> str:
+        """Cache key for one (project, document type, prompt, prefix, model, config) combination"""
+        material = json.dumps(
+            {
+                "project": project.model_dump(mode="json"),
+                "document_type": DocumentType(document_type).value,
+                "prompt": hashlib.sha256(prompt.encode('utf-8')).hexdigest(),
+                "prefix": hashlib.sha256(prefix.encode('utf-8')).hexdigest(),
+                "model": model,
+                "config": config or {}
+            },
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[GeneratedDocument]:
+        """
+        Look up a cached document
+
+        Args:
+            key: Key from make_key()
+
+        Returns:
+            The cached document (from_cache=True), or None on a miss or expired entry
+        """
+        if not self.enabled:
+            return None
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                document = GeneratedDocument.model_validate_json(f.read())
+        except (OSError, ValueError, ValidationError):
+            self.misses += 1
+            return None
+
+        if document.cached_at is None or (
+            self.ttl_seconds and document.cached_at < datetime.now() - timedelta(seconds=self.ttl_seconds)
+        ):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return document.model_copy(update={"from_cache": True})
+
+    def put(self, document: GeneratedDocument) -> Optional[GeneratedDocument]:
+        """
+        Store a document under its cache_key (written atomically, so readers never see partial files)
+
+        Args:
+            document: Generated document with cache_key set
+
+        Returns:
+            The document with cached_at set, or None if it was not stored
+        """
+        if not self.enabled or not document.cache_key or not document.content:
+            return None
+        document = document.model_copy(update={"cached_at": datetime.now()})
+        path = self._path(document.cache_key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(document.model_dump_json())
+        os.replace(tmp_path, path)
+        return document
+
+    def invalidate(self, older_than_days: Optional[float] = None) -> int:
+        """
+        Remove cached documents
+
+        Args:
+            older_than_days: Only remove entries older than this many days (default: all)
+
+        Returns:
+            Number of entries removed
+        """
+        if not self.cache_dir.exists():
+            return 0
+
+        cutoff = None
+        if older_than_days is not None:
+            cutoff = (datetime.now() - timedelta(days=older_than_days)).timestamp()
+
+        removed = 0
+        for entry in self.cache_dir.glob("*/*.json"):
+            if cutoff is None or entry.stat().st_mtime < cutoff:
+                entry.unlink()
+                removed += 1
+        for directory in self.cache_dir.iterdir():
+            if directory.is_dir() and not any(directory.iterdir()):
+                directory.rmdir()
+        return removed
+
+    def stats(self) -> Dict:
+        """Number of cached documents and bytes on disk"""
+        if not self.cache_dir.exists():
+            return {"entries": 0, "bytes": 0}
+        entries = list(self.cache_dir.glob("*/*.json"))
+        return {
+            "entries": len(entries),
+            "bytes": sum(entry.stat().st_size for entry in entries)
+        }
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Inspect or invalidate the generated document cache")
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("stats", help="Show cache size")
+    clear_parser = commands.add_parser("clear", help="Invalidate cached documents")
+    clear_parser.add_argument("--older-than", type=float, metavar="DAYS", help="Only entries older than DAYS")
+    args = arg_parser.parse_args()
+
+    cache = GenerationCache()
+    if args.command == "stats":
+        stats = cache.stats()
+        print(f"Generation cache: {cache.cache_dir}")
+        print(f"  Documents: {stats['entries']}")
+        print(f"  Size:      {stats['bytes'] / 1024:.1f} KB")
+    else:
+        removed = cache.invalidate(args.older_than)
+        print(f"✅ Removed {removed} cached documents")
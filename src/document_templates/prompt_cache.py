@@ -0,0 +1,90 @@
+"""
+Prompt Cache - Register a shared prompt prefix once with Gemini context caching
+
+All documents of a project share the same prefix (project facts and BR18
+regulations for its fire classification). PromptPrefixCache creates one Gemini
+cached content per distinct prefix and hands out its name, so each document
+call only sends its own instructions.
+
+If the prefix is too small for explicit caching, or creating the cache fails,
+cache_name() returns None and the caller sends the prefix inline at the start
+of the prompt. Identical prompt starts still benefit from Gemini's implicit
+caching.
+"""
+
+import hashlib
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from google.genai import types
+
+from config.settings import GEMINI_MODEL, SHARED_PREFIX_CACHE_TTL_SECONDS, SHARED_PREFIX_MIN_CACHE_TOKENS
+from src.token_budget import estimate_tokens
+
+
+class PromptPrefixCache:
+    """Gemini cached contents for shared prompt prefixes, with an inline fallback"""
+
+    def __init__(
+        self,
+        client,
+        model: str = GEMINI_MODEL,
+        ttl_seconds: int = SHARED_PREFIX_CACHE_TTL_SECONDS,
+        min_tokens: int = SHARED_PREFIX_MIN_CACHE_TOKENS
+    ):
+        """
+        Initialize the cache
+
+        Args:
+            client: genai.Client
+            model: Model the cached content is created for (must match the generation model)
+            ttl_seconds: Lifetime of each cached content
+            min_tokens: Smaller prefixes are not cached explicitly (below the API minimum)
+        """
+        self.client = client
+        self.model = model
+        self.ttl_seconds = ttl_seconds
+        self.min_tokens = min_tokens
+        self._entries: Dict[str, Tuple[Optional[str], float]] = {}  # prefix sha256 -> (cache name, expires)
+        self._lock = threading.Lock()
+
+    def cache_name(self, prefix: str) -> Optional[str]:
+        """
+        Name of the cached content holding this prefix, created on first use
+
+        Concurrent callers with the same prefix wait for one creation request.
+
+        Args:
+            prefix: Shared prompt prefix
+
+        Returns:
+            Cached content name, or None if the prefix must be sent inline
+        """
+        if estimate_tokens(prefix) < self.min_tokens:
+            return None
+
+        key = hashlib.sha256(prefix.encode('utf-8')).hexdigest()
+        with self._lock:
+            name, expires = self._entries.get(key, (None, 0.0))
+            # Renew a minute early so no request uses an expiring cache
+            if time.time() < expires - 60:
+                return name
+
+            try:
+                cached = self.client.caches.create(
+                    model=self.model,
+                    config=types.CreateCachedContentConfig(
+                        contents=[prefix],
+                        display_name=f"br18-prefix-{key[:12]}",
+                        ttl=f"{self.ttl_seconds}s"
+                    )
+                )
+                name = cached.name
+                print(f"🗄️  Shared prompt prefix cached ({estimate_tokens(prefix)} tokens, {self.ttl_seconds}s)")
+            except Exception as e:
+                # Inline prefix for this TTL period instead of retrying on every document
+                name = None
+                print(f"⚠️  Context caching unavailable, sending shared prefix inline: {e}")
+            self._entries[key] = (name, time.time() + self.ttl_seconds)
+            return name
@@ -1,17 +1,295 @@
 from google import genai
 from google.genai import types
-from typing import List, Dict, Optional
-from config.settings import GEMINI_API_KEY, GEMINI_MODEL, TEMPERATURE, MAX_TOKENS
+from typing import Callable, Iterator, List, Dict, Optional, Tuple, Union
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pydantic import BaseModel
+from config.settings import (
+    GEMINI_API_KEY,
+    GEMINI_MODEL,
+    TEMPERATURE,
+    MAX_TOKENS,
+    PROMPT_CONTEXT_MAX_TOKENS,
+    PACKAGE_GENERATION_WORKERS,
+    DOCUMENT_DEPENDENCIES,
+    UPSTREAM_SUMMARY_MAX_TOKENS,
+    DOWNSTREAM_CONTEXT_MAX_TOKENS,
+    SHARED_PROMPT_PREFIX,
+    SHARED_PREFIX_REGULATION_CHUNKS,
+    SHARED_PREFIX_MAX_TOKENS,
+    GENERATION_CACHE
+)
 from src.models import BuildingProject, DocumentType, GeneratedDocument
+from src.document_templates.generation_cache import GenerationCache
+from src.document_templates.prompt_cache import PromptPrefixCache
+from src.rate_limiter import get_rate_limiter
+from src.token_budget import estimate_tokens, truncate_to_tokens
 from datetime import datetime
+import re
+import threading
+import time
 import uuid
 
+
+class PackageEvent(BaseModel):
+    """Completion or failure of one document in a package (see generate_package)"""
+    document_type: str
+    status: str  # "completed" or "failed"
+    document: Optional[GeneratedDocument] = None
+    error: Optional[str] = None
+    seconds: float = 0.0  # Time this document took to generate (not since the package started)
+    completed: int  # Documents finished so far, including this one
+    total: int
+
+
+class DocumentStream:
+    """
+    Text deltas of a document while Gemini generates it
+
+    Iterate to receive the deltas; afterwards .document holds the assembled
+    GeneratedDocument. document_id and generated_at are fixed up front, so
+    output can be written before the document is complete.
+    """
+
+    def __init__(self, project: BuildingProject, document_type: DocumentType,
+                 rag_context: List[str], deltas: Iterator[str], cache_key: Optional[str] = None,
+                 on_complete: Optional[Callable[[GeneratedDocument], Optional[GeneratedDocument]]] = None):
+        self.project = project
+        self.document_type = document_type
+        self.rag_context = rag_context
+        self.document_id = str(uuid.uuid4())
+        self.generated_at = datetime.now()
+        self.cache_key = cache_key
+        self.document: Optional[GeneratedDocument] = None
+        self._deltas = deltas
+        self._on_complete = on_complete  # e.g. GenerationCache.put; may return an updated document
+        self._cached: Optional[GeneratedDocument] = None
+
+    @classmethod
+    def replay(cls, document: GeneratedDocument) -> "DocumentStream":
+        """Stream of an already generated (cached) document, yielding its content as one delta"""
+        stream = cls(document.project, document.document_type, document.rag_context_used,
+                     iter([document.content]), document.cache_key)
+        stream.document_id = document.document_id
+        stream.generated_at = document.generated_at
+        stream._cached = document
+        return stream
+
+    @property
+    def from_cache(self) -> bool:
+        return self._cached is not None
+
+    def close(self):
+        """Stop generating (ends the request and frees its rate-limit slot); a no-op once exhausted"""
+        close = getattr(self._deltas, "close", None)
+        if close:
+            close()
+
+    def __iter__(self) -> Iterator[str]:
+        parts = []
+        for delta in self._deltas:
+            parts.append(delta)
+            yield delta
+        if self._cached is not None:
+            self.document = self._cached
+            return
+        document = GeneratedDocument(
+            document_id=self.document_id,
+            project=self.project,
+            document_type=self.document_type,
+            content="".join(parts),
+            generated_at=self.generated_at,
+            rag_context_used=self.rag_context,
+            cache_key=self.cache_key
+        )
+        self.document = (self._on_complete(document) if self._on_complete else None) or document
+
+
 class DocumentTemplateEngine:
     """Generate BR18 documents using templates and RAG context"""
 
-    def __init__(self, vector_store=None):
+    def __init__(self, vector_store=None, shared_prefix: Optional[bool] = None, use_cache: Optional[bool] = None):
+        """
+        Initialize the engine
+
+        Args:
+            vector_store: Optional vector store for enhanced retrieval
+            shared_prefix: Send project facts and BR18 regulations as one cached prefix
+                per project (default: SHARED_PROMPT_PREFIX setting)
+            use_cache: Reuse documents whose project, type, prompt, model and config are
+                unchanged (default: GENERATION_CACHE setting)
+        """
         self.client = genai.Client(api_key=GEMINI_API_KEY)
         self.vector_store = vector_store  # Optional vector store for enhanced retrieval
+        self.rate_limiter = get_rate_limiter()  # Shared with every other concurrent caller
+        self.shared_prefix = SHARED_PROMPT_PREFIX if shared_prefix is None else shared_prefix
+        self.prefix_cache = PromptPrefixCache(self.client)
+        self.generation_cache = GenerationCache(enabled=GENERATION_CACHE if use_cache is None else use_cache)
+        self._regulations: Dict[str, List[str]] = {}  # Fire classification -> regulation chunks
+        self._regulations_lock = threading.Lock()
+
+    def _regulation_context(self, fire_classification: str) -> List[str]:
+        """
+        BR18 regulation chunks for a fire classification (retrieved once per engine)
+
+        An empty result is not kept, so regulations ingested later are found.
+        """
+        if not self.vector_store:
+            return []
+        with self._regulations_lock:
+            if fire_classification not in self._regulations:
+                results = self.vector_store.search(
+                    query=f"BR18 fire safety regulations {fire_classification} brandklasse brandsikring dokumentation",
+                    top_k=SHARED_PREFIX_REGULATION_CHUNKS * 4
+                )
+                regulations = [
+                    f"[BR18 REGULATION]\n{chunk.content}" for chunk in results if chunk.source_type == "regulation"
+                ][:SHARED_PREFIX_REGULATION_CHUNKS]
+                if not regulations:
+                    return []
+                self._regulations[fire_classification] = regulations
+            return self._regulations[fire_classification]
+
+    def clear_regulation_context(self):
+        """Forget the retrieved regulation chunks (call after BR18 has been (re-)ingested)"""
+        with self._regulations_lock:
+            self._regulations.clear()
+
+    def _shared_prefix(self, project: BuildingProject, regulations: bool = True) -> str:
+        """
+        Prompt prefix shared by every document of a project
+
+        Identical for all documents of the project, so it is cached (or implicitly
+        reused) once instead of re-processed per document. Without regulations it
+        holds only the project facts (for documents generated without knowledge).
+        """
+        facts = f"""SHARED PROJECT CONTEXT (applies to every document of this project)
+
+PROJECT FACTS:
+- Project: {project.project_name}
+- Address: {project.address}
+- Municipality: {project.municipality}
+- Building Type: {project.building_type}
+- Total Area: {project.total_area_m2} m²
+- Floors: {project.floors}
+- Max Occupancy: {project.occupancy} people
+- Fire Load: {project.fire_load_mj_m2} MJ/m²
+- Application Category: {project.application_category.value}
+- Risk Class: {project.risk_class.value}
+- Fire Classification: {project.fire_classification.value}
+- Consultant: {project.consultant_name} (certificate {project.consultant_certificate})
+- Client: {project.client_name}"""
+        if not regulations:
+            return facts
+        regulation_context = self._assemble_context(
+            self._regulation_context(project.fire_classification.value),
+            max(0, SHARED_PREFIX_MAX_TOKENS - estimate_tokens(facts))
+        )
+        if not regulation_context:
+            return facts
+        return f"{facts}\n\nBR18 REGULATIONS FOR {project.fire_classification.value}:\n{regulation_context}"
+
+    def _project_details(self, details: str) -> str:
+        """A prompt's PROJECT DETAILS block, unless the shared prefix already carries the project facts"""
+        if self.shared_prefix:
+            return "PROJECT DETAILS: see PROJECT FACTS in the shared project context."
+        return details
+
+    def _request(self, prompt: str, project: Optional[BuildingProject],
+                 regulations: bool = True) -> Tuple[List[str], types.GenerateContentConfig]:
+        """
+        Contents and config of a document request
+
+        With a project and shared_prefix enabled, the project's shared prefix is
+        referenced as Gemini cached content, or sent inline at the start of the prompt.
+        regulations=False leaves the BR18 regulations out of the prefix.
+        """
+        contents = [prompt]
+        cached_content = None
+        if project is not None and self.shared_prefix:
+            prefix = self._shared_prefix(project, regulations)
+            cached_content = self.prefix_cache.cache_name(prefix)
+            if cached_content is None:
+                contents = [f"{prefix}\n\n{prompt}"]
+        config = types.GenerateContentConfig(
+            temperature=TEMPERATURE,
+            max_output_tokens=MAX_TOKENS,
+            cached_content=cached_content,
+        )
+        return contents, config
+
+    def _generate_content(self, prompt: str, project: Optional[BuildingProject] = None,
+                          regulations: bool = True) -> str:
+        """Generate a document's text from its prompt (within the shared rate limit)"""
+        contents, config = self._request(prompt, project, regulations)
+        with self.rate_limiter:
+            response = self.client.models.generate_content(
+                model=GEMINI_MODEL,
+                contents=contents,
+                config=config
+            )
+        return response.text
+
+    def _generate_content_stream(self, prompt: str, project: Optional[BuildingProject] = None,
+                                 regulations: bool = True) -> Iterator[str]:
+        """Generate a document's text from its prompt, yielding it as it arrives"""
+        contents, config = self._request(prompt, project, regulations)
+        # The rate-limit slot is held until the stream ends, or until the
+        # consumer closes it (DocumentStream.close)
+        self.rate_limiter.acquire()
+        try:
+            for chunk in self.client.models.generate_content_stream(
+                model=GEMINI_MODEL,
+                contents=contents,
+                config=config
+            ):
+                if chunk.text:
+                    yield chunk.text
+        finally:
+            self.rate_limiter.release()
+
+    def _cached_document(self, project: BuildingProject, document_type: DocumentType,
+                         prompt: str, regulations: bool = True) -> Tuple[Optional[str], Optional[GeneratedDocument]]:
+        """
+        Generation cache key for a prompt, and the cached document if there is one
+
+        Returns:
+            (cache key, cached document); (None, None) when the cache is disabled
+        """
+        if not self.generation_cache.enabled:
+            return None, None
+        cache_key = GenerationCache.make_key(
+            project,
+            document_type,
+            prompt,
+            GEMINI_MODEL,
+            {"temperature": TEMPERATURE, "max_output_tokens": MAX_TOKENS},
+            self._shared_prefix(project, regulations) if self.shared_prefix else ""
+        )
+        cached = self.generation_cache.get(cache_key)
+        if cached:
+            print(f"♻️  {DocumentType(document_type).value} unchanged - reusing document generated "
+                  f"{cached.generated_at.strftime('%Y-%m-%d %H:%M')}")
+        return cache_key, cached
+
+    def _generate(self, project: BuildingProject, document_type: DocumentType,
+                  prompt: str, rag_context: List[str], regulations: bool = True) -> GeneratedDocument:
+        """
+        Generate a document from its prompt, or return it from the generation cache
+
+        regulations=False leaves the BR18 regulations out of the shared prefix.
+        """
+        cache_key, cached = self._cached_document(project, document_type, prompt, regulations)
+        if cached:
+            return cached
+        document = GeneratedDocument(
+            document_id=str(uuid.uuid4()),
+            project=project,
+            document_type=document_type,
+            content=self._generate_content(prompt, project, regulations),
+            rag_context_used=rag_context,
+            cache_key=cache_key
+        )
+        return self.generation_cache.put(document) or document
 
     def _retrieve_enhanced_context(
         self,
@@ -66,6 +344,39 @@ class DocumentTemplateEngine:
 
         return context_parts
 
+    @staticmethod
+    def _assemble_context(rag_context: Optional[List[str]], max_tokens: int = PROMPT_CONTEXT_MAX_TOKENS) -> str:
+        """
+        Join retrieved context parts into the prompt's context block, within a token budget
+
+        Parts are kept in retrieval order; the first part that does not fit is
+        cut at a line/word boundary if a useful amount of budget is left.
+
+        Args:
+            rag_context: Context strings (most relevant first)
+            max_tokens: Token budget for the whole block
+
+        Returns:
+            Context block for the prompt
+        """
+        if not rag_context:
+            return ""
+
+        separator_tokens = estimate_tokens("\n\n")
+        parts, used = [], 0
+        for part in rag_context:
+            tokens = estimate_tokens(part) + (separator_tokens if parts else 0)
+            if used + tokens <= max_tokens:
+                parts.append(part)
+                used += tokens
+                continue
+            remaining = max_tokens - used - (separator_tokens if parts else 0)
+            if remaining >= 200:
+                parts.append(truncate_to_tokens(part, remaining))
+            print(f"⚠️  RAG context trimmed to ~{max_tokens} tokens ({len(parts)}/{len(rag_context)} parts)")
+            break
+        return "\n\n".join(parts)
+
     def generate_start_document(
         self,
         project: BuildingProject,
@@ -81,20 +392,29 @@ class DocumentTemplateEngine:
         Returns:
             Generated document
         """
+        return self._generate(
+            project, DocumentType.START, *self._build_start_prompt(project, rag_context), regulations=rag_context != []
+        )
+
+    def _build_start_prompt(
+        self,
+        project: BuildingProject,
+        rag_context: Optional[List[str]] = None
+    ) -> Tuple[str, List[str]]:
+        """Prompt and the RAG context it uses for a START document"""
         # Use enhanced retrieval if vector_store is available and no context provided
         if rag_context is None and self.vector_store:
             query = f"START declaration {project.fire_classification.value} {project.municipality}"
             rag_context = self._retrieve_enhanced_context(
                 query=query,
                 municipality=project.municipality,
-                document_type="START"
+                document_type="START",
+                include_br18=not self.shared_prefix  # Regulations are in the shared prefix
             )
 
-        context_str = "\n\n".join(rag_context) if rag_context else ""
-
-        prompt = f"""Generate a START (Starterklæring - Declaration) document for a BR18 fire safety submission.
+        context_str = self._assemble_context(rag_context)
 
-PROJECT DETAILS:
+        project_details = self._project_details(f"""PROJECT DETAILS:
 - Project Name: {project.project_name}
 - Address: {project.address}
 - Municipality: {project.municipality}
@@ -107,7 +427,11 @@ PROJECT DETAILS:
 - Risk Class: {project.risk_class.value}
 - Consultant: {project.consultant_name}
 - Certificate: {project.consultant_certificate}
-- Client: {project.client_name}
+- Client: {project.client_name}""")
+
+        prompt = f"""Generate a START (Starterklæring - Declaration) document for a BR18 fire safety submission.
+
+{project_details}
 
 REFERENCE EXAMPLES AND REQUIREMENTS:
 {context_str}
@@ -130,22 +454,7 @@ Generate a complete START document following the standard structure:
 
 Output in Danish, following BR18 regulations."""
 
-        response = self.client.models.generate_content(
-            model=GEMINI_MODEL,
-            contents=[prompt],
-            config=types.GenerateContentConfig(
-                temperature=TEMPERATURE,
-                max_output_tokens=MAX_TOKENS,
-            )
-        )
-
-        return GeneratedDocument(
-            document_id=str(uuid.uuid4()),
-            project=project,
-            document_type=DocumentType.START,
-            content=response.text,
-            rag_context_used=rag_context or []
-        )
+        return prompt, rag_context or []
 
     def generate_dbk_document(
         self,
@@ -162,20 +471,29 @@ Output in Danish, following BR18 regulations."""
         Returns:
             Generated document
         """
+        return self._generate(
+            project, DocumentType.DBK, *self._build_dbk_prompt(project, rag_context), regulations=rag_context != []
+        )
+
+    def _build_dbk_prompt(
+        self,
+        project: BuildingProject,
+        rag_context: Optional[List[str]] = None
+    ) -> Tuple[str, List[str]]:
+        """Prompt and the RAG context it uses for a DBK document"""
         # Use enhanced retrieval if vector_store is available and no context provided
         if rag_context is None and self.vector_store:
             query = f"DBK fire classification {project.fire_classification.value} evacuation fire strategy"
             rag_context = self._retrieve_enhanced_context(
                 query=query,
                 municipality=project.municipality,
-                document_type="DBK"
+                document_type="DBK",
+                include_br18=not self.shared_prefix  # Regulations are in the shared prefix
             )
 
-        context_str = "\n\n".join(rag_context) if rag_context else ""
-
-        prompt = f"""Generate a DBK (Dokumentation for Brandteknisk Klassificering) document for BR18 submission.
+        context_str = self._assemble_context(rag_context)
 
-PROJECT DETAILS:
+        project_details = self._project_details(f"""PROJECT DETAILS:
 - Project Name: {project.project_name}
 - Address: {project.address}
 - Municipality: {project.municipality}
@@ -183,7 +501,11 @@ PROJECT DETAILS:
 - Total Area: {project.total_area_m2} m²
 - Floors: {project.floors}
 - Fire Classification: {project.fire_classification.value}
-- Fire Load: {project.fire_load_mj_m2 or 'Not specified'} MJ/m²
+- Fire Load: {project.fire_load_mj_m2 or 'Not specified'} MJ/m²""")
+
+        prompt = f"""Generate a DBK (Dokumentation for Brandteknisk Klassificering) document for BR18 submission.
+
+{project_details}
 
 REFERENCE EXAMPLES AND REQUIREMENTS:
 {context_str}
@@ -209,22 +531,7 @@ Generate a complete DBK document following the standard structure:
 
 Output in Danish with proper technical terminology."""
 
-        response = self.client.models.generate_content(
-            model=GEMINI_MODEL,
-            contents=[prompt],
-            config=types.GenerateContentConfig(
-                temperature=TEMPERATURE,
-                max_output_tokens=MAX_TOKENS,
-            )
-        )
-
-        return GeneratedDocument(
-            document_id=str(uuid.uuid4()),
-            project=project,
-            document_type=DocumentType.DBK,
-            content=response.text,
-            rag_context_used=rag_context or []
-        )
+        return prompt, rag_context or []
 
     def generate_kpla_document(
         self,
@@ -241,16 +548,28 @@ Output in Danish with proper technical terminology."""
         Returns:
             Generated document
         """
-        context_str = "\n\n".join(rag_context) if rag_context else ""
+        return self._generate(
+            project, DocumentType.KPLA, *self._build_kpla_prompt(project, rag_context), regulations=rag_context != []
+        )
 
-        prompt = f"""Generate a KPLA (Kontrolplan - Control Plan) document for BR18 submission.
+    def _build_kpla_prompt(
+        self,
+        project: BuildingProject,
+        rag_context: Optional[List[str]] = None
+    ) -> Tuple[str, List[str]]:
+        """Prompt and the RAG context it uses for a KPLA document"""
+        context_str = self._assemble_context(rag_context)
 
-PROJECT DETAILS:
+        project_details = self._project_details(f"""PROJECT DETAILS:
 - Project Name: {project.project_name}
 - Address: {project.address}
 - Municipality: {project.municipality}
 - Building Type: {project.building_type}
-- Fire Classification: {project.fire_classification.value}
+- Fire Classification: {project.fire_classification.value}""")
+
+        prompt = f"""Generate a KPLA (Kontrolplan - Control Plan) document for BR18 submission.
+
+{project_details}
 
 REFERENCE EXAMPLES AND REQUIREMENTS:
 {context_str}
@@ -265,22 +584,7 @@ The control plan must specify:
 
 Generate a comprehensive KPLA document in Danish following BR18 requirements."""
 
-        response = self.client.models.generate_content(
-            model=GEMINI_MODEL,
-            contents=[prompt],
-            config=types.GenerateContentConfig(
-                temperature=TEMPERATURE,
-                max_output_tokens=MAX_TOKENS,
-            )
-        )
-
-        return GeneratedDocument(
-            document_id=str(uuid.uuid4()),
-            project=project,
-            document_type=DocumentType.KPLA,
-            content=response.text,
-            rag_context_used=rag_context or []
-        )
+        return prompt, rag_context or []
 
     def generate_itt_document(
         self,
@@ -288,18 +592,30 @@ Generate a comprehensive KPLA document in Danish following BR18 requirements."""
         rag_context: Optional[List[str]] = None
     ) -> GeneratedDocument:
         """Generate ITT (Indsatstaktisk Tegning - Rescue Service Tactical Conditions) document"""
-        context_str = "\n\n".join(rag_context) if rag_context else ""
+        return self._generate(
+            project, DocumentType.ITT, *self._build_itt_prompt(project, rag_context), regulations=rag_context != []
+        )
 
-        prompt = f"""Generate an ITT (Redningsberedskabets indsatsforhold - Rescue Service Tactical Conditions) document for BR18 submission.
+    def _build_itt_prompt(
+        self,
+        project: BuildingProject,
+        rag_context: Optional[List[str]] = None
+    ) -> Tuple[str, List[str]]:
+        """Prompt and the RAG context it uses for a ITT document"""
+        context_str = self._assemble_context(rag_context)
 
-PROJECT DETAILS:
+        project_details = self._project_details(f"""PROJECT DETAILS:
 - Project: {project.project_name}
 - Address: {project.address}
 - Municipality: {project.municipality}
 - Building Type: {project.building_type}
 - Total Area: {project.total_area_m2} m²
 - Floors: {project.floors}
-- Fire Classification: {project.fire_classification.value}
+- Fire Classification: {project.fire_classification.value}""")
+
+        prompt = f"""Generate an ITT (Redningsberedskabets indsatsforhold - Rescue Service Tactical Conditions) document for BR18 submission.
+
+{project_details}
 
 REFERENCE EXAMPLES:
 {context_str}
@@ -314,16 +630,7 @@ Generate a complete ITT document in Danish covering:
 
 Output in Danish following BR18 requirements for rescue service conditions."""
 
-        response = self.client.models.generate_content(
-            model=GEMINI_MODEL, contents=[prompt],
-            config=types.GenerateContentConfig(temperature=TEMPERATURE, max_output_tokens=MAX_TOKENS)
-        )
-
-        return GeneratedDocument(
-            document_id=str(uuid.uuid4()), project=project,
-            document_type=DocumentType.ITT, content=response.text,
-            rag_context_used=rag_context or []
-        )
+        return prompt, rag_context or []
 
     def generate_bsr_document(
         self,
@@ -331,17 +638,29 @@ Output in Danish following BR18 requirements for rescue service conditions."""
         rag_context: Optional[List[str]] = None
     ) -> GeneratedDocument:
         """Generate BSR (Brandstrategirapport - Fire Strategy Report) document"""
-        context_str = "\n\n".join(rag_context) if rag_context else ""
+        return self._generate(
+            project, DocumentType.BSR, *self._build_bsr_prompt(project, rag_context), regulations=rag_context != []
+        )
 
-        prompt = f"""Generate a BSR (Brandstrategirapport - Fire Strategy Report) for BR18 submission.
+    def _build_bsr_prompt(
+        self,
+        project: BuildingProject,
+        rag_context: Optional[List[str]] = None
+    ) -> Tuple[str, List[str]]:
+        """Prompt and the RAG context it uses for a BSR document"""
+        context_str = self._assemble_context(rag_context)
 
-PROJECT DETAILS:
+        project_details = self._project_details(f"""PROJECT DETAILS:
 - Project: {project.project_name}
 - Building Type: {project.building_type}
 - Total Area: {project.total_area_m2} m²
 - Floors: {project.floors}
 - Fire Classification: {project.fire_classification.value}
-- Occupancy: {project.occupancy} persons
+- Occupancy: {project.occupancy} persons""")
+
+        prompt = f"""Generate a BSR (Brandstrategirapport - Fire Strategy Report) for BR18 submission.
+
+{project_details}
 
 REFERENCE EXAMPLES:
 {context_str}
@@ -357,16 +676,7 @@ Generate a comprehensive BSR document in Danish covering:
 
 Output in Danish with proper technical terminology."""
 
-        response = self.client.models.generate_content(
-            model=GEMINI_MODEL, contents=[prompt],
-            config=types.GenerateContentConfig(temperature=TEMPERATURE, max_output_tokens=MAX_TOKENS)
-        )
-
-        return GeneratedDocument(
-            document_id=str(uuid.uuid4()), project=project,
-            document_type=DocumentType.BSR, content=response.text,
-            rag_context_used=rag_context or []
-        )
+        return prompt, rag_context or []
 
     def generate_bplan_document(
         self,
@@ -374,15 +684,27 @@ Output in Danish with proper technical terminology."""
         rag_context: Optional[List[str]] = None
     ) -> GeneratedDocument:
         """Generate BPLAN (Brandplaner og situationsplan - Fire Plans and Site Plan) document"""
-        context_str = "\n\n".join(rag_context) if rag_context else ""
+        return self._generate(
+            project, DocumentType.BPLAN, *self._build_bplan_prompt(project, rag_context), regulations=rag_context != []
+        )
 
-        prompt = f"""Generate BPLAN (Brandplaner og situationsplan - Fire Plans and Site Plan) for BR18 submission.
+    def _build_bplan_prompt(
+        self,
+        project: BuildingProject,
+        rag_context: Optional[List[str]] = None
+    ) -> Tuple[str, List[str]]:
+        """Prompt and the RAG context it uses for a BPLAN document"""
+        context_str = self._assemble_context(rag_context)
 
-PROJECT DETAILS:
+        project_details = self._project_details(f"""PROJECT DETAILS:
 - Project: {project.project_name}
 - Address: {project.address}
 - Total Area: {project.total_area_m2} m²
-- Floors: {project.floors}
+- Floors: {project.floors}""")
+
+        prompt = f"""Generate BPLAN (Brandplaner og situationsplan - Fire Plans and Site Plan) for BR18 submission.
+
+{project_details}
 
 REFERENCE EXAMPLES:
 {context_str}
@@ -399,16 +721,7 @@ Generate a BPLAN document in Danish describing:
 
 Output in Danish following BR18 technical drawing requirements."""
 
-        response = self.client.models.generate_content(
-            model=GEMINI_MODEL, contents=[prompt],
-            config=types.GenerateContentConfig(temperature=TEMPERATURE, max_output_tokens=MAX_TOKENS)
-        )
-
-        return GeneratedDocument(
-            document_id=str(uuid.uuid4()), project=project,
-            document_type=DocumentType.BPLAN, content=response.text,
-            rag_context_used=rag_context or []
-        )
+        return prompt, rag_context or []
 
     def generate_pfp_document(
         self,
@@ -416,15 +729,27 @@ Output in Danish following BR18 technical drawing requirements."""
         rag_context: Optional[List[str]] = None
     ) -> GeneratedDocument:
         """Generate PFP (Pladsfordelingsplaner - Occupancy Distribution Plans) document"""
-        context_str = "\n\n".join(rag_context) if rag_context else ""
+        return self._generate(
+            project, DocumentType.PFP, *self._build_pfp_prompt(project, rag_context), regulations=rag_context != []
+        )
 
-        prompt = f"""Generate PFP (Pladsfordelingsplaner - Occupancy Distribution Plans) for BR18 submission.
+    def _build_pfp_prompt(
+        self,
+        project: BuildingProject,
+        rag_context: Optional[List[str]] = None
+    ) -> Tuple[str, List[str]]:
+        """Prompt and the RAG context it uses for a PFP document"""
+        context_str = self._assemble_context(rag_context)
 
-PROJECT DETAILS:
+        project_details = self._project_details(f"""PROJECT DETAILS:
 - Project: {project.project_name}
 - Building Type: {project.building_type}
 - Total Area: {project.total_area_m2} m²
-- Occupancy: {project.occupancy} persons
+- Occupancy: {project.occupancy} persons""")
+
+        prompt = f"""Generate PFP (Pladsfordelingsplaner - Occupancy Distribution Plans) for BR18 submission.
+
+{project_details}
 
 REFERENCE EXAMPLES:
 {context_str}
@@ -438,16 +763,7 @@ Generate a PFP document in Danish covering:
 
 Output in Danish with calculations and justifications."""
 
-        response = self.client.models.generate_content(
-            model=GEMINI_MODEL, contents=[prompt],
-            config=types.GenerateContentConfig(temperature=TEMPERATURE, max_output_tokens=MAX_TOKENS)
-        )
-
-        return GeneratedDocument(
-            document_id=str(uuid.uuid4()), project=project,
-            document_type=DocumentType.PFP, content=response.text,
-            rag_context_used=rag_context or []
-        )
+        return prompt, rag_context or []
 
     def generate_dim_document(
         self,
@@ -455,15 +771,27 @@ Output in Danish with calculations and justifications."""
         rag_context: Optional[List[str]] = None
     ) -> GeneratedDocument:
         """Generate DIM (Brandteknisk dimensionering - Fire Engineering Calculations) document"""
-        context_str = "\n\n".join(rag_context) if rag_context else ""
+        return self._generate(
+            project, DocumentType.DIM, *self._build_dim_prompt(project, rag_context), regulations=rag_context != []
+        )
 
-        prompt = f"""Generate DIM (Brandteknisk dimensionering - Fire Engineering Calculations) for BR18 submission.
+    def _build_dim_prompt(
+        self,
+        project: BuildingProject,
+        rag_context: Optional[List[str]] = None
+    ) -> Tuple[str, List[str]]:
+        """Prompt and the RAG context it uses for a DIM document"""
+        context_str = self._assemble_context(rag_context)
 
-PROJECT DETAILS:
+        project_details = self._project_details(f"""PROJECT DETAILS:
 - Project: {project.project_name}
 - Building Type: {project.building_type}
 - Fire Classification: {project.fire_classification.value}
-- Fire Load: {project.fire_load_mj_m2 or 'To be determined'} MJ/m²
+- Fire Load: {project.fire_load_mj_m2 or 'To be determined'} MJ/m²""")
+
+        prompt = f"""Generate DIM (Brandteknisk dimensionering - Fire Engineering Calculations) for BR18 submission.
+
+{project_details}
 
 REFERENCE EXAMPLES:
 {context_str}
@@ -479,16 +807,7 @@ Generate a DIM document in Danish with calculations for:
 
 Required for BK3-4 classifications. Output in Danish with detailed calculations."""
 
-        response = self.client.models.generate_content(
-            model=GEMINI_MODEL, contents=[prompt],
-            config=types.GenerateContentConfig(temperature=TEMPERATURE, max_output_tokens=MAX_TOKENS)
-        )
-
-        return GeneratedDocument(
-            document_id=str(uuid.uuid4()), project=project,
-            document_type=DocumentType.DIM, content=response.text,
-            rag_context_used=rag_context or []
-        )
+        return prompt, rag_context or []
 
     def generate_funk_document(
         self,
@@ -496,14 +815,26 @@ Required for BK3-4 classifications. Output in Danish with detailed calculations.
         rag_context: Optional[List[str]] = None
     ) -> GeneratedDocument:
         """Generate FUNK (Funktionsbeskrivelse - Functional Description of Fire Safety Systems) document"""
-        context_str = "\n\n".join(rag_context) if rag_context else ""
+        return self._generate(
+            project, DocumentType.FUNK, *self._build_funk_prompt(project, rag_context), regulations=rag_context != []
+        )
 
-        prompt = f"""Generate FUNK (Funktionsbeskrivelse - Functional Description) for fire safety systems in BR18 submission.
+    def _build_funk_prompt(
+        self,
+        project: BuildingProject,
+        rag_context: Optional[List[str]] = None
+    ) -> Tuple[str, List[str]]:
+        """Prompt and the RAG context it uses for a FUNK document"""
+        context_str = self._assemble_context(rag_context)
 
-PROJECT DETAILS:
+        project_details = self._project_details(f"""PROJECT DETAILS:
 - Project: {project.project_name}
 - Building Type: {project.building_type}
-- Fire Classification: {project.fire_classification.value}
+- Fire Classification: {project.fire_classification.value}""")
+
+        prompt = f"""Generate FUNK (Funktionsbeskrivelse - Functional Description) for fire safety systems in BR18 submission.
+
+{project_details}
 
 REFERENCE EXAMPLES:
 {context_str}
@@ -521,16 +852,7 @@ Generate a FUNK document in Danish describing:
 
 Output in Danish with detailed functional descriptions."""
 
-        response = self.client.models.generate_content(
-            model=GEMINI_MODEL, contents=[prompt],
-            config=types.GenerateContentConfig(temperature=TEMPERATURE, max_output_tokens=MAX_TOKENS)
-        )
-
-        return GeneratedDocument(
-            document_id=str(uuid.uuid4()), project=project,
-            document_type=DocumentType.FUNK, content=response.text,
-            rag_context_used=rag_context or []
-        )
+        return prompt, rag_context or []
 
     def generate_krap_document(
         self,
@@ -538,13 +860,25 @@ Output in Danish with detailed functional descriptions."""
         rag_context: Optional[List[str]] = None
     ) -> GeneratedDocument:
         """Generate KRAP (Kontrolrapporter - Control Reports) document"""
-        context_str = "\n\n".join(rag_context) if rag_context else ""
+        return self._generate(
+            project, DocumentType.KRAP, *self._build_krap_prompt(project, rag_context), regulations=rag_context != []
+        )
 
-        prompt = f"""Generate KRAP (Kontrolrapporter - Control Reports) template for BR18 submission.
+    def _build_krap_prompt(
+        self,
+        project: BuildingProject,
+        rag_context: Optional[List[str]] = None
+    ) -> Tuple[str, List[str]]:
+        """Prompt and the RAG context it uses for a KRAP document"""
+        context_str = self._assemble_context(rag_context)
 
-PROJECT DETAILS:
+        project_details = self._project_details(f"""PROJECT DETAILS:
 - Project: {project.project_name}
-- Fire Classification: {project.fire_classification.value}
+- Fire Classification: {project.fire_classification.value}""")
+
+        prompt = f"""Generate KRAP (Kontrolrapporter - Control Reports) template for BR18 submission.
+
+{project_details}
 
 REFERENCE EXAMPLES:
 {context_str}
@@ -561,16 +895,7 @@ Generate a KRAP document template in Danish for recording:
 
 Output in Danish as a template for documentation during construction."""
 
-        response = self.client.models.generate_content(
-            model=GEMINI_MODEL, contents=[prompt],
-            config=types.GenerateContentConfig(temperature=TEMPERATURE, max_output_tokens=MAX_TOKENS)
-        )
-
-        return GeneratedDocument(
-            document_id=str(uuid.uuid4()), project=project,
-            document_type=DocumentType.KRAP, content=response.text,
-            rag_context_used=rag_context or []
-        )
+        return prompt, rag_context or []
 
     def generate_dkv_document(
         self,
@@ -578,13 +903,25 @@ Output in Danish as a template for documentation during construction."""
         rag_context: Optional[List[str]] = None
     ) -> GeneratedDocument:
         """Generate DKV (Drift-, kontrol- og vedligeholdelse - Operation, Control and Maintenance) document"""
-        context_str = "\n\n".join(rag_context) if rag_context else ""
+        return self._generate(
+            project, DocumentType.DKV, *self._build_dkv_prompt(project, rag_context), regulations=rag_context != []
+        )
 
-        prompt = f"""Generate DKV (Drift-, kontrol- og vedligeholdelse - Operation, Control and Maintenance) for BR18 submission.
+    def _build_dkv_prompt(
+        self,
+        project: BuildingProject,
+        rag_context: Optional[List[str]] = None
+    ) -> Tuple[str, List[str]]:
+        """Prompt and the RAG context it uses for a DKV document"""
+        context_str = self._assemble_context(rag_context)
 
-PROJECT DETAILS:
+        project_details = self._project_details(f"""PROJECT DETAILS:
 - Project: {project.project_name}
-- Building Type: {project.building_type}
+- Building Type: {project.building_type}""")
+
+        prompt = f"""Generate DKV (Drift-, kontrol- og vedligeholdelse - Operation, Control and Maintenance) for BR18 submission.
+
+{project_details}
 
 REFERENCE EXAMPLES:
 {context_str}
@@ -601,16 +938,7 @@ Generate a DKV document in Danish with instructions for:
 
 Output in Danish as operational instructions for building management."""
 
-        response = self.client.models.generate_content(
-            model=GEMINI_MODEL, contents=[prompt],
-            config=types.GenerateContentConfig(temperature=TEMPERATURE, max_output_tokens=MAX_TOKENS)
-        )
-
-        return GeneratedDocument(
-            document_id=str(uuid.uuid4()), project=project,
-            document_type=DocumentType.DKV, content=response.text,
-            rag_context_used=rag_context or []
-        )
+        return prompt, rag_context or []
 
     def generate_slut_document(
         self,
@@ -618,15 +946,27 @@ Output in Danish as operational instructions for building management."""
         rag_context: Optional[List[str]] = None
     ) -> GeneratedDocument:
         """Generate SLUT (Sluterklæring - Final Declaration) document"""
-        context_str = "\n\n".join(rag_context) if rag_context else ""
+        return self._generate(
+            project, DocumentType.SLUT, *self._build_slut_prompt(project, rag_context), regulations=rag_context != []
+        )
 
-        prompt = f"""Generate SLUT (Sluterklæring - Final Declaration) for BR18 submission.
+    def _build_slut_prompt(
+        self,
+        project: BuildingProject,
+        rag_context: Optional[List[str]] = None
+    ) -> Tuple[str, List[str]]:
+        """Prompt and the RAG context it uses for a SLUT document"""
+        context_str = self._assemble_context(rag_context)
 
-PROJECT DETAILS:
+        project_details = self._project_details(f"""PROJECT DETAILS:
 - Project: {project.project_name}
 - Address: {project.address}
 - Fire Classification: {project.fire_classification.value}
-- Consultant: {project.consultant_name}
+- Consultant: {project.consultant_name}""")
+
+        prompt = f"""Generate SLUT (Sluterklæring - Final Declaration) for BR18 submission.
+
+{project_details}
 
 REFERENCE EXAMPLES:
 {context_str}
@@ -643,22 +983,14 @@ Generate a SLUT document in Danish with:
 
 Output in Danish following official declaration format."""
 
-        response = self.client.models.generate_content(
-            model=GEMINI_MODEL, contents=[prompt],
-            config=types.GenerateContentConfig(temperature=TEMPERATURE, max_output_tokens=MAX_TOKENS)
-        )
-
-        return GeneratedDocument(
-            document_id=str(uuid.uuid4()), project=project,
-            document_type=DocumentType.SLUT, content=response.text,
-            rag_context_used=rag_context or []
-        )
+        return prompt, rag_context or []
 
     def generate_document(
         self,
         project: BuildingProject,
         document_type: DocumentType,
-        rag_context: Optional[List[str]] = None
+        rag_context: Optional[List[str]] = None,
+        regulations: Optional[bool] = None
     ) -> GeneratedDocument:
         """
         Generate any BR18 document type
@@ -666,32 +998,264 @@ Output in Danish following official declaration format."""
         Args:
             project: Building project details
             document_type: Type of document to generate
-            rag_context: Retrieved knowledge from RAG system
+            rag_context: Retrieved knowledge from RAG system ([] = generate without knowledge)
+            regulations: Include the shared prefix's BR18 regulations (default: unless
+                rag_context is [])
 
         Returns:
             Generated document
         """
-        generators = {
-            DocumentType.START: self.generate_start_document,
-            DocumentType.ITT: self.generate_itt_document,
-            DocumentType.DBK: self.generate_dbk_document,
-            DocumentType.BSR: self.generate_bsr_document,
-            DocumentType.BPLAN: self.generate_bplan_document,
-            DocumentType.PFP: self.generate_pfp_document,
-            DocumentType.DIM: self.generate_dim_document,
-            DocumentType.FUNK: self.generate_funk_document,
-            DocumentType.KPLA: self.generate_kpla_document,
-            DocumentType.KRAP: self.generate_krap_document,
-            DocumentType.DKV: self.generate_dkv_document,
-            DocumentType.SLUT: self.generate_slut_document,
+        if regulations is None:
+            regulations = rag_context != []
+        document_type = DocumentType(document_type)
+        prompt, rag_context = self.build_prompt(project, document_type, rag_context)
+        return self._generate(project, document_type, prompt, rag_context, regulations)
+
+    def build_prompt(
+        self,
+        project: BuildingProject,
+        document_type: DocumentType,
+        rag_context: Optional[List[str]] = None
+    ) -> Tuple[str, List[str]]:
+        """
+        Build the generation prompt for any BR18 document type
+
+        Args:
+            project: Building project details
+            document_type: Type of document
+            rag_context: Retrieved knowledge from RAG system
+
+        Returns:
+            (prompt, RAG context used in it)
+        """
+        builders = {
+            DocumentType.START: self._build_start_prompt,
+            DocumentType.ITT: self._build_itt_prompt,
+            DocumentType.DBK: self._build_dbk_prompt,
+            DocumentType.BSR: self._build_bsr_prompt,
+            DocumentType.BPLAN: self._build_bplan_prompt,
+            DocumentType.PFP: self._build_pfp_prompt,
+            DocumentType.DIM: self._build_dim_prompt,
+            DocumentType.FUNK: self._build_funk_prompt,
+            DocumentType.KPLA: self._build_kpla_prompt,
+            DocumentType.KRAP: self._build_krap_prompt,
+            DocumentType.DKV: self._build_dkv_prompt,
+            DocumentType.SLUT: self._build_slut_prompt,
         }
 
-        generator = generators.get(document_type)
-        if generator:
-            return generator(project, rag_context)
+        builder = builders.get(document_type)
+        if builder:
+            return builder(project, rag_context)
         else:
             raise NotImplementedError(f"Generator for {document_type} not yet implemented")
 
+    def generate_document_stream(
+        self,
+        project: BuildingProject,
+        document_type: DocumentType,
+        rag_context: Optional[List[str]] = None,
+        regulations: Optional[bool] = None
+    ) -> DocumentStream:
+        """
+        Generate any BR18 document type, streaming its text
+
+        The prompt (and any retrieval) is prepared immediately; generation starts
+        when the returned stream is iterated. A cached document is replayed as a
+        single delta.
+
+        Args:
+            project: Building project details
+            document_type: Type of document to generate
+            rag_context: Retrieved knowledge from RAG system ([] = generate without knowledge)
+            regulations: Include the shared prefix's BR18 regulations (default: unless
+                rag_context is [])
+
+        Returns:
+            DocumentStream yielding text deltas; .document is set once it is exhausted
+        """
+        if regulations is None:
+            regulations = rag_context != []
+        document_type = DocumentType(document_type)
+        prompt, rag_context = self.build_prompt(project, document_type, rag_context)
+        cache_key, cached = self._cached_document(project, document_type, prompt, regulations)
+        if cached:
+            return DocumentStream.replay(cached)
+        deltas = self._generate_content_stream(prompt, project, regulations)
+        return DocumentStream(project, document_type, rag_context, deltas, cache_key, self.generation_cache.put)
+
+    @staticmethod
+    def _summarize_document(content: str, max_tokens: int = UPSTREAM_SUMMARY_MAX_TOKENS) -> str:
+        """
+        Compact extractive summary of a generated document for downstream prompts
+
+        Keeps the headings, the first sentence under each heading and every line
+        with a § reference, within a token budget.
+        """
+        lines, after_heading = [], False
+        for line in content.splitlines():
+            stripped = line.strip()
+            if not stripped:
+                continue
+            is_heading = (
+                stripped.startswith("#")
+                or (stripped.startswith("**") and stripped.endswith("**"))
+                or (len(stripped) < 100 and re.match(r"^\d+(\.\d+)*\.?\s+\S", stripped) is not None)
+                or (len(stripped) < 80 and stripped.isupper())
+            )
+            if is_heading:
+                lines.append(stripped)
+                after_heading = True
+            elif after_heading or "§" in stripped:
+                lines.append(re.split(r"(?<=[.!?])\s", stripped, maxsplit=1)[0][:300])
+                after_heading = False
+        return truncate_to_tokens("\n".join(lines), max_tokens)
+
+    def _downstream_context(
+        self,
+        project: BuildingProject,
+        document_type: DocumentType,
+        upstream_summaries: Dict[str, str],
+        rag_context: Optional[List[str]]
+    ) -> List[str]:
+        """
+        Context for a document that builds on others: upstream summaries first, then a
+        smaller share of retrieved examples (no extra BR18 chunks - the upstream
+        documents already cite the regulations)
+        """
+        if rag_context is None and self.vector_store:
+            rag_context = self._retrieve_enhanced_context(
+                query=f"{document_type.value} {project.fire_classification.value} {project.municipality}",
+                municipality=project.municipality,
+                document_type=document_type.value,
+                include_br18=False
+            )
+        parts = [
+            f"[UPSTREAM DOCUMENT {doc_type} from this package - stay consistent with it]\n{summary}"
+            for doc_type, summary in upstream_summaries.items()
+        ]
+        retrieved = self._assemble_context(rag_context, DOWNSTREAM_CONTEXT_MAX_TOKENS)
+        return parts + ([retrieved] if retrieved else [])
+
+    @staticmethod
+    def _package_dependencies(names: List[str], dependencies: Dict[str, List[str]]) -> Dict[str, List[str]]:
+        """
+        Upstream documents of each requested document, limited to the package
+
+        Raises:
+            ValueError: If the dependencies contain a cycle
+        """
+        upstream = {name: [dep for dep in dependencies.get(name, []) if dep in names and dep != name]
+                    for name in names}
+        resolved, remaining = set(), set(names)
+        while remaining:
+            ready = {name for name in remaining if all(dep in resolved for dep in upstream[name])}
+            if not ready:
+                raise ValueError(f"Cyclic document dependencies among: {', '.join(sorted(remaining))}")
+            resolved |= ready
+            remaining -= ready
+        return upstream
+
+    def generate_package(
+        self,
+        project: BuildingProject,
+        document_types: List[Union[DocumentType, str]],
+        context_for: Optional[Callable[[DocumentType], Optional[List[str]]]] = None,
+        max_workers: int = PACKAGE_GENERATION_WORKERS,
+        dependencies: Optional[Dict[str, List[str]]] = None,
+        on_delta: Optional[Callable[[DocumentStream, str], None]] = None
+    ) -> Iterator[PackageEvent]:
+        """
+        Generate a package of documents concurrently, in dependency order
+
+        Documents without pending upstream documents run in a bounded thread pool;
+        Gemini requests share the process-wide rate limiter. A document with
+        upstream documents (DOCUMENT_DEPENDENCIES) starts once they are finished and
+        gets compact summaries of them in its prompt. A failing document yields a
+        "failed" event; its downstream documents are still generated, without its summary.
+
+        Args:
+            project: Building project details
+            document_types: Documents to generate
+            context_for: Returns the RAG context for a document type (default: each
+                generator's own retrieval)
+            max_workers: Documents generated at once
+            dependencies: Document type -> upstream document types (default:
+                DOCUMENT_DEPENDENCIES; {} generates everything independently)
+            on_delta: If given, documents are streamed and this is called (from the
+                worker threads) with each document's stream and every text delta
+
+        Yields:
+            One PackageEvent per document, in completion order
+
+        Raises:
+            ValueError: If the dependencies contain a cycle
+        """
+        def generate_one(name: str, upstream_summaries: Dict[str, str]) -> GeneratedDocument:
+            doc_type = DocumentType(name)
+            rag_context = context_for(doc_type) if context_for else None
+            regulations = rag_context != []  # Decided before upstream summaries are added
+            if upstream_summaries:
+                rag_context = self._downstream_context(project, doc_type, upstream_summaries, rag_context)
+            if on_delta is None:
+                return self.generate_document(project, doc_type, rag_context, regulations)
+            stream = self.generate_document_stream(project, doc_type, rag_context, regulations)
+            try:
+                for delta in stream:
+                    on_delta(stream, delta)
+            finally:
+                # Frees the rate-limit slot at once if on_delta failed mid-stream
+                stream.close()
+            return stream.document
+
+        def timed(name: str, upstream_summaries: Dict[str, str]) -> GeneratedDocument:
+            started = time.perf_counter()
+            try:
+                return generate_one(name, upstream_summaries)
+            finally:
+                durations[name] = time.perf_counter() - started
+
+        names = list(dict.fromkeys(
+            doc_type.value if isinstance(doc_type, DocumentType) else str(doc_type) for doc_type in document_types
+        ))
+        upstream = self._package_dependencies(
+            names, DOCUMENT_DEPENDENCIES if dependencies is None else dependencies
+        )
+        waiting = list(names)
+        finished = set()
+        summaries: Dict[str, str] = {}
+        durations: Dict[str, float] = {}
+        total = len(names)
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            futures = {}
+
+            def submit_ready():
+                for name in [name for name in waiting if all(dep in finished for dep in upstream[name])]:
+                    waiting.remove(name)
+                    upstream_summaries = {dep: summaries[dep] for dep in upstream[name] if dep in summaries}
+                    futures[pool.submit(timed, name, upstream_summaries)] = name
+
+            submit_ready()
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                events = []
+                for future in done:
+                    name = futures.pop(future)
+                    finished.add(name)
+                    seconds = durations.get(name, 0.0)
+                    try:
+                        document = future.result()
+                        summaries[name] = self._summarize_document(document.content)
+                        events.append(PackageEvent(document_type=name, status="completed", document=document,
+                                                   seconds=seconds, completed=len(finished), total=total))
+                    except Exception as e:
+                        events.append(PackageEvent(document_type=name, status="failed",
+                                                   error=f"{type(e).__name__}: {e}",
+                                                   seconds=seconds, completed=len(finished), total=total))
+                # Start the unblocked documents before handing events to the caller
+                submit_ready()
+                yield from events
+
     def generate_all_required_documents(
         self,
         project: BuildingProject,
@@ -705,28 +1269,21 @@ Output in Danish following official declaration format."""
             rag_retriever: RAG retrieval system (optional)
 
         Returns:
-            List of generated documents
+            List of generated documents (in required-document order)
         """
         required_docs = project.get_required_documents()
-        generated = []
 
-        for doc_type_str in required_docs:
-            try:
-                doc_type = DocumentType(doc_type_str)
-
-                # Retrieve relevant context if RAG system available
-                rag_context = None
-                if rag_retriever:
-                    query = f"{project.municipality} {doc_type_str} requirements for {project.fire_classification.value}"
-                    rag_context = rag_retriever.retrieve(query, top_k=5)
+        def retrieve(doc_type: DocumentType) -> List[str]:
+            query = f"{project.municipality} {doc_type.value} requirements for {project.fire_classification.value}"
+            return rag_retriever.retrieve(query, top_k=5)
 
-                # Generate document
-                doc = self.generate_document(project, doc_type, rag_context)
-                generated.append(doc)
-                print(f"Generated {doc_type_str} document")
-
-            except (NotImplementedError, ValueError) as e:
-                print(f"Skipping {doc_type_str}: {e}")
-                continue
+        context_for = retrieve if rag_retriever else None
+        generated = {}
+        for event in self.generate_package(project, required_docs, context_for):
+            if event.status == "completed":
+                generated[event.document_type] = event.document
+                print(f"Generated {event.document_type} document ({event.completed}/{event.total}, {event.seconds:.1f}s)")
+            else:
+                print(f"Skipping {event.document_type}: {event.error}")
 
-        return generated
+        return [generated[doc_type] for doc_type in required_docs if doc_type in generated]
@@ -0,0 +1,193 @@
+"""
+Extraction Schemas - Pydantic models describing Gemini JSON extraction responses
+
+Passed as response_schema so Gemini returns JSON in exactly this shape,
+instead of free text that has to be stripped of markdown and hoped to parse.
+Responses are validated against the same models (src/structured_output.py).
+"""
+
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class BR18Metadata(BaseModel):
+    """Metadata extracted from a BR18 fire safety document"""
+    document_type: Optional[str] = Field(None, description="START/ITT/DBK/BSR/etc.")
+    project_name: Optional[str] = None
+    address: Optional[str] = None
+    municipality: Optional[str] = None
+    building_type: Optional[str] = Field(None, description="warehouse/office/residential/etc.")
+    total_area_m2: Optional[float] = None
+    floors: Optional[int] = None
+    fire_classification: Optional[str] = Field(None, description="BK1/BK2/BK3/BK4")
+    application_category: Optional[str] = Field(None, description="1-6")
+    risk_class: Optional[str] = Field(None, description="1-4")
+    consultant_name: Optional[str] = None
+    consultant_certificate: Optional[str] = None
+    br18_references: List[str] = Field(default_factory=list, description="BR18 paragraph references like §508")
+    key_requirements: List[str] = Field(default_factory=list)
+
+
+class TechnicalSpecs(BaseModel):
+    """Technical specifications cited in a DBK document"""
+    fire_resistance_classes: List[str] = Field(default_factory=list, description="e.g. REI 60, EI 30-C")
+    material_classes: List[str] = Field(default_factory=list, description="e.g. K1 10/B-s1,d0")
+    distances: List[str] = Field(default_factory=list, description="e.g. 30 meter til udgang")
+
+
+class DocumentInsights(BaseModel):
+    """
+    Document-type-specific insights
+
+    Only the fields for the document's type are filled:
+    - DBK: approved_phrasing, technical_specs, br18_references, structural_patterns
+    - START: certification_patterns, declaration_phrases, project_description_format,
+      br18_compliance_language, scope_definition
+    - BSR: strategy_approaches, risk_analysis_methods, technical_solutions,
+      justification_language, scenario_analysis
+    key_insights is filled for every type.
+    """
+    # DBK
+    approved_phrasing: Optional[List[str]] = None
+    technical_specs: Optional[TechnicalSpecs] = None
+    br18_references: Optional[List[str]] = None
+    structural_patterns: Optional[List[str]] = None
+    # START
+    certification_patterns: Optional[List[str]] = None
+    declaration_phrases: Optional[List[str]] = None
+    project_description_format: Optional[List[str]] = None
+    br18_compliance_language: Optional[List[str]] = None
+    scope_definition: Optional[List[str]] = None
+    # BSR
+    strategy_approaches: Optional[List[str]] = None
+    risk_analysis_methods: Optional[List[str]] = None
+    technical_solutions: Optional[List[str]] = None
+    justification_language: Optional[List[str]] = None
+    scenario_analysis: Optional[List[str]] = None
+    # All types
+    key_insights: List[str] = Field(default_factory=list)
+
+
+class CombinedExtraction(BaseModel):
+    """Full content, metadata and insights of a document from a single call"""
+    content: str = Field(description="All text content, structure preserved")
+    metadata: BR18Metadata
+    insights: DocumentInsights
+
+
+class DocumentAnalysis(BaseModel):
+    """Metadata and insights only (content already read from the PDF's text layer)"""
+    metadata: BR18Metadata
+    insights: DocumentInsights
+
+
+class DBKInsights(BaseModel):
+    """DBK-specific insights: approved phrasing and technical specifications"""
+    document_type: str = "DBK"
+    approved_phrasing: List[str] = Field(default_factory=list, description="Exact phrases that express compliance well")
+    technical_specs: Optional[TechnicalSpecs] = None
+    br18_references: List[str] = Field(default_factory=list, description="e.g. §508, §509")
+    structural_patterns: List[str] = Field(default_factory=list, description="How sections are organized")
+    key_insights: List[str] = Field(default_factory=list)
+
+
+class STARTInsights(BaseModel):
+    """START-specific insights: certification and declaration patterns"""
+    document_type: str = "START"
+    certification_patterns: List[str] = Field(default_factory=list)
+    declaration_phrases: List[str] = Field(default_factory=list)
+    project_description_format: List[str] = Field(default_factory=list)
+    br18_compliance_language: List[str] = Field(default_factory=list)
+    scope_definition: List[str] = Field(default_factory=list)
+    key_insights: List[str] = Field(default_factory=list)
+
+
+class BSRInsights(BaseModel):
+    """BSR-specific insights: successful fire strategies"""
+    document_type: str = "BSR"
+    strategy_approaches: List[str] = Field(default_factory=list)
+    risk_analysis_methods: List[str] = Field(default_factory=list)
+    technical_solutions: List[str] = Field(default_factory=list)
+    justification_language: List[str] = Field(default_factory=list)
+    scenario_analysis: List[str] = Field(default_factory=list)
+    key_insights: List[str] = Field(default_factory=list)
+
+
+class ProjectData(BaseModel):
+    """Building project data extracted from a project specification (ProjectInputParser)"""
+    project_name: Optional[str] = None
+    address: Optional[str] = None
+    municipality: Optional[str] = Field(None, description="Danish municipality, e.g. Aarhus")
+    building_type: Optional[str] = Field(None, description="e.g. Office Building, Shopping Center, Residential")
+    total_area_m2: Optional[float] = None
+    floors: Optional[int] = None
+    occupancy: Optional[int] = Field(None, description="Maximum number of people")
+    fire_load_mj_m2: Optional[float] = None
+    application_category: Optional[int] = Field(None, description="1-6")
+    risk_class: Optional[int] = Field(None, description="1-4")
+    fire_classification: Optional[str] = Field(None, description="BK1/BK2/BK3/BK4")
+    consultant_name: Optional[str] = "TBD"
+    consultant_certificate: Optional[str] = "TBD"
+    client_name: Optional[str] = "TBD"
+
+
+class RejectionReason(BaseModel):
+    """One reason a municipality gave for rejecting a submission"""
+    category: Optional[str] = Field(None, description="technical/procedural/compliance")
+    specific_issue: Optional[str] = None
+    br18_reference: Optional[str] = None
+    municipality_requirement: Optional[str] = None
+    severity: Optional[str] = Field(None, description="critical/major/minor")
+
+
+class RejectionAnalysis(BaseModel):
+    """Structured content of a municipal rejection (Afslag)"""
+    response_type: str = "rejection"
+    municipality: Optional[str] = None
+    project_name: Optional[str] = None
+    rejection_date: Optional[str] = None
+    document_types_rejected: List[str] = Field(default_factory=list)
+    rejection_reasons: List[RejectionReason] = Field(default_factory=list)
+    negative_constraints: List[str] = Field(default_factory=list)
+    required_corrections: List[str] = Field(default_factory=list)
+    key_insights: List[str] = Field(default_factory=list)
+
+
+class SuccessfulElement(BaseModel):
+    """One aspect of a submission the municipality approved of"""
+    aspect: Optional[str] = None
+    reason: Optional[str] = None
+    replicable: bool = True
+
+
+class ApprovalAnalysis(BaseModel):
+    """Structured content of a municipal approval (Godkendelse)"""
+    response_type: str = "approval"
+    municipality: Optional[str] = None
+    project_name: Optional[str] = None
+    approval_date: Optional[str] = None
+    document_types_approved: List[str] = Field(default_factory=list)
+    approval_notes: List[str] = Field(default_factory=list)
+    successful_elements: List[SuccessfulElement] = Field(default_factory=list)
+    golden_patterns: List[str] = Field(default_factory=list)
+    approval_speed: Optional[str] = Field(None, description="fast/standard/slow/unknown")
+    key_insights: List[str] = Field(default_factory=list)
+
+
+class FeedbackInsight(BaseModel):
+    """A learning insight extracted from a batch of municipality feedback"""
+    pattern_description: str
+    examples: List[str] = Field(default_factory=list)
+    confidence_score: float = Field(0.5, description="0.0-1.0")
+    recommendation: Optional[str] = None
+
+
+class QualityEvaluation(BaseModel):
+    """Quality evaluation of a generated document"""
+    quality_score: int = Field(description="0-100")
+    strengths: List[str] = Field(default_factory=list)
+    weaknesses: List[str] = Field(default_factory=list)
+    recommendations: List[str] = Field(default_factory=list)
+    rejection_risk: Optional[str] = Field(None, description="low/medium/high")
+    missing_elements: List[str] = Field(default_factory=list)
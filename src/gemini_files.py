@@ -0,0 +1,201 @@
+"""
+Gemini Files - Upload each document once and reuse the handle across prompts
+
+Inlining a PDF with types.Part.from_bytes re-sends the whole file with every
+prompt (BR18.pdf is ~578 KB, and one extraction runs several prompts).
+FileRegistry uploads a file to the Gemini files API the first time it is
+needed and hands out a file reference Part afterwards. Handles are keyed by
+the sha256 of the file's bytes and kept in memory and in GEMINI_FILES_REGISTRY,
+so other parsers and later runs reuse them until they expire.
+
+If the API rejects a stored handle (the file was deleted or expired early, or
+the registry was written with another API key), with_part() drops the handle,
+re-uploads the file and retries the request once.
+
+LocalFileRegistry is the stand-in for tests and offline use: the same
+interface, but the Part carries the bytes inline (read for every request, so
+no file contents are kept in memory).
+"""
+
+import json
+import mimetypes
+import os
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Optional, TypeVar
+
+from google.genai import errors, types
+
+from config.settings import GEMINI_FILES_API, GEMINI_FILES_REGISTRY, GEMINI_FILE_TTL_HOURS
+from src.pdf_processing.extraction_cache import file_sha256
+
+# Handles shared by every registry in this process (content sha256 -> record)
+_handles: Dict[str, Dict] = {}
+_lock = threading.Lock()
+
+# Errors a stale handle produces (permission denied, not found); an invalid
+# argument (400) only counts when its message names the file
+STALE_HANDLE_CODES = (403, 404)
+
+T = TypeVar("T")
+
+
+def _mime_type(path: str) -> str:
+    return mimetypes.guess_type(str(path))[0] or 'application/pdf'
+
+
+def _is_stale_handle(error: errors.ClientError, record: Optional[Dict]) -> bool:
+    """Whether an API error means the stored handle (record) can no longer be used"""
+    if error.code in STALE_HANDLE_CODES:
+        return True
+    # e.g. "File abc123 is not in an ACTIVE state" - any other 400 is about the request itself
+    return error.code == 400 and bool(record) and record["name"].split("/")[-1] in str(error)
+
+
+class LocalFileRegistry:
+    """Stand-in registry that inlines file bytes (no upload, no network)"""
+
+    def part_for(self, path: str, mime_type: Optional[str] = None) -> types.Part:
+        """
+        Get a Part referencing a file
+
+        Args:
+            path: File path
+            mime_type: MIME type (guessed from the extension if omitted)
+
+        Returns:
+            Part with the file's bytes inline
+        """
+        with open(path, 'rb') as f:
+            return types.Part.from_bytes(data=f.read(), mime_type=mime_type or _mime_type(path))
+
+    def forget(self, path: str):
+        """Nothing to drop - inline parts are not kept"""
+
+    def with_part(self, path: str, request: Callable[[types.Part], T], mime_type: Optional[str] = None) -> T:
+        """Run a request with a Part for a file"""
+        return request(self.part_for(path, mime_type))
+
+
+class FileRegistry:
+    """Upload-once registry backed by the Gemini files API"""
+
+    def __init__(self, client, registry_path: Path = GEMINI_FILES_REGISTRY, ttl_hours: float = GEMINI_FILE_TTL_HOURS):
+        """
+        Initialize the registry
+
+        Args:
+            client: genai.Client used for uploads
+            registry_path: JSON file persisting handles between runs
+            ttl_hours: How long an uploaded handle is reused
+        """
+        self.client = client
+        self.registry_path = Path(registry_path)
+        self.ttl = timedelta(hours=ttl_hours)
+        self._load()
+
+    def _load(self):
+        """Merge handles persisted by earlier runs into the process-wide table"""
+        try:
+            with open(self.registry_path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+        with _lock:
+            for content_sha256, record in stored.items():
+                _handles.setdefault(content_sha256, record)
+
+    def _save(self):
+        """Persist live handles (written atomically)"""
+        now = datetime.now()
+        with _lock:
+            live = {sha: record for sha, record in _handles.items()
+                    if datetime.fromisoformat(record["expires_at"]) > now}
+        self.registry_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.registry_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(live, f, indent=2)
+        os.replace(tmp_path, self.registry_path)
+
+    def part_for(self, path: str, mime_type: Optional[str] = None) -> types.Part:
+        """
+        Get a Part referencing a file, uploading it on first use
+
+        Args:
+            path: File path
+            mime_type: MIME type (guessed from the extension if omitted)
+
+        Returns:
+            Part with the uploaded file's URI
+        """
+        content_sha256 = file_sha256(path)
+        mime_type = mime_type or _mime_type(path)
+
+        with _lock:
+            record = _handles.get(content_sha256)
+        if record and datetime.fromisoformat(record["expires_at"]) > datetime.now():
+            return types.Part.from_uri(file_uri=record["uri"], mime_type=record["mime_type"])
+
+        print(f"⬆️  Uploading {Path(path).name} to Gemini files API...")
+        uploaded = self.client.files.upload(
+            file=str(path),
+            config=types.UploadFileConfig(mime_type=mime_type, display_name=Path(path).name)
+        )
+        record = {
+            "name": uploaded.name,
+            "uri": uploaded.uri,
+            "mime_type": uploaded.mime_type or mime_type,
+            "source": str(path),
+            "uploaded_at": datetime.now().isoformat(),
+            "expires_at": (datetime.now() + self.ttl).isoformat()
+        }
+        with _lock:
+            _handles[content_sha256] = record
+        self._save()
+        return types.Part.from_uri(file_uri=record["uri"], mime_type=record["mime_type"])
+
+    def forget(self, path: str):
+        """Drop the handle for a file (e.g. the API reported it missing)"""
+        with _lock:
+            _handles.pop(file_sha256(path), None)
+        self._save()
+
+    def with_part(self, path: str, request: Callable[[types.Part], T], mime_type: Optional[str] = None) -> T:
+        """
+        Run a request with a Part for a file, re-uploading once if the handle is rejected
+
+        Args:
+            path: File path
+            request: Sends the request given the file's Part
+            mime_type: MIME type (guessed from the extension if omitted)
+
+        Returns:
+            The request's result
+        """
+        try:
+            return request(self.part_for(path, mime_type))
+        except errors.ClientError as e:
+            with _lock:
+                record = _handles.get(file_sha256(path))
+            if not _is_stale_handle(e, record):
+                raise
+            print(f"🔁 Gemini rejected the stored handle for {Path(path).name} ({e.code}) - re-uploading")
+            self.forget(path)
+            return request(self.part_for(path, mime_type))
+
+
+def create_file_registry(client, use_files_api: Optional[bool] = None):
+    """
+    Registry for a Gemini client
+
+    Args:
+        client: genai.Client
+        use_files_api: Upload via the files API (default: GEMINI_FILES_API setting)
+
+    Returns:
+        FileRegistry, or LocalFileRegistry when the files API is disabled
+    """
+    if use_files_api is None:
+        use_files_api = GEMINI_FILES_API
+    return FileRegistry(client) if use_files_api else LocalFileRegistry()
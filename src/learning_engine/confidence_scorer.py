@@ -10,7 +10,9 @@ This module implements proper confidence scoring that varies based on:
 """
 
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
 
 
 class ConfidenceScorer:
@@ -114,6 +116,46 @@ class ConfidenceScorer:
         # Ensure confidence is between 0.0 and 1.0
         return min(max(updated, 0.0), 1.0)
 
+    def calculate_updated_confidence_batch(
+        self,
+        current_confidence: Sequence[float],
+        confirmations: Sequence[int],
+        age_days: Sequence[float],
+        rejections: Optional[Sequence[int]] = None
+    ) -> np.ndarray:
+        """
+        Vectorized calculate_updated_confidence for a set of candidates
+
+        Used at query time so rankings reflect confirmations and age without
+        rewriting stored confidence scores.
+
+        Args:
+            current_confidence: Stored confidence scores
+            confirmations: Confirmation counts
+            age_days: Days since each pattern was first learned
+            rejections: Failure counts (optional)
+
+        Returns:
+            Array of updated confidence scores
+        """
+        current = np.asarray(current_confidence, dtype=float)
+        confirmations = np.maximum(np.asarray(confirmations, dtype=int), 0)
+
+        # Confirmation boost: 0.1 * (1 + 1/2 + ... + 1/n), looked up from a harmonic table
+        max_confirmations = int(confirmations.max()) if confirmations.size else 0
+        harmonic = np.concatenate(([0.0], np.cumsum(1.0 / np.arange(1, max_confirmations + 1))))
+        confirmation_boost = 0.1 * harmonic[confirmations]
+
+        rejection_penalty = 0.0
+        if rejections is not None:
+            rejection_penalty = np.asarray(rejections, dtype=float) * 0.15
+
+        # Temporal decay (1% per 90 days, never below 80% of original)
+        decay_factor = np.maximum(1.0 - np.asarray(age_days, dtype=float) / 9000, 0.8)
+
+        updated = (current + confirmation_boost - rejection_penalty) * decay_factor
+        return np.clip(updated, 0.0, 1.0)
+
     def calculate_approval_pattern_confidence(
         self,
         approval_data: Dict,
@@ -1,10 +1,11 @@
 from google import genai
-from google.genai import types
 from typing import List, Dict
 import json
 import uuid
 from datetime import datetime
 from config.settings import GEMINI_API_KEY, GEMINI_MODEL
+from src.extraction_schemas import FeedbackInsight, QualityEvaluation
+from src.structured_output import StructuredOutputError, json_config, parse_structured
 from src.models import (
     MunicipalityFeedback,
     LearningInsight,
@@ -137,22 +138,14 @@ Return ONLY the JSON array, no other text."""
             response = self.client.models.generate_content(
                 model=GEMINI_MODEL,
                 contents=[prompt],
-                config=types.GenerateContentConfig(
+                config=json_config(
+                    List[FeedbackInsight],
                     temperature=0.2,  # Low for factual analysis
                     max_output_tokens=65536,  # Max output - prevent cutoffs
                 )
             )
 
-            # Parse JSON response
-            text = response.text.strip()
-            if text.startswith("```json"):
-                text = text[7:]
-            if text.startswith("```"):
-                text = text[3:]
-            if text.endswith("```"):
-                text = text[:-3]
-
-            insights_data = json.loads(text.strip())
+            insights_data = parse_structured(self.client, response.text, List[FeedbackInsight])
 
             # Convert to LearningInsight objects
             insights = []
@@ -170,9 +163,9 @@ Return ONLY the JSON array, no other text."""
 
             return insights
 
-        except json.JSONDecodeError as e:
+        except StructuredOutputError as e:
             print(f"Failed to parse insights JSON: {e}")
-            print(f"Response was: {response.text[:200]}")
+            print(f"Response was: {e.raw_response[:200]}")
             return []
 
     def generate_knowledge_chunks_from_insights(
@@ -277,25 +270,18 @@ Return as JSON:
             response = self.client.models.generate_content(
                 model=GEMINI_MODEL,
                 contents=[prompt],
-                config=types.GenerateContentConfig(
+                config=json_config(
+                    QualityEvaluation,
                     temperature=0.1,
                     max_output_tokens=65536,  # Max output - prevent cutoffs
                 )
             )
 
-            text = response.text.strip()
-            if text.startswith("```json"):
-                text = text[7:]
-            if text.startswith("```"):
-                text = text[3:]
-            if text.endswith("```"):
-                text = text[:-3]
-
-            return json.loads(text.strip())
+            return parse_structured(self.client, response.text, QualityEvaluation)
 
-        except json.JSONDecodeError:
+        except StructuredOutputError as e:
             return {
                 "quality_score": 50,
                 "error": "Failed to parse evaluation",
-                "raw_response": response.text
+                "raw_response": e.raw_response
             }
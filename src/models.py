@@ -72,6 +72,9 @@ class GeneratedDocument(BaseModel):
     generated_at: datetime = Field(default_factory=datetime.now)
     template_version: str = "1.0"
     rag_context_used: List[str] = Field(default_factory=list)
+    from_cache: bool = False  # Returned from the generation cache instead of generated
+    cache_key: Optional[str] = None  # Generation cache key (project, type, prompt, model, config)
+    cached_at: Optional[datetime] = None  # When the document was stored in the generation cache
 
 class MunicipalityFeedback(BaseModel):
     """Feedback from municipality on submitted document"""
@@ -12,25 +12,27 @@ Extracts structured feedback from municipal authority response documents to crea
 
 import os
 from google import genai
-from google.genai import types
 from pathlib import Path
 from typing import Dict, List, Optional
-import json
 from datetime import datetime
 
 from config.settings import GEMINI_API_KEY, GEMINI_MODEL
 from src.models import KnowledgeChunk
 from src.learning_engine.confidence_scorer import ConfidenceScorer
+from src.gemini_files import create_file_registry
+from src.extraction_schemas import ApprovalAnalysis, RejectionAnalysis
+from src.structured_output import StructuredOutputError, json_config, parse_structured
 
 
 class MunicipalResponseParser:
     """Parse municipal approval and rejection documents to extract learning insights"""
 
-    def __init__(self):
+    def __init__(self, use_files_api: Optional[bool] = None):
         """Initialize the parser with Gemini API"""
         self.client = genai.Client(api_key=GEMINI_API_KEY)
         self.confidence_scorer = ConfidenceScorer()
         self.model = GEMINI_MODEL
+        self.files = create_file_registry(self.client, use_files_api)
 
     def parse_rejection(self, pdf_path: str) -> Dict:
         """
@@ -101,24 +103,21 @@ Return ONLY valid JSON. Be very specific about what was rejected and why."""
             response = self.client.models.generate_content(
                 model=self.model,
                 contents=[rejection_prompt + f"\n\nDocument content:\n{text_content}"],
-                config=types.GenerateContentConfig(temperature=0.1)
+                config=json_config(RejectionAnalysis, temperature=0.1)
             )
         else:
-            # Read as binary (PDF)
-            with open(pdf_path, 'rb') as f:
-                pdf_data = f.read()
-
-            # Send as PDF
-            response = self.client.models.generate_content(
-                model=self.model,
-                contents=[
-                    types.Part.from_bytes(data=pdf_data, mime_type='application/pdf'),
-                    rejection_prompt
-                ],
-                config=types.GenerateContentConfig(temperature=0.1)
+            # Send as PDF (uploaded once per content hash)
+            response = self.files.with_part(
+                pdf_path,
+                lambda part: self.client.models.generate_content(
+                    model=self.model,
+                    contents=[part, rejection_prompt],
+                    config=json_config(RejectionAnalysis, temperature=0.1)
+                ),
+                mime_type='application/pdf'
             )
 
-        parsed_data = self._parse_json_response(response.text)
+        parsed_data = self._parse_json_response(response.text, RejectionAnalysis)
         parsed_data["source_pdf"] = str(pdf_path)
 
         print(f"\n✅ Rejection parsed:")
@@ -198,24 +197,21 @@ Return ONLY valid JSON. Focus on what made this submission successful."""
             response = self.client.models.generate_content(
                 model=self.model,
                 contents=[approval_prompt + f"\n\nDocument content:\n{text_content}"],
-                config=types.GenerateContentConfig(temperature=0.1)
+                config=json_config(ApprovalAnalysis, temperature=0.1)
             )
         else:
-            # Read as binary (PDF)
-            with open(pdf_path, 'rb') as f:
-                pdf_data = f.read()
-
-            # Send as PDF
-            response = self.client.models.generate_content(
-                model=self.model,
-                contents=[
-                    types.Part.from_bytes(data=pdf_data, mime_type='application/pdf'),
-                    approval_prompt
-                ],
-                config=types.GenerateContentConfig(temperature=0.1)
+            # Send as PDF (uploaded once per content hash)
+            response = self.files.with_part(
+                pdf_path,
+                lambda part: self.client.models.generate_content(
+                    model=self.model,
+                    contents=[part, approval_prompt],
+                    config=json_config(ApprovalAnalysis, temperature=0.1)
+                ),
+                mime_type='application/pdf'
             )
 
-        parsed_data = self._parse_json_response(response.text)
+        parsed_data = self._parse_json_response(response.text, ApprovalAnalysis)
         parsed_data["source_pdf"] = str(pdf_path)
 
         print(f"\n✅ Approval parsed:")
@@ -385,25 +381,14 @@ Return ONLY valid JSON. Focus on what made this submission successful."""
         print(f"✅ Created {len(chunks)} golden record chunks from approval")
         return chunks
 
-    def _parse_json_response(self, response_text: str) -> Dict:
-        """Parse JSON from Gemini response, handling markdown code blocks"""
-        text = response_text.strip()
-
-        # Remove markdown code blocks if present
-        if text.startswith("```json"):
-            text = text[7:]
-        if text.startswith("```"):
-            text = text[3:]
-        if text.endswith("```"):
-            text = text[:-3]
-        text = text.strip()
-
+    def _parse_json_response(self, response_text: str, schema) -> Dict:
+        """Parse and validate a JSON response (repaired with a text-only request if invalid)"""
         try:
-            return json.loads(text)
-        except json.JSONDecodeError as e:
-            print(f"❌ Failed to parse JSON: {e}")
-            print(f"Raw response: {response_text[:500]}...")
-            return {"error": f"Failed to parse JSON: {e}", "raw_response": response_text}
+            return parse_structured(self.client, response_text, schema, model=self.model)
+        except StructuredOutputError as e:
+            print(f"❌ {e}")
+            print(f"Raw response: {(response_text or '')[:500]}...")
+            return {"error": str(e), "raw_response": e.raw_response}
 
 
 # Example usage
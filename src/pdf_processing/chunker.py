@@ -0,0 +1,409 @@
+"""
+Structure-Aware Chunker - Split regulation text on § paragraphs and headings
+
+Fixed word windows cut § paragraphs and their requirement lists in half, so
+retrieval needs several overlapping chunks to see one rule. This chunker
+splits text into whole units (one § paragraph with its stk./list items/tables,
+or the text under a heading before the first §), then packs consecutive units
+into chunks up to a token budget. A unit is only split when it alone exceeds
+the budget - at stk., list item and table row boundaries first.
+
+Works on both PyPDF2 text layers (plain "Kapitel 5" / heading lines) and
+Gemini extractions (markdown "#" headings, "**§ 508.**", "|" tables).
+
+chunk_stream() chunks text while it is still arriving (a streamed Gemini
+response) and yields each chunk as soon as later text can no longer change it.
+"""
+
+import re
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+from config.settings import CHUNK_MAX_TOKENS, CHUNK_MIN_TOKENS, STREAM_RECHUNK_CHARS
+from src.token_budget import estimate_tokens
+
+# "§ 100.", "**§ 508**", "## § 508 Flugtveje" - not "§§ 24-27" cross references
+PARAGRAPH_RE = re.compile(r"^[#*>\s]*§\s*(\d+\s?[a-z]?)\s*(?:\.|\*\*|:|$|\s+[A-ZÆØÅ])")
+MARKDOWN_HEADING_RE = re.compile(r"^(#{1,6})\s+(.+?)\s*#*$")
+BOLD_HEADING_RE = re.compile(r"^\*\*([^*]{2,90})\*\*$")
+# "Afsnit II", "Kapitel 5", "Kapitel 5 Brand"
+DIVISION_RE = re.compile(r"^(Afsnit\s+[IVXLC]+|Kapitel\s+\d+[a-z]?)\b\.?\s*(.*)$")
+SUBSECTION_RE = re.compile(r"^[*\s]*Stk\.\s*\d+\.")
+LIST_ITEM_RE = re.compile(r"^\s*(?:[-*•]\s|\d+\)|\d+\.\s|[a-z]\)\s)")
+TABLE_ROW_RE = re.compile(r"^\s*\|")
+TABLE_SEPARATOR_RE = re.compile(r"^\s*\|?\s*:?-{3,}")
+SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+(?=[A-ZÆØÅ§0-9])")
+
+
+class StructuredChunk(BaseModel):
+    """One chunk of whole structural units"""
+    content: str
+    section: Optional[str] = None  # First § paragraph in the chunk, e.g. "§ 508"
+    sections: List[str] = Field(default_factory=list)  # All § paragraphs in the chunk
+    heading_path: List[str] = Field(default_factory=list)  # e.g. ["Kapitel 5 Brand", "Redningsåbninger"]
+    token_count: int = 0
+    first_line: int = 0  # Line span in the chunked text (0-based, inclusive)
+    last_line: int = 0
+
+    def chunk_metadata(self) -> dict:
+        """Metadata fields stored with the KnowledgeChunk"""
+        return {
+            "section": self.section or "",
+            "sections": self.sections,
+            "heading_path": self.heading_path,
+            "token_count": self.token_count
+        }
+
+
+class _Unit:
+    """Lines that belong together: one § paragraph, or text under a heading"""
+
+    def __init__(self, headings: List[Tuple[int, str]], section: Optional[str], first_line: int):
+        self.headings = headings  # (level, title) in effect at the unit's start
+        self.heading_path = [title for _, title in headings]
+        self.section = section
+        self.lines: List[str] = []
+        self.tokens = 0
+        self.first_line = first_line
+        self.last_line = first_line
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self.lines).strip()
+
+
+class StructureAwareChunker:
+    """Split text into chunks of whole § paragraphs, headings, lists and tables"""
+
+    def __init__(
+        self,
+        max_tokens: int = CHUNK_MAX_TOKENS,
+        min_tokens: int = CHUNK_MIN_TOKENS,
+        count_tokens: Optional[Callable[[str], int]] = None
+    ):
+        """
+        Initialize the chunker
+
+        Args:
+            max_tokens: Token budget per chunk
+            min_tokens: A new heading only starts a new chunk once the current one has this many tokens
+            count_tokens: Token counting function (default: local estimate_tokens)
+        """
+        self.max_tokens = max_tokens
+        self.min_tokens = min(min_tokens, max_tokens)
+        self.count_tokens = count_tokens or estimate_tokens
+
+    # ------------------------------------------------------------------
+    # Line classification
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _paragraph_number(line: str) -> Optional[str]:
+        match = PARAGRAPH_RE.match(line)
+        return f"§ {match.group(1).replace(' ', '')}" if match else None
+
+    @staticmethod
+    def _is_plain_heading(line: str, next_line: str) -> bool:
+        """Short title line of a text layer, directly followed by a § paragraph"""
+        stripped = line.strip()
+        return (
+            0 < len(stripped) <= 90
+            and stripped[0].isupper()
+            and not stripped.endswith((".", ",", ";", ":", ")"))
+            and not SUBSECTION_RE.match(stripped)
+            and not LIST_ITEM_RE.match(stripped)
+            and PARAGRAPH_RE.match(next_line) is not None
+        )
+
+    def _heading(self, lines: List[str], index: int):
+        """
+        Detect a heading at lines[index]
+
+        Returns:
+            (level, title, lines consumed) or None
+        """
+        line = lines[index].strip()
+        next_index = next((i for i in range(index + 1, len(lines)) if lines[i].strip()), len(lines))
+        next_line = lines[next_index] if next_index < len(lines) else ""
+
+        match = MARKDOWN_HEADING_RE.match(line)
+        if match:
+            return len(match.group(1)), match.group(2).strip("* "), 1
+
+        match = DIVISION_RE.match(line)
+        if match and len(line) <= 90 and not line.endswith((".", ",", ";")):
+            level = 1 if match.group(1).startswith("Afsnit") else 2
+            title = match.group(2).strip()
+            if title:
+                return level, f"{match.group(1)} {title}", 1
+            # "Kapitel 5" with the chapter title on the next line
+            if next_line and not PARAGRAPH_RE.match(next_line) and not DIVISION_RE.match(next_line.strip()):
+                return level, f"{match.group(1)} {next_line.strip()}", next_index - index + 1
+            return level, match.group(1), 1
+
+        match = BOLD_HEADING_RE.match(line)
+        if match and not PARAGRAPH_RE.match(line):
+            return 3, match.group(1).strip(), 1
+
+        if not PARAGRAPH_RE.match(line) and self._is_plain_heading(line, next_line):
+            return 3, line, 1
+        return None
+
+    # ------------------------------------------------------------------
+    # Units
+    # ------------------------------------------------------------------
+
+    def split_units(self, text: str, headings: Optional[List[Tuple[int, str]]] = None) -> List[_Unit]:
+        """
+        Split text into structural units
+
+        Args:
+            text: Document text
+            headings: (level, title) headings in effect before the text (when continuing a document)
+
+        Returns:
+            Units in document order, each with its § number and heading path
+        """
+        lines = text.splitlines()
+        headings = list(headings or [])
+        units: List[_Unit] = []
+        current: Optional[_Unit] = None
+
+        index = 0
+        while index < len(lines):
+            line = lines[index]
+            if not line.strip():
+                if current:
+                    current.lines.append("")
+                index += 1
+                continue
+
+            heading = self._heading(lines, index)
+            section = self._paragraph_number(line)
+
+            if heading and not section:
+                level, title, consumed = heading
+                headings = [h for h in headings if h[0] < level] + [(level, title)]
+                current = None
+                index += consumed
+                continue
+
+            if section or current is None:
+                current = _Unit(list(headings), section, index)
+                units.append(current)
+            current.lines.append(line.rstrip())
+            current.last_line = index
+            index += 1
+
+        units = [unit for unit in units if unit.text]
+        for unit in units:
+            unit.tokens = self.count_tokens(unit.text)
+        return units
+
+    def _split_oversized(self, unit: _Unit, budget: int) -> List[str]:
+        """Split one unit that exceeds the budget at stk./list/table-row, then sentence, then word boundaries"""
+        lines = unit.text.splitlines()
+
+        # Blocks of lines that must stay together; table rows carry their header
+        blocks: List[tuple] = []  # (text, table header or "")
+        header = ""
+        for index, line in enumerate(lines):
+            if TABLE_ROW_RE.match(line):
+                following = lines[index + 1] if index + 1 < len(lines) else ""
+                if TABLE_SEPARATOR_RE.match(following):
+                    header = f"{line}\n{following}"
+                    blocks.append((header, ""))
+                elif not TABLE_SEPARATOR_RE.match(line):
+                    blocks.append((line, header))
+                continue
+            header = ""
+            if not blocks or SUBSECTION_RE.match(line) or LIST_ITEM_RE.match(line) or blocks[-1][1]:
+                blocks.append((line, ""))
+            else:
+                blocks[-1] = (f"{blocks[-1][0]}\n{line}", "")
+
+        pieces: List[tuple] = []
+        for block_text, block_header in blocks:
+            block_text = block_text.strip()
+            if not block_text:
+                continue
+            if self.count_tokens(block_text) <= budget:
+                pieces.append((block_text, block_header))
+                continue
+            for sentence in SENTENCE_END_RE.split(block_text):
+                if self.count_tokens(sentence) <= budget:
+                    pieces.append((sentence, ""))
+                    continue
+                window: List[str] = []
+                for word in sentence.split():
+                    if window and self.count_tokens(" ".join(window + [word])) > budget:
+                        pieces.append((" ".join(window), ""))
+                        window = []
+                    window.append(word)
+                if window:
+                    pieces.append((" ".join(window), ""))
+
+        packed: List[str] = []
+        for piece, piece_header in pieces:
+            if packed and self.count_tokens(f"{packed[-1]}\n{piece}") <= budget:
+                packed[-1] += f"\n{piece}"
+            elif piece_header and self.count_tokens(f"{piece_header}\n{piece}") <= budget:
+                # Table continues in a new chunk - repeat its header row
+                packed.append(f"{piece_header}\n{piece}")
+            else:
+                packed.append(piece)
+        return packed
+
+    # ------------------------------------------------------------------
+    # Packing
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _prefix(heading_path: List[str], continued: Optional[str] = None) -> str:
+        """Context line(s) put in front of a chunk so it is understandable on its own"""
+        lines = [" > ".join(heading_path)] if heading_path else []
+        if continued:
+            lines.append(f"{continued} (fortsat)")
+        return "\n".join(lines)
+
+    def _content(self, units: List[_Unit], body: Optional[str] = None, continued: Optional[str] = None) -> str:
+        """Text of a chunk made of units (or of a piece of one): context prefix and body"""
+        heading_path = units[0].heading_path
+        prefix = self._prefix(heading_path, continued)
+        body = body if body is not None else "\n\n".join(unit.text for unit in units)
+        # Don't repeat the heading when the body already starts with it
+        if heading_path and body.startswith(heading_path[-1]):
+            prefix = self._prefix([], continued)
+        return f"{prefix}\n{body}" if prefix else body
+
+    def _make_chunk(self, units: List[_Unit], body: Optional[str] = None, continued: Optional[str] = None) -> StructuredChunk:
+        heading_path = units[0].heading_path
+        content = self._content(units, body, continued)
+        sections = [unit.section for unit in units if unit.section]
+        return StructuredChunk(
+            content=content,
+            section=sections[0] if sections else None,
+            sections=sections,
+            heading_path=list(heading_path),
+            token_count=self.count_tokens(content),
+            first_line=units[0].first_line,
+            last_line=units[-1].last_line
+        )
+
+    def chunk(self, text: str, headings: Optional[List[Tuple[int, str]]] = None) -> List[StructuredChunk]:
+        """
+        Split text into structure-aware chunks
+
+        Args:
+            text: Document text
+            headings: (level, title) headings in effect before the text (when continuing a document)
+
+        Returns:
+            Chunks of whole units, each at most max_tokens (unless a single word exceeds it)
+        """
+        return self._pack(self.split_units(text, headings))
+
+    def _pack(self, units: List[_Unit]) -> List[StructuredChunk]:
+        """Pack consecutive units into chunks up to the token budget"""
+        chunks: List[StructuredChunk] = []
+        current: List[_Unit] = []
+        current_tokens = 0
+
+        def flush():
+            nonlocal current, current_tokens
+            if current:
+                chunks.append(self._make_chunk(current))
+            current, current_tokens = [], 0
+
+        for unit in units:
+            # Budgets are checked on the assembled content, so the prefix and the
+            # separators between units are counted too
+            unit_tokens = self.count_tokens(self._content([unit]))
+
+            if unit_tokens > self.max_tokens:
+                flush()
+                # Room left next to the longest prefix a piece can get (plus its line break)
+                prefix = self._prefix(unit.heading_path, unit.section)
+                prefix_tokens = self.count_tokens(prefix) + 1 if prefix else 0
+                pieces = self._split_oversized(unit, self.max_tokens - prefix_tokens)
+                for i, piece in enumerate(pieces):
+                    chunks.append(self._make_chunk([unit], body=piece, continued=unit.section if i else None))
+                continue
+
+            if current:
+                heading_changed = unit.heading_path != current[0].heading_path
+                if heading_changed and current_tokens >= self.min_tokens:
+                    flush()
+                else:
+                    combined_tokens = self.count_tokens(self._content(current + [unit]))
+                    if combined_tokens > self.max_tokens:
+                        flush()
+                    else:
+                        current.append(unit)
+                        current_tokens = combined_tokens
+                        continue
+            current = [unit]
+            current_tokens = unit_tokens
+
+        flush()
+        return chunks
+
+    def chunk_stream(self, pieces: Iterable[str], rechunk_chars: int = STREAM_RECHUNK_CHARS) -> Iterator[StructuredChunk]:
+        """
+        Chunk text that arrives in pieces, yielding chunks as soon as they are final
+
+        Whenever rechunk_chars more complete lines have arrived, the text not yet
+        emitted is chunked. Later text can only change the last unit and where it
+        is packed, so the chunks before that are final and yielded; chunking
+        resumes at the held-back chunk with the headings in effect there. The
+        result matches chunk() on the whole text.
+
+        Args:
+            pieces: Text pieces in order (e.g. streamed response deltas)
+            rechunk_chars: New characters between two chunking passes
+
+        Yields:
+            Chunks in document order; first_line/last_line count from the start of the stream
+        """
+        text = ""  # Text from the first line of the held-back chunk on
+        line_offset = 0  # Stream line number of text's first line
+        headings: List[Tuple[int, str]] = []  # Headings in effect at the start of text
+        checked = 0  # Length of text at the last chunking pass
+
+        def shifted(chunk: StructuredChunk) -> StructuredChunk:
+            return chunk.model_copy(update={
+                "first_line": chunk.first_line + line_offset,
+                "last_line": chunk.last_line + line_offset
+            })
+
+        for piece in pieces:
+            text += piece
+            complete = text.rfind("\n") + 1  # A partial last line may still change
+            if complete - checked < rechunk_chars:
+                continue
+            checked = complete
+
+            units = self.split_units(text[:complete], headings)
+            chunks = self._pack(units)
+            if not units:
+                continue
+            # The last line can still become a heading (when a § line follows), which
+            # shrinks the last unit - it may then still join the chunk before it
+            last_start = units[-1].first_line
+            held_index = next(i for i, chunk in enumerate(chunks) if chunk.last_line >= last_start)
+            if chunks[held_index].first_line == last_start and held_index > 0:
+                held_index -= 1
+            hold_line = chunks[held_index].first_line  # Pieces of an oversized unit share it
+            for chunk in chunks:
+                if chunk.first_line < hold_line:
+                    yield shifted(chunk)
+
+            held = next(unit for unit in units if unit.first_line == hold_line)
+            headings = held.headings
+            text = "".join(text.splitlines(keepends=True)[hold_line:])
+            line_offset += hold_line
+            checked = text.rfind("\n") + 1
+
+        for chunk in self.chunk(text, headings):
+            yield shifted(chunk)
@@ -0,0 +1,262 @@
+"""
+Debug Writer - Compact, asynchronous extraction debug records
+
+The original debug output (save_debug_output) writes the full content three
+times per PDF - raw, inside every chunk entry and in a text file - as
+pretty-printed JSON, synchronously on the ingestion thread, and never cleans up.
+
+DebugWriter instead:
+- queues records and writes them on a background thread (submit() only enqueues)
+- appends one compact JSON line per extraction to a daily gzip file per process
+  (bulk ingestion workers never append to the same file)
+- stores each distinct content once (by sha256) and chunks as line/char offsets into it
+- samples (DEBUG_SAMPLE_RATE) and enforces retention (DEBUG_RETENTION_DAYS, DEBUG_MAX_BYTES)
+  on earlier days' files only, so no process deletes a file another one is writing
+
+Usage:
+    python -m src.pdf_processing.debug_writer list [--dir debug_extractions]
+    python -m src.pdf_processing.debug_writer show <pdf name> [--dir debug_extractions]
+"""
+
+import argparse
+import atexit
+import gzip
+import hashlib
+import json
+import os
+import queue
+import random
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from config.settings import DEBUG_SAMPLE_RATE, DEBUG_RETENTION_DAYS, DEBUG_MAX_BYTES
+
+_writers: Dict[str, "DebugWriter"] = {}
+_writers_lock = threading.Lock()
+
+
+class DebugWriter:
+    """Background writer of compressed, de-duplicated extraction debug records"""
+
+    def __init__(
+        self,
+        output_dir: Path,
+        sample_rate: float = DEBUG_SAMPLE_RATE,
+        retention_days: float = DEBUG_RETENTION_DAYS,
+        max_bytes: int = DEBUG_MAX_BYTES,
+        max_queued: int = 100
+    ):
+        """
+        Initialize the writer (the thread starts on the first record)
+
+        Args:
+            output_dir: Directory for the extractions-YYYYMMDD-<pid>.jsonl.gz files
+            sample_rate: Fraction of extractions recorded (0-1)
+            retention_days: Delete debug files older than this
+            max_bytes: Delete the oldest debug files beyond this total size
+            max_queued: Records waiting to be written; further records are dropped, never block
+        """
+        self.output_dir = Path(output_dir)
+        self.sample_rate = sample_rate
+        self.retention_days = retention_days
+        self.max_bytes = max_bytes
+        self.dropped = 0
+        self.written = 0
+        self._queue: "queue.Queue[Optional[Dict]]" = queue.Queue(maxsize=max_queued)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._written_content: Dict[str, set] = {}  # file name -> content hashes in that file
+
+    def submit(self, pdf_path: str, content: str, metadata: Dict, chunks: List, insights: Optional[Dict] = None) -> bool:
+        """
+        Queue one extraction for writing (returns immediately)
+
+        Args:
+            pdf_path: Source PDF
+            content: Extracted content
+            metadata: Extracted metadata
+            chunks: StructuredChunk list (stored as offsets into content)
+            insights: Document-type-specific insights
+
+        Returns:
+            True if queued, False if skipped by sampling or dropped because the queue is full
+        """
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return False
+        self._ensure_started()
+        try:
+            self._queue.put_nowait({
+                "timestamp": datetime.now().isoformat(),
+                "source_pdf": str(pdf_path),
+                "content": content,
+                "metadata": metadata,
+                "insights": insights,
+                "chunks": chunks
+            })
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def flush(self):
+        """Block until every queued record is written"""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self):
+        """Write what is queued and stop the thread"""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout=10)
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="debug-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _run(self):
+        self.enforce_retention()
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                self._write(item)
+                self.written += 1
+                if self.written % 20 == 0:
+                    self.enforce_retention()
+            except Exception as e:
+                print(f"⚠️  Debug writer failed: {e}")
+            finally:
+                self._queue.task_done()
+
+    @staticmethod
+    def _chunk_offsets(content: str, chunks: List) -> List[Dict]:
+        """Chunks as line spans plus character offsets into the content"""
+        line_starts = [0]
+        for line in content.splitlines(keepends=True):
+            line_starts.append(line_starts[-1] + len(line))
+
+        offsets = []
+        for chunk in chunks:
+            first_line = min(chunk.first_line, len(line_starts) - 2) if len(line_starts) > 1 else 0
+            last_line = min(chunk.last_line, len(line_starts) - 2) if len(line_starts) > 1 else 0
+            offsets.append({
+                "lines": [chunk.first_line, chunk.last_line],
+                "chars": [line_starts[first_line], line_starts[last_line + 1] if len(line_starts) > 1 else 0],
+                "section": chunk.section,
+                "heading_path": chunk.heading_path,
+                "tokens": chunk.token_count
+            })
+        return offsets
+
+    def _write(self, item: Dict):
+        content = item.pop("content") or ""
+        content_sha256 = hashlib.sha256(content.encode('utf-8')).hexdigest()
+        item["content_sha256"] = content_sha256
+        item["content_chars"] = len(content)
+        item["chunks"] = self._chunk_offsets(content, item["chunks"])
+
+        path = self.output_dir / f"extractions-{datetime.now():%Y%m%d}-{os.getpid()}.jsonl.gz"
+        written = self._written_content.setdefault(path.name, set())
+        lines = []
+        if content_sha256 not in written:
+            # Each distinct content is stored once per file; records reference it by hash
+            lines.append(json.dumps({"type": "content", "sha256": content_sha256, "text": content},
+                                    ensure_ascii=False, separators=(",", ":")))
+            written.add(content_sha256)
+        lines.append(json.dumps({"type": "extraction", **item}, ensure_ascii=False,
+                                separators=(",", ":"), default=str))
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        # Appending a gzip member keeps the file a valid gzip stream
+        with gzip.open(path, 'at', encoding='utf-8', compresslevel=6) as f:
+            f.write("\n".join(lines) + "\n")
+
+    def enforce_retention(self):
+        """
+        Delete debug files past the age limit, then the oldest ones beyond the size limit
+
+        Today's files are never deleted: other processes may still be appending to them.
+        """
+        if not self.output_dir.exists():
+            return
+        today = f"extractions-{datetime.now():%Y%m%d}"
+        files = []
+        for path in self.output_dir.glob("extractions-*.jsonl.gz"):
+            try:
+                files.append((path, path.stat()))
+            except FileNotFoundError:
+                pass  # Removed by another process meanwhile
+        files.sort(key=lambda entry: entry[1].st_mtime)
+        cutoff = time.time() - self.retention_days * 86400
+        total = sum(stat.st_size for _, stat in files)
+        for path, stat in files:
+            if path.name.startswith(today) or (stat.st_mtime >= cutoff and total <= self.max_bytes):
+                continue
+            path.unlink(missing_ok=True)
+            total -= stat.st_size
+            self._written_content.pop(path.name, None)
+
+
+def get_debug_writer(output_dir: Path) -> DebugWriter:
+    """Process-wide writer for an output directory (one background thread per directory)"""
+    key = str(Path(output_dir).resolve())
+    with _writers_lock:
+        if key not in _writers:
+            _writers[key] = DebugWriter(output_dir)
+        return _writers[key]
+
+
+def iter_records(output_dir: Path) -> Iterator[Dict]:
+    """
+    Read extraction records back with content and chunk texts resolved
+
+    Args:
+        output_dir: Directory with extractions-*.jsonl.gz files
+
+    Yields:
+        Extraction records, one file (day and process) after another, with "content"
+        and each chunk's "text"
+    """
+    for path in sorted(Path(output_dir).glob("extractions-*.jsonl.gz")):
+        contents: Dict[str, str] = {}
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                record = json.loads(line)
+                if record.get("type") == "content":
+                    contents[record["sha256"]] = record["text"]
+                    continue
+                content = contents.get(record["content_sha256"], "")
+                record["content"] = content
+                for chunk in record["chunks"]:
+                    start, end = chunk["chars"]
+                    chunk["text"] = content[start:end]
+                yield record
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Inspect compact extraction debug records")
+    arg_parser.add_argument("command", choices=["list", "show"])
+    arg_parser.add_argument("pdf_name", nargs="?", help="Source PDF name (for show)")
+    arg_parser.add_argument("--dir", default="debug_extractions")
+    args = arg_parser.parse_args()
+
+    for record in iter_records(Path(args.dir)):
+        name = Path(record["source_pdf"]).name
+        if args.command == "list":
+            print(f"{record['timestamp']}  {name}  {record['content_chars']} chars, {len(record['chunks'])} chunks, "
+                  f"type {record['metadata'].get('document_type', '?')}")
+        elif args.pdf_name in (None, name, Path(name).stem):
+            print(f"\n{'='*80}\n{name} ({record['timestamp']})\n{'='*80}")
+            print(json.dumps(record["metadata"], indent=2, ensure_ascii=False))
+            for i, chunk in enumerate(record["chunks"]):
+                print(f"\n--- CHUNK {i + 1}/{len(record['chunks'])} | {chunk['section'] or '-'} | {chunk['tokens']} tokens ---")
+                print(chunk["text"])
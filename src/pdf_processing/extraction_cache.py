@@ -0,0 +1,199 @@
+"""
+Extraction Cache - On-disk cache of Gemini responses for PDF extraction prompts
+
+Reprocessing an unchanged PDF (every demo run, every GUI click) used to
+re-upload the bytes and pay for the same Gemini calls again. Responses are
+cached keyed by (sha256 of the PDF, prompt hash, GEMINI_MODEL, generation
+config), so any change to the document, prompt, model or config misses.
+
+Usage:
+    python -m src.pdf_processing.extraction_cache stats
+    python -m src.pdf_processing.extraction_cache clear [--pdf path/to/file.pdf] [--older-than DAYS]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from config.settings import EXTRACTION_CACHE_DIR
+
+_hash_memo: Dict[Tuple[str, int, int], str] = {}
+
+
+def file_sha256(path: str) -> str:
+    """
+    SHA-256 of a file's bytes, memoized by (path, size, mtime)
+
+    Args:
+        path: File path
+
+    Returns:
+        Hex digest
+    """
+    stat = os.stat(path)
+    memo_key = (str(Path(path).resolve()), stat.st_size, stat.st_mtime_ns)
+    digest = _hash_memo.get(memo_key)
+    if digest is None:
+        sha = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                sha.update(block)
+        digest = _hash_memo[memo_key] = sha.hexdigest()
+    return digest
+
+
+class ExtractionCache:
+    """Content-addressed cache of extraction responses"""
+
+    def __init__(self, cache_dir: Path = EXTRACTION_CACHE_DIR, enabled: bool = True):
+        """
+        Initialize the cache
+
+        Args:
+            cache_dir: Directory holding one sub-directory per PDF hash
+            enabled: When False, get() always misses and put() does nothing
+        """
+        self.cache_dir = Path(cache_dir)
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(content_sha256: str, prompt: str, model: str, config: Optional[Dict] = None) -> str:
+        """Cache key for one (document, prompt, model, config) combination"""
+        prompt_hash = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+        material = json.dumps(
+            {
+                "content": content_sha256,
+                "prompt": prompt_hash,
+                "model": model,
+                "config": config or {}
+            },
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def _path(self, content_sha256: str, key: str) -> Path:
+        return self.cache_dir / content_sha256 / f"{key}.json"
+
+    def get(self, content_sha256: str, key: str) -> Optional[str]:
+        """
+        Look up a cached response
+
+        Args:
+            content_sha256: Hash of the document the response belongs to
+            key: Key from make_key()
+
+        Returns:
+            Cached response text, or None on a miss
+        """
+        if not self.enabled:
+            return None
+        path = self._path(content_sha256, key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry["text"]
+
+    def put(self, content_sha256: str, key: str, text: str, info: Optional[Dict] = None):
+        """
+        Store a response (written atomically, so readers never see partial files)
+
+        Args:
+            content_sha256: Hash of the document the response belongs to
+            key: Key from make_key()
+            text: Response text
+            info: Extra fields stored for inspection (source file, model, ...)
+        """
+        if not self.enabled or not text:
+            return
+        path = self._path(content_sha256, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        entry = {"text": text, "cached_at": datetime.now().isoformat(), **(info or {})}
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def invalidate(self, content_sha256: Optional[str] = None, older_than_days: Optional[float] = None) -> int:
+        """
+        Remove cached responses
+
+        Args:
+            content_sha256: Only remove entries for this document (default: all documents)
+            older_than_days: Only remove entries older than this many days
+
+        Returns:
+            Number of entries removed
+        """
+        if not self.cache_dir.exists():
+            return 0
+
+        if content_sha256:
+            directories = [self.cache_dir / content_sha256]
+        else:
+            directories = [d for d in self.cache_dir.iterdir() if d.is_dir()]
+
+        cutoff = None
+        if older_than_days is not None:
+            cutoff = (datetime.now() - timedelta(days=older_than_days)).timestamp()
+
+        removed = 0
+        for directory in directories:
+            if not directory.exists():
+                continue
+            entries = list(directory.glob("*.json"))
+            if cutoff is None:
+                removed += len(entries)
+                shutil.rmtree(directory)
+                continue
+            for entry in entries:
+                if entry.stat().st_mtime < cutoff:
+                    entry.unlink()
+                    removed += 1
+            if not any(directory.iterdir()):
+                directory.rmdir()
+        return removed
+
+    def stats(self) -> Dict:
+        """Number of cached documents, entries and bytes on disk"""
+        if not self.cache_dir.exists():
+            return {"documents": 0, "entries": 0, "bytes": 0}
+        entries = list(self.cache_dir.glob("*/*.json"))
+        return {
+            "documents": len({entry.parent for entry in entries}),
+            "entries": len(entries),
+            "bytes": sum(entry.stat().st_size for entry in entries)
+        }
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Inspect or invalidate the PDF extraction cache")
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("stats", help="Show cache size")
+    clear_parser = commands.add_parser("clear", help="Invalidate cached responses")
+    clear_parser.add_argument("--pdf", help="Only invalidate responses for this PDF")
+    clear_parser.add_argument("--older-than", type=float, metavar="DAYS", help="Only entries older than DAYS")
+    args = arg_parser.parse_args()
+
+    cache = ExtractionCache()
+    if args.command == "stats":
+        stats = cache.stats()
+        print(f"Extraction cache: {cache.cache_dir}")
+        print(f"  Documents: {stats['documents']}")
+        print(f"  Entries:   {stats['entries']}")
+        print(f"  Size:      {stats['bytes'] / 1024:.1f} KB")
+    else:
+        content_sha256 = file_sha256(args.pdf) if args.pdf else None
+        removed = cache.invalidate(content_sha256, args.older_than)
+        print(f"✅ Removed {removed} cached extraction responses")
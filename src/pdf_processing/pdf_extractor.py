@@ -2,21 +2,228 @@ import httpx
 from google import genai
 from google.genai import types
 from pathlib import Path
-from typing import Dict, List, Optional
-from config.settings import GEMINI_API_KEY, GEMINI_MODEL
+from typing import Dict, Iterator, List, Optional, Tuple
+from config.settings import (
+    GEMINI_API_KEY,
+    GEMINI_MODEL,
+    COMBINED_EXTRACTION,
+    PAGE_RANGE_DIR,
+    PARALLEL_EXTRACTION_PAGES_PER_RANGE,
+    PARALLEL_EXTRACTION_WORKERS,
+    PARALLEL_EXTRACTION_RETRIES,
+    CHUNK_MAX_TOKENS,
+    TEXT_LAYER_FIRST,
+    TEXT_LAYER_MIN_CHARS,
+    TEXT_LAYER_MIN_QUALITY,
+    DEBUG_OUTPUT_MODE
+)
 import PyPDF2
 import json
+import itertools
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from .extraction_cache import ExtractionCache, file_sha256
+from .chunker import StructureAwareChunker, StructuredChunk
+from .debug_writer import get_debug_writer
+from src.extraction_schemas import (
+    BR18Metadata,
+    BSRInsights,
+    CombinedExtraction,
+    DBKInsights,
+    DocumentAnalysis,
+    STARTInsights
+)
+from src.structured_output import StructuredOutputError, json_config, parse_structured
+from src.rate_limiter import get_rate_limiter
+from src import gemini_files
+
+# Insight fields returned for each document type (see extraction_schemas.DocumentInsights)
+INSIGHT_FIELDS = {
+    "DBK": ["approved_phrasing", "technical_specs", "br18_references", "structural_patterns", "key_insights"],
+    "START": ["certification_patterns", "declaration_phrases", "project_description_format",
+              "br18_compliance_language", "scope_definition", "key_insights"],
+    "BSR": ["strategy_approaches", "risk_analysis_methods", "technical_solutions",
+            "justification_language", "scenario_analysis", "key_insights"]
+}
+
+# Characters that count as readable text when judging a page's text layer
+TEXT_LAYER_PUNCTUATION = set(".,;:!?-–—§()[]/%&+*='\"«»°²³")
+
+DEFAULT_EXTRACTION_PROMPT = """Extract all text content from this BR18 fire safety document.
+Preserve the structure including:
+- Section headings
+- Paragraph numbers (e.g., BR18 §508)
+- Tables and lists
+- Building specifications (area, floors, fire classification)
+- Any references to regulations or other documents
+
+Format the output as structured text."""
 
 class PDFExtractor:
     """Extract and parse content from BR18 PDF documents"""
 
-    def __init__(self, debug_mode: bool = True, debug_output_dir: str = "debug_extractions"):
+    def __init__(
+        self,
+        debug_mode: bool = True,
+        debug_output_dir: str = "debug_extractions",
+        use_cache: bool = True,
+        use_files_api: Optional[bool] = None,
+        debug_format: Optional[str] = None
+    ):
         self.client = genai.Client(api_key=GEMINI_API_KEY)
-        self.debug_mode = debug_mode
+        # PDFs are uploaded once and referenced by handle in every later prompt
+        self.files = gemini_files.create_file_registry(self.client, use_files_api)
+        # "compact" (background gzip records), "full" (legacy JSON/text files) or "off"
+        self.debug_format = (debug_format or DEBUG_OUTPUT_MODE) if debug_mode else "off"
+        self.debug_mode = self.debug_format != "off"
         self.debug_output_dir = Path(debug_output_dir)
-        if self.debug_mode:
+        self.debug_writer = get_debug_writer(self.debug_output_dir) if self.debug_format == "compact" else None
+        if self.debug_format == "full":
             self.debug_output_dir.mkdir(parents=True, exist_ok=True)
+        # Responses cached by (PDF hash, prompt, model, config) - unchanged PDFs skip the API
+        self.cache = ExtractionCache(enabled=use_cache)
+        self.rate_limiter = get_rate_limiter()  # Shared with every other concurrent caller
+
+    def _generate_from_pdf(
+        self,
+        pdf_path: str,
+        prompt: str,
+        config: Optional[types.GenerateContentConfig] = None,
+        content_sha256: Optional[str] = None
+    ) -> str:
+        """
+        Run one extraction prompt against a PDF, using the extraction cache
+
+        Args:
+            pdf_path: Path to PDF file
+            prompt: Extraction prompt
+            config: Generation config (part of the cache key)
+            content_sha256: Cache identity of the content (default: hash of the file's bytes)
+
+        Returns:
+            Response text
+        """
+        content_sha256 = content_sha256 or file_sha256(pdf_path)
+        cache_key = self.cache.make_key(content_sha256, prompt, GEMINI_MODEL, self._config_key(config))
+
+        cached = self.cache.get(content_sha256, cache_key)
+        if cached is not None:
+            print(f"⚡ Using cached extraction for {Path(pdf_path).name}")
+            return cached
+
+        def request(part):
+            with self.rate_limiter:
+                return self.client.models.generate_content(
+                    model=GEMINI_MODEL,
+                    contents=[part, prompt],
+                    config=config
+                )
+
+        response = self.files.with_part(pdf_path, request, mime_type='application/pdf')
+
+        if self._truncated(response):
+            print(f"⚠️  Response for {Path(pdf_path).name} hit max_output_tokens - not cached")
+        else:
+            self.cache.put(content_sha256, cache_key, response.text, {
+                "source_pdf": str(pdf_path),
+                "model": GEMINI_MODEL
+            })
+        return response.text
+
+    def _stream_from_pdf(
+        self,
+        pdf_path: str,
+        prompt: str,
+        config: Optional[types.GenerateContentConfig] = None,
+        content_sha256: Optional[str] = None
+    ) -> Iterator[str]:
+        """
+        Streaming counterpart of _generate_from_pdf (same cache entries)
+
+        Yields:
+            Response text pieces as they are generated (a cached response in one piece)
+        """
+        content_sha256 = content_sha256 or file_sha256(pdf_path)
+        cache_key = self.cache.make_key(content_sha256, prompt, GEMINI_MODEL, self._config_key(config))
+
+        cached = self.cache.get(content_sha256, cache_key)
+        if cached is not None:
+            print(f"⚡ Using cached extraction for {Path(pdf_path).name}")
+            yield cached
+            return
+
+        pieces = []
+        response = None
+        # The rate-limit slot is held until the stream ends or the consumer closes it
+        self.rate_limiter.acquire()
+        try:
+            # The stream is opened through with_part, so a rejected file handle is
+            # re-uploaded before any text has been yielded
+            responses = self.files.with_part(
+                pdf_path,
+                lambda part: self._open_stream([part, prompt], config),
+                mime_type='application/pdf'
+            )
+            for response in responses:
+                if response.text:
+                    pieces.append(response.text)
+                    yield response.text
+        finally:
+            self.rate_limiter.release()
+
+        # Only a complete response is cached
+        if self._truncated(response):
+            print(f"⚠️  Response for {Path(pdf_path).name} hit max_output_tokens - not cached")
+            return
+        self.cache.put(content_sha256, cache_key, "".join(pieces), {
+            "source_pdf": str(pdf_path),
+            "model": GEMINI_MODEL
+        })
+
+    def _open_stream(self, contents: List, config: Optional[types.GenerateContentConfig]) -> Iterator:
+        """Start a streaming request and wait for its first response (where request errors surface)"""
+        responses = iter(self.client.models.generate_content_stream(
+            model=GEMINI_MODEL,
+            contents=contents,
+            config=config
+        ))
+        first = next(responses, None)
+        return itertools.chain([first] if first is not None else [], responses)
+
+    @staticmethod
+    def _truncated(response) -> bool:
+        """Whether a (final) response was cut off at max_output_tokens"""
+        candidates = getattr(response, "candidates", None) or []
+        return bool(candidates) and candidates[0].finish_reason == types.FinishReason.MAX_TOKENS
+
+    @staticmethod
+    def _config_key(config: Optional[types.GenerateContentConfig]) -> Dict:
+        """JSON-safe view of a generation config for cache keys (pydantic schemas as JSON schema)"""
+        if config is None:
+            return {}
+        config_dict = config.model_dump(mode="json", exclude_none=True, exclude={"response_schema"})
+        schema = config.response_schema
+        if schema is not None:
+            config_dict["response_schema"] = schema.model_json_schema() if hasattr(schema, "model_json_schema") else str(schema)
+        return config_dict
+
+    @staticmethod
+    def iter_pages_pypdf(pdf_path: str) -> Iterator[Tuple[int, str]]:
+        """
+        Stream the text layer of a PDF page by page
+
+        Args:
+            pdf_path: Path to PDF file
+
+        Yields:
+            (page index, extracted text) for each page
+        """
+        with open(pdf_path, 'rb') as file:
+            pdf_reader = PyPDF2.PdfReader(file)
+            for page_index, page in enumerate(pdf_reader.pages):
+                yield page_index, page.extract_text() or ""
 
     def extract_text_pypdf(self, pdf_path: str) -> str:
         """
@@ -28,12 +235,30 @@ class PDFExtractor:
         Returns:
             Extracted text content
         """
-        text_content = ""
-        with open(pdf_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            for page in pdf_reader.pages:
-                text_content += page.extract_text() + "\n"
-        return text_content
+        return "".join(text + "\n" for _, text in self.iter_pages_pypdf(pdf_path))
+
+    @staticmethod
+    def is_text_page(
+        text: str,
+        min_chars: int = TEXT_LAYER_MIN_CHARS,
+        min_quality: float = TEXT_LAYER_MIN_QUALITY
+    ) -> bool:
+        """
+        Judge whether a page's text layer is usable without Gemini
+
+        Args:
+            text: Text extracted by PyPDF2
+            min_chars: Minimum non-whitespace characters (image-only pages have ~none)
+            min_quality: Minimum share of readable characters (broken font maps produce garbage)
+
+        Returns:
+            True if the text layer can be used as-is
+        """
+        stripped = text.strip()
+        if len(stripped) < min_chars or "(cid:" in stripped:
+            return False
+        readable = sum(1 for ch in stripped if ch.isalnum() or ch.isspace() or ch in TEXT_LAYER_PUNCTUATION)
+        return readable / len(stripped) >= min_quality
 
     def extract_with_gemini(self, pdf_path: str, extraction_prompt: Optional[str] = None) -> str:
         """
@@ -46,32 +271,315 @@ class PDFExtractor:
         Returns:
             Extracted and structured content
         """
-        if extraction_prompt is None:
-            extraction_prompt = """Extract all text content from this BR18 fire safety document.
-Preserve the structure including:
-- Section headings
-- Paragraph numbers (e.g., BR18 §508)
-- Tables and lists
-- Building specifications (area, floors, fire classification)
-- Any references to regulations or other documents
+        return self._generate_from_pdf(pdf_path, extraction_prompt or DEFAULT_EXTRACTION_PROMPT)
 
-Format the output as structured text."""
+    def stream_with_gemini(self, pdf_path: str, extraction_prompt: Optional[str] = None) -> Iterator[str]:
+        """
+        Extract content from a PDF with Gemini, yielding text while it is generated
 
-        with open(pdf_path, 'rb') as f:
-            pdf_data = f.read()
+        Args:
+            pdf_path: Path to PDF file
+            extraction_prompt: Custom prompt for extraction (optional)
 
-        response = self.client.models.generate_content(
-            model=GEMINI_MODEL,
-            contents=[
-                types.Part.from_bytes(
-                    data=pdf_data,
-                    mime_type='application/pdf',
-                ),
-                extraction_prompt
-            ]
-        )
+        Yields:
+            Pieces of the extracted content (shares cache entries with extract_with_gemini)
+        """
+        yield from self._stream_from_pdf(pdf_path, extraction_prompt or DEFAULT_EXTRACTION_PROMPT)
+
+    def extract_content(
+        self,
+        pdf_path: str,
+        extraction_prompt: Optional[str] = None,
+        text_first: Optional[bool] = None
+    ) -> str:
+        """
+        Extract a PDF's content, reading the text layer locally where it is usable
 
-        return response.text
+        Pages are judged one at a time (is_text_page). Text pages come from
+        PyPDF2 at no API cost; runs of image-only or garbled pages are sent to
+        Gemini as page-range sub-PDFs, and everything is joined in page order.
+
+        Args:
+            pdf_path: Path to PDF file
+            extraction_prompt: Prompt for pages sent to Gemini (optional)
+            text_first: Use the text layer where possible (default: TEXT_LAYER_FIRST setting)
+
+        Returns:
+            Extracted content
+        """
+        if text_first is None:
+            text_first = TEXT_LAYER_FIRST
+        if not text_first:
+            return self.extract_with_gemini_parallel(pdf_path, extraction_prompt)
+
+        started = time.perf_counter()
+        page_texts, gemini_runs, page_count = self._plan_pages(pdf_path)
+        gemini_pages = sum(end - start for start, end in gemini_runs)
+
+        if gemini_runs and gemini_pages == page_count:
+            return self.extract_with_gemini_parallel(pdf_path, extraction_prompt)
+
+        range_texts = self.extract_page_ranges(pdf_path, gemini_runs, extraction_prompt, page_count) if gemini_runs else {}
+
+        parts = []
+        page_index = 0
+        run_starts = {start: (start, end) for start, end in gemini_runs}
+        while page_index < page_count:
+            if page_index in run_starts:
+                parts.append(range_texts[run_starts[page_index]])
+                page_index = run_starts[page_index][1]
+            else:
+                parts.append(page_texts[page_index])
+                page_index += 1
+
+        content = self._stitch_ranges(parts)
+        print(f"✅ Extracted {page_count} pages in {time.perf_counter() - started:.2f}s")
+        return content
+
+    def _plan_pages(self, pdf_path: str) -> Tuple[Dict[int, str], List[Tuple[int, int]], int]:
+        """
+        Decide per page whether the text layer is used or the page goes to Gemini
+
+        Returns:
+            (text per text-layer page, runs of consecutive Gemini pages as (start, end), page count)
+        """
+        page_texts: Dict[int, str] = {}
+        gemini_runs: List[Tuple[int, int]] = []
+        page_count = 0
+        for page_index, text in self.iter_pages_pypdf(pdf_path):
+            page_count += 1
+            if self.is_text_page(text):
+                page_texts[page_index] = text
+            elif gemini_runs and gemini_runs[-1][1] == page_index and \
+                    gemini_runs[-1][1] - gemini_runs[-1][0] < PARALLEL_EXTRACTION_PAGES_PER_RANGE:
+                gemini_runs[-1] = (gemini_runs[-1][0], page_index + 1)
+            else:
+                gemini_runs.append((page_index, page_index + 1))
+
+        gemini_pages = sum(end - start for start, end in gemini_runs)
+        print(f"📄 Text layer: {page_count - gemini_pages}/{page_count} pages read locally, "
+              f"{gemini_pages} sent to Gemini")
+        return page_texts, gemini_runs, page_count
+
+    def stream_content(
+        self,
+        pdf_path: str,
+        extraction_prompt: Optional[str] = None,
+        text_first: Optional[bool] = None
+    ) -> Iterator[str]:
+        """
+        Streaming counterpart of extract_content: yield content in page order as it becomes available
+
+        Text-layer pages are yielded immediately. The first Gemini page range is
+        streamed while the remaining ranges are extracted concurrently in the
+        background, so the consumer (chunking, embedding) starts on the first
+        response tokens instead of waiting for the whole document.
+
+        Args:
+            pdf_path: Path to PDF file
+            extraction_prompt: Prompt for pages sent to Gemini (optional)
+            text_first: Use the text layer where possible (default: TEXT_LAYER_FIRST setting)
+
+        Yields:
+            Pieces of the content, in page order
+        """
+        if text_first is None:
+            text_first = TEXT_LAYER_FIRST
+        if text_first:
+            page_texts, gemini_runs, page_count = self._plan_pages(pdf_path)
+        else:
+            page_texts, gemini_runs = {}, self.split_page_ranges(pdf_path)
+            page_count = gemini_runs[-1][1] if gemini_runs else 0
+
+        if gemini_runs == [(0, page_count)]:
+            # One range covering the whole PDF: same request (and cache entry) as extract_with_gemini
+            yield from self.stream_with_gemini(pdf_path, extraction_prompt)
+            return
+
+        with ThreadPoolExecutor(max_workers=1) as background:
+            later = background.submit(
+                self.extract_page_ranges, pdf_path, gemini_runs[1:], extraction_prompt, page_count
+            ) if len(gemini_runs) > 1 else None
+
+            run_starts = {start: (start, end) for start, end in gemini_runs}
+            page_index = 0
+            while page_index < page_count:
+                if page_index not in run_starts:
+                    yield page_texts[page_index] + "\n"
+                    page_index += 1
+                    continue
+                page_range = run_starts[page_index]
+                if page_range == gemini_runs[0]:
+                    range_pdf = str(self._write_page_range(pdf_path, *page_range))
+                    prompt = self._range_prompt(extraction_prompt, *page_range, page_count)
+                    yield from self._stream_from_pdf(range_pdf, prompt)
+                else:
+                    yield later.result()[page_range]
+                yield "\n\n"
+                page_index = page_range[1]
+
+    def split_page_ranges(self, pdf_path: str, pages_per_range: int = PARALLEL_EXTRACTION_PAGES_PER_RANGE) -> List[Tuple[int, int]]:
+        """
+        Split a PDF's pages into consecutive ranges
+
+        Args:
+            pdf_path: Path to PDF file
+            pages_per_range: Pages in each range
+
+        Returns:
+            List of (start, end) page indices, 0-based, end exclusive
+        """
+        page_count = len(PyPDF2.PdfReader(pdf_path).pages)
+        return [(start, min(start + pages_per_range, page_count))
+                for start in range(0, page_count, pages_per_range)]
+
+    def _write_page_range(self, pdf_path: str, start: int, end: int) -> Path:
+        """
+        Write pages [start, end) of a PDF to a sub-PDF (reused if it already exists)
+
+        The file name contains the source PDF's hash, so the sub-PDF - and with it
+        the extraction cache entry and uploaded file handle - is stable across runs.
+        """
+        range_path = PAGE_RANGE_DIR / f"{file_sha256(pdf_path)[:16]}_p{start + 1:04d}-{end:04d}.pdf"
+        if range_path.exists():
+            return range_path
+
+        reader = PyPDF2.PdfReader(pdf_path)
+        writer = PyPDF2.PdfWriter()
+        for page_index in range(start, end):
+            writer.add_page(reader.pages[page_index])
+
+        range_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = range_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            writer.write(f)
+        tmp_path.replace(range_path)
+        return range_path
+
+    @staticmethod
+    def _stitch_ranges(parts: List[str]) -> str:
+        """
+        Join page-range extractions in order
+
+        A heading or § line that ends one range and is repeated at the start
+        of the next (running headers, a paragraph started on the last page)
+        is kept once, so numbering and headings read as one document.
+        """
+        stitched: List[str] = []
+        for part in parts:
+            lines = part.strip().splitlines()
+            if stitched:
+                tail = [line.strip() for line in stitched[-3:] if line.strip()]
+                while lines and (not lines[0].strip() or lines[0].strip() in tail):
+                    lines.pop(0)
+                stitched.append("")
+            stitched.extend(lines)
+        return "\n".join(stitched)
+
+    def extract_with_gemini_parallel(
+        self,
+        pdf_path: str,
+        extraction_prompt: Optional[str] = None,
+        pages_per_range: int = PARALLEL_EXTRACTION_PAGES_PER_RANGE,
+        max_workers: int = PARALLEL_EXTRACTION_WORKERS,
+        retries: int = PARALLEL_EXTRACTION_RETRIES
+    ) -> str:
+        """
+        Extract a large PDF as page ranges processed concurrently
+
+        Each range is a separate, smaller request (no output-token limit risk),
+        is cached on its own, and only failed ranges are retried.
+
+        Args:
+            pdf_path: Path to PDF file
+            extraction_prompt: Prompt applied to every range (optional)
+            pages_per_range: Pages in each request
+            max_workers: Maximum concurrent requests
+            retries: Extra attempts for ranges that failed
+
+        Returns:
+            Extracted content of all ranges, in page order
+
+        Raises:
+            RuntimeError: If some ranges still fail after all retries
+        """
+        ranges = self.split_page_ranges(pdf_path, pages_per_range)
+        page_count = ranges[-1][1] if ranges else 0
+        if len(ranges) <= 1:
+            return self.extract_with_gemini(pdf_path, extraction_prompt)
+
+        print(f"📑 Extracting {page_count} pages as {len(ranges)} ranges ({max_workers} workers)...")
+        started = time.perf_counter()
+        results = self.extract_page_ranges(pdf_path, ranges, extraction_prompt, page_count, max_workers, retries)
+        content = self._stitch_ranges([results[page_range] for page_range in ranges])
+        print(f"✅ Extracted {len(ranges)} ranges in {time.perf_counter() - started:.1f}s")
+        return content
+
+    @staticmethod
+    def _range_prompt(extraction_prompt: Optional[str], start: int, end: int, page_count: Optional[int]) -> str:
+        """Extraction prompt for pages [start, end) (page_count None: leave out the page position)"""
+        position = f"\nThese are pages {start + 1}-{end} of {page_count} of the document." if page_count else ""
+        return f"""{extraction_prompt or DEFAULT_EXTRACTION_PROMPT}
+{position}
+- Keep paragraph numbers (§) and section numbers exactly as printed - do not renumber
+- If the first page continues a paragraph or table from the previous page, start with that text as-is, without adding a heading
+- Do not add introductions or summaries"""
+
+    def extract_page_ranges(
+        self,
+        pdf_path: str,
+        ranges: List[Tuple[int, int]],
+        extraction_prompt: Optional[str],
+        page_count: int,
+        max_workers: int = PARALLEL_EXTRACTION_WORKERS,
+        retries: int = PARALLEL_EXTRACTION_RETRIES,
+        cache_identities: Optional[Dict[Tuple[int, int], str]] = None
+    ) -> Dict[Tuple[int, int], str]:
+        """
+        Extract page ranges concurrently, retrying only the ranges that failed
+
+        Args:
+            cache_identities: Content fingerprint per range. Cached responses are then
+                reused when the same pages appear in another version of the PDF, so the
+                prompt leaves out the (version-specific) page numbers.
+
+        Returns:
+            Extracted text per (start, end) range
+
+        Raises:
+            RuntimeError: If some ranges still fail after all retries
+        """
+        def extract_range(page_range: Tuple[int, int]) -> str:
+            start, end = page_range
+            return self._generate_from_pdf(
+                str(self._write_page_range(pdf_path, start, end)),
+                self._range_prompt(extraction_prompt, start, end, None if cache_identities else page_count),
+                content_sha256=cache_identities.get(page_range) if cache_identities else None
+            )
+
+        results: Dict[Tuple[int, int], str] = {}
+        pending = list(ranges)
+        errors: Dict[Tuple[int, int], Exception] = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for attempt in range(retries + 1):
+                if not pending:
+                    break
+                if attempt > 0:
+                    print(f"🔁 Retrying {len(pending)} failed ranges (attempt {attempt + 1})...")
+                futures = {page_range: pool.submit(extract_range, page_range) for page_range in pending}
+                pending = []
+                for page_range, future in futures.items():
+                    try:
+                        results[page_range] = future.result()
+                        errors.pop(page_range, None)
+                    except Exception as e:
+                        errors[page_range] = e
+                        pending.append(page_range)
+
+        if pending:
+            failed = ", ".join(f"{start + 1}-{end}" for start, end in pending)
+            raise RuntimeError(f"Extraction failed for pages {failed}: {errors[pending[0]]}")
+        return results
 
     def extract_br18_metadata(self, pdf_path: str) -> Dict:
         """
@@ -83,9 +591,6 @@ Format the output as structured text."""
         Returns:
             Dictionary with extracted metadata
         """
-        with open(pdf_path, 'rb') as f:
-            pdf_data = f.read()
-
         metadata_prompt = """Analyze this BR18 fire safety document and extract the following information in JSON format:
 
 {
@@ -107,35 +612,7 @@ Format the output as structured text."""
 
 If any field is not found, use null. Return ONLY the JSON object, no other text."""
 
-        response = self.client.models.generate_content(
-            model=GEMINI_MODEL,
-            contents=[
-                types.Part.from_bytes(
-                    data=pdf_data,
-                    mime_type='application/pdf',
-                ),
-                metadata_prompt
-            ],
-            config=types.GenerateContentConfig(
-                temperature=0.1,  # Very low for factual extraction
-            )
-        )
-
-        import json
-        try:
-            # Extract JSON from response
-            text = response.text.strip()
-            # Remove markdown code blocks if present
-            if text.startswith("```json"):
-                text = text[7:]
-            if text.startswith("```"):
-                text = text[3:]
-            if text.endswith("```"):
-                text = text[:-3]
-            return json.loads(text.strip())
-        except json.JSONDecodeError:
-            # Fallback to raw text if JSON parsing fails
-            return {"raw_response": response.text, "error": "Failed to parse JSON"}
+        return self._extract_structured(pdf_path, metadata_prompt, BR18Metadata)
 
     def chunk_document(self, text: str, chunk_size: int = 500, overlap: int = 50) -> List[str]:
         """
@@ -161,7 +638,20 @@ If any field is not found, use null. Return ONLY the JSON object, no other text.
 
         return chunks
 
-    def save_debug_output(self, pdf_path: str, content: str, metadata: Dict, chunks: List[str]):
+    def chunk_structured(self, text: str, max_tokens: int = CHUNK_MAX_TOKENS) -> List[StructuredChunk]:
+        """
+        Split document into whole § paragraphs / heading sections for the RAG system
+
+        Args:
+            text: Document text
+            max_tokens: Token budget per chunk
+
+        Returns:
+            Chunks with their § number and heading path
+        """
+        return StructureAwareChunker(max_tokens=max_tokens).chunk(text)
+
+    def save_debug_output(self, pdf_path: str, content: str, metadata: Dict, chunks: List[StructuredChunk]):
         """
         Save extraction debug output for analysis
 
@@ -174,6 +664,7 @@ If any field is not found, use null. Return ONLY the JSON object, no other text.
         if not self.debug_mode:
             return
 
+        self.debug_output_dir.mkdir(parents=True, exist_ok=True)
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         pdf_name = Path(pdf_path).stem
         debug_file = self.debug_output_dir / f"{pdf_name}_{timestamp}_debug.json"
@@ -182,7 +673,7 @@ If any field is not found, use null. Return ONLY the JSON object, no other text.
             "timestamp": datetime.now().isoformat(),
             "source_pdf": str(pdf_path),
             "extraction_technique": "Gemini Vision + LLM",
-            "chunking_technique": "Word-based with overlap (500 words/chunk, 50 word overlap)",
+            "chunking_technique": "Structure-aware (§ paragraphs and headings, up to a token budget)",
             "metadata": metadata,
             "full_extracted_content": content,
             "total_content_length": len(content),
@@ -190,17 +681,21 @@ If any field is not found, use null. Return ONLY the JSON object, no other text.
             "chunks": [
                 {
                     "chunk_index": i,
-                    "content": chunk,
-                    "word_count": len(chunk.split()),
-                    "char_count": len(chunk)
+                    "content": chunk.content,
+                    "section": chunk.section,
+                    "heading_path": chunk.heading_path,
+                    "token_count": chunk.token_count,
+                    "word_count": len(chunk.content.split()),
+                    "char_count": len(chunk.content)
                 }
                 for i, chunk in enumerate(chunks)
             ],
             "chunk_count": len(chunks),
             "chunking_stats": {
                 "total_chunks": len(chunks),
-                "avg_words_per_chunk": sum(len(c.split()) for c in chunks) / len(chunks) if chunks else 0,
-                "avg_chars_per_chunk": sum(len(c) for c in chunks) / len(chunks) if chunks else 0
+                "avg_tokens_per_chunk": sum(c.token_count for c in chunks) / len(chunks) if chunks else 0,
+                "avg_words_per_chunk": sum(len(c.content.split()) for c in chunks) / len(chunks) if chunks else 0,
+                "avg_chars_per_chunk": sum(len(c.content) for c in chunks) / len(chunks) if chunks else 0
             }
         }
 
@@ -230,9 +725,10 @@ If any field is not found, use null. Return ONLY the JSON object, no other text.
             f.write("="*80 + "\n")
             for i, chunk in enumerate(chunks):
                 f.write(f"\n--- CHUNK {i+1}/{len(chunks)} ---\n")
-                f.write(f"Words: {len(chunk.split())} | Chars: {len(chunk)}\n")
+                f.write(f"Section: {chunk.section or '-'} | Headings: {' > '.join(chunk.heading_path) or '-'}\n")
+                f.write(f"Tokens: {chunk.token_count} | Words: {len(chunk.content.split())} | Chars: {len(chunk.content)}\n")
                 f.write("-"*80 + "\n")
-                f.write(chunk)
+                f.write(chunk.content)
                 f.write("\n")
 
         print(f"✓ Debug output saved to: {debug_file}")
@@ -250,9 +746,6 @@ If any field is not found, use null. Return ONLY the JSON object, no other text.
         Returns:
             Dictionary with DBK-specific insights
         """
-        with open(pdf_path, 'rb') as f:
-            pdf_data = f.read()
-
         dbk_prompt = """Analyze this DBK (Dokumentation for brandtekniske installationer) document.
 
 Extract and identify:
@@ -293,16 +786,7 @@ Return as JSON:
 
 Return ONLY valid JSON."""
 
-        response = self.client.models.generate_content(
-            model=GEMINI_MODEL,
-            contents=[
-                types.Part.from_bytes(data=pdf_data, mime_type='application/pdf'),
-                dbk_prompt
-            ],
-            config=types.GenerateContentConfig(temperature=0.1)
-        )
-
-        return self._parse_json_response(response.text)
+        return self._extract_structured(pdf_path, dbk_prompt, DBKInsights)
 
     def extract_start_insights(self, pdf_path: str) -> Dict:
         """
@@ -316,9 +800,6 @@ Return ONLY valid JSON."""
         Returns:
             Dictionary with START-specific insights
         """
-        with open(pdf_path, 'rb') as f:
-            pdf_data = f.read()
-
         start_prompt = """Analyze this START (Starterklæring) document.
 
 Extract and identify:
@@ -356,16 +837,7 @@ Return as JSON:
 
 Return ONLY valid JSON."""
 
-        response = self.client.models.generate_content(
-            model=GEMINI_MODEL,
-            contents=[
-                types.Part.from_bytes(data=pdf_data, mime_type='application/pdf'),
-                start_prompt
-            ],
-            config=types.GenerateContentConfig(temperature=0.1)
-        )
-
-        return self._parse_json_response(response.text)
+        return self._extract_structured(pdf_path, start_prompt, STARTInsights)
 
     def extract_bsr_insights(self, pdf_path: str) -> Dict:
         """
@@ -379,9 +851,6 @@ Return ONLY valid JSON."""
         Returns:
             Dictionary with BSR-specific insights
         """
-        with open(pdf_path, 'rb') as f:
-            pdf_data = f.read()
-
         bsr_prompt = """Analyze this BSR (Brandsikringsredegørelse) document.
 
 Extract and identify:
@@ -419,24 +888,16 @@ Return as JSON:
 
 Return ONLY valid JSON."""
 
-        response = self.client.models.generate_content(
-            model=GEMINI_MODEL,
-            contents=[
-                types.Part.from_bytes(data=pdf_data, mime_type='application/pdf'),
-                bsr_prompt
-            ],
-            config=types.GenerateContentConfig(temperature=0.1)
-        )
-
-        return self._parse_json_response(response.text)
+        return self._extract_structured(pdf_path, bsr_prompt, BSRInsights)
 
-    def extract_document_type_insights(self, pdf_path: str, doc_type: str) -> Dict:
+    def extract_document_type_insights(self, pdf_path: str, doc_type: str, metadata: Optional[Dict] = None) -> Dict:
         """
         Route to appropriate document-type-specific extraction
 
         Args:
             pdf_path: Path to PDF
             doc_type: Document type (START, DBK, BSR, etc.)
+            metadata: Already extracted metadata, reused for other document types
 
         Returns:
             Document-type-specific insights
@@ -449,37 +910,176 @@ Return ONLY valid JSON."""
             return self.extract_start_insights(pdf_path)
         elif doc_type_upper == "BSR":
             return self.extract_bsr_insights(pdf_path)
+        elif metadata is not None:
+            # Generic insights are the metadata - no need to extract it a second time
+            return metadata
         else:
             # Fallback to generic metadata extraction
             return self.extract_br18_metadata(pdf_path)
 
-    def _parse_json_response(self, response_text: str) -> Dict:
-        """Parse JSON from Gemini response, handling markdown code blocks"""
-        text = response_text.strip()
+    def extract_combined(self, pdf_path: str, include_content: bool = True) -> Dict:
+        """
+        Extract content, metadata and document-type-specific insights in one call
+
+        Replaces extract_with_gemini + extract_br18_metadata + extract_document_type_insights
+        (three uploads of the same PDF) with a single schema-constrained response.
+
+        Args:
+            pdf_path: Path to PDF
+            include_content: Also return the full content (False when it was read from the text layer)
+
+        Returns:
+            Dictionary with "content", "metadata" and "insights" (None if parsing failed)
+        """
+        content_part = """
+1. "content": All text content of the document, preserving structure:
+   - Section headings
+   - Paragraph numbers (e.g., BR18 §508)
+   - Tables and lists
+   - Building specifications (area, floors, fire classification)
+   - Any references to regulations or other documents
+""" if include_content else ""
+
+        combined_prompt = f"""Analyze this BR18 fire safety document and return ONE JSON object with {"three" if include_content else "two"} parts:
+{content_part}
+2. "metadata": document_type (START/ITT/DBK/BSR/etc.), project_name, address, municipality,
+   building_type, total_area_m2, floors, fire_classification (BK1-BK4), application_category (1-6),
+   risk_class (1-4), consultant_name, consultant_certificate, br18_references, key_requirements.
+   Use null for fields that are not found.
+
+3. "insights": Fill ONLY the fields for the document's type, plus key_insights:
+   - DBK (Dokumentation for brandtekniske installationer): approved_phrasing (exact phrases that
+     express compliance well), technical_specs (fire resistance classes, material classes, distances),
+     br18_references, structural_patterns
+   - START (Starterklæring): certification_patterns, declaration_phrases, project_description_format,
+     br18_compliance_language, scope_definition
+   - BSR (Brandsikringsredegørelse): strategy_approaches, risk_analysis_methods, technical_solutions,
+     justification_language, scenario_analysis
+   - key_insights: what makes this document successful"""
+
+        schema = CombinedExtraction if include_content else DocumentAnalysis
+        parsed = self._extract_structured(pdf_path, combined_prompt, schema)
+        if "error" in parsed:
+            return {"content": None, "metadata": parsed, "insights": None}
+
+        metadata = parsed.get("metadata") or {}
+        doc_type = (metadata.get("document_type") or "").upper()
+        raw_insights = parsed.get("insights") or {}
+
+        if doc_type in INSIGHT_FIELDS:
+            insights = {"document_type": doc_type}
+            insights.update({
+                field: raw_insights[field]
+                for field in INSIGHT_FIELDS[doc_type]
+                if raw_insights.get(field) is not None
+            })
+        else:
+            # Same as extract_document_type_insights: generic insights are the metadata
+            insights = metadata
+
+        return {"content": parsed.get("content") or "", "metadata": metadata, "insights": insights}
+
+    def _extract_structured(self, pdf_path: str, prompt: str, schema) -> Dict:
+        """
+        Run a schema-constrained extraction prompt against a PDF (using the extraction cache)
+
+        A response that needed repair is cached in its repaired form under the
+        original key, so later runs do not repair it again. A truncated response
+        is never repaired or cached; it is returned as an error, and
+        extract_combined's callers fall back to separate calls.
+
+        Args:
+            pdf_path: Path to PDF file
+            prompt: Extraction prompt
+            schema: Pydantic model the response must match
+
+        Returns:
+            Validated data, or a dict with "error" and "raw_response" if it could not be repaired
+        """
+        config = json_config(schema, temperature=0.1)  # Very low for factual extraction
+        content_sha256 = file_sha256(pdf_path)
+        response_text = self._generate_from_pdf(pdf_path, prompt, config, content_sha256)
+        cache_key = self.cache.make_key(content_sha256, prompt, GEMINI_MODEL, self._config_key(config))
+
+        def store_repaired(data):
+            self.cache.put(content_sha256, cache_key, json.dumps(data, ensure_ascii=False), {
+                "source_pdf": str(pdf_path),
+                "model": GEMINI_MODEL,
+                "repaired": True
+            })
+
+        return self._parse_json_response(response_text, schema, store_repaired)
+
+    def _parse_json_response(self, response_text: str, schema, on_repaired=None) -> Dict:
+        """
+        Parse and validate a JSON response against its schema
+
+        An invalid response is repaired with a text-only request (the PDF is not sent again);
+        a truncated one is returned as an error.
 
-        # Remove markdown code blocks if present
-        if text.startswith("```json"):
-            text = text[7:]
-        if text.startswith("```"):
-            text = text[3:]
-        if text.endswith("```"):
-            text = text[:-3]
-        text = text.strip()
+        Args:
+            response_text: Raw response text
+            schema: Pydantic model the response must match
+            on_repaired: Called with the validated data if the response needed repair
 
+        Returns:
+            Validated data, or a dict with "error" and "raw_response" if it could not be repaired
+        """
         try:
-            return json.loads(text)
-        except json.JSONDecodeError as e:
-            print(f"❌ Failed to parse JSON: {e}")
-            print(f"Raw response: {response_text[:500]}...")
-            return {"raw_response": response_text, "error": f"Failed to parse JSON: {e}"}
+            return parse_structured(self.client, response_text, schema, on_repaired=on_repaired)
+        except StructuredOutputError as e:
+            print(f"❌ {e}")
+            print(f"Raw response: {(response_text or '')[:500]}...")
+            return {"raw_response": e.raw_response, "error": str(e)}
+
+    def analyze_document(
+        self,
+        pdf_path: str,
+        extract_insights: bool = True,
+        combined: Optional[bool] = None
+    ) -> Tuple[Dict, Optional[Dict]]:
+        """
+        Extract a document's metadata and insights (without its content)
 
-    def process_br18_example(self, pdf_path: str, extract_insights: bool = True) -> Dict:
+        Args:
+            pdf_path: Path to PDF
+            extract_insights: Whether to extract document-type-specific insights
+            combined: One schema-constrained call (default: COMBINED_EXTRACTION setting)
+
+        Returns:
+            (metadata, insights or None)
+        """
+        if combined is None:
+            combined = COMBINED_EXTRACTION
+        if combined:
+            extraction = self.extract_combined(pdf_path, include_content=False)
+            metadata = extraction["metadata"]
+            if "error" not in metadata:
+                insights = extraction["insights"] if extract_insights and metadata.get('document_type') else None
+                return metadata, insights
+            print("⚠️  Combined extraction failed - falling back to separate calls")
+
+        metadata = self.extract_br18_metadata(pdf_path)
+        insights = None
+        if extract_insights and metadata.get('document_type'):
+            insights = self.extract_document_type_insights(pdf_path, metadata['document_type'], metadata=metadata)
+        return metadata, insights
+
+    def process_br18_example(
+        self,
+        pdf_path: str,
+        extract_insights: bool = True,
+        combined: Optional[bool] = None,
+        text_first: Optional[bool] = None
+    ) -> Dict:
         """
         Complete processing pipeline for a BR18 example document with document-type-specific insights
 
         Args:
             pdf_path: Path to BR18 PDF
             extract_insights: Whether to extract document-type-specific insights
+            combined: Extract everything in one call (default: COMBINED_EXTRACTION setting)
+            text_first: Read content from the PDF's text layer where usable (default: TEXT_LAYER_FIRST setting)
 
         Returns:
             Dictionary with extracted content, metadata, chunks, and insights
@@ -488,31 +1088,64 @@ Return ONLY valid JSON."""
         print(f"📄 Processing BR18 Document: {Path(pdf_path).name}")
         print(f"{'='*80}\n")
 
-        # Extract full content
-        print("📖 Extracting full content with Gemini...")
-        content = self.extract_with_gemini(pdf_path)
-        print(f"✅ Extracted {len(content)} characters, {len(content.split())} words\n")
+        if combined is None:
+            combined = COMBINED_EXTRACTION
+        if text_first is None:
+            text_first = TEXT_LAYER_FIRST
 
-        # Extract metadata
-        print("🔍 Extracting metadata...")
-        metadata = self.extract_br18_metadata(pdf_path)
-        print(f"✅ Metadata extracted: {metadata.get('document_type', 'Unknown type')}\n")
-
-        # Extract document-type-specific insights
+        content = None
+        metadata = None
         insights = None
-        if extract_insights and metadata.get('document_type'):
-            doc_type = metadata.get('document_type')
-            print(f"🧠 Extracting {doc_type}-specific insights...")
-            insights = self.extract_document_type_insights(pdf_path, doc_type)
-            print(f"✅ Insights extracted for {doc_type}\n")
+        if text_first:
+            # Text pages are read locally, only scanned pages go to Gemini
+            print("📖 Extracting content (text layer first)...")
+            content = self.extract_content(pdf_path, text_first=True)
+            print(f"✅ Extracted {len(content)} characters, {len(content.split())} words\n")
+
+        if combined:
+            # One upload, one response: (content +) metadata + insights
+            print("🔍 Extracting metadata and insights with Gemini (single call)...")
+            extraction = self.extract_combined(pdf_path, include_content=content is None)
+            if "error" not in extraction["metadata"] and (content is not None or extraction["content"]):
+                if content is None:
+                    content = extraction["content"]
+                    print(f"✅ Extracted {len(content)} characters, {len(content.split())} words")
+                metadata = extraction["metadata"]
+                if extract_insights and metadata.get('document_type'):
+                    insights = extraction["insights"]
+                print(f"✅ Metadata extracted: {metadata.get('document_type', 'Unknown type')}\n")
+            else:
+                print("⚠️  Combined extraction failed - falling back to separate calls\n")
+
+        if metadata is None:
+            if content is None:
+                # Extract full content
+                print("📖 Extracting full content with Gemini...")
+                content = self.extract_with_gemini(pdf_path)
+                print(f"✅ Extracted {len(content)} characters, {len(content.split())} words\n")
+
+            # Extract metadata
+            print("🔍 Extracting metadata...")
+            metadata = self.extract_br18_metadata(pdf_path)
+            print(f"✅ Metadata extracted: {metadata.get('document_type', 'Unknown type')}\n")
+
+            # Extract document-type-specific insights
+            if extract_insights and metadata.get('document_type'):
+                doc_type = metadata.get('document_type')
+                print(f"🧠 Extracting {doc_type}-specific insights...")
+                insights = self.extract_document_type_insights(pdf_path, doc_type, metadata=metadata)
+                print(f"✅ Insights extracted for {doc_type}\n")
 
         # Create chunks for RAG
         print("✂️  Creating chunks for RAG system...")
-        chunks = self.chunk_document(content)
+        chunks = self.chunk_structured(content)
         print(f"✅ Created {len(chunks)} chunks\n")
 
         # Save debug output if enabled
-        if self.debug_mode:
+        if self.debug_writer:
+            # Queued for the background writer - no file I/O on the ingestion path
+            self.debug_writer.submit(pdf_path, content, metadata, chunks, insights)
+        elif self.debug_mode:
             print("💾 Saving debug output...")
             self.save_debug_output(pdf_path, content, metadata, chunks)
 
@@ -0,0 +1,169 @@
+"""
+Project Batch - Concurrent parsing of many project specifications
+
+ProjectInputParser.parse_project_file parses one specification at a time. For
+an intake queue BatchProjectParser parses many concurrently (bounded by
+max_workers), turns each into a BuildingProject with its required document
+types, and yields one JSON-serialisable record per file as soon as it is done.
+A failing file produces an error record instead of stopping the batch.
+
+Usage:
+    python -m src.project_batch intake/ > projects.jsonl
+    python -m src.project_batch spec1.pdf spec2.pdf --workers 4 --output projects.jsonl
+    python -m src.project_batch intake/ --pattern '*.txt'
+"""
+
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO
+
+from config.settings import PROJECT_BATCH_WORKERS, PROJECT_BATCH_RETRIES
+from src.project_parser import ProjectInputParser
+
+
+class BatchProjectParser:
+    """Parse project specifications concurrently into BuildingProject records"""
+
+    def __init__(
+        self,
+        parser: Optional[ProjectInputParser] = None,
+        max_workers: int = PROJECT_BATCH_WORKERS,
+        retries: int = PROJECT_BATCH_RETRIES
+    ):
+        """
+        Initialize the batch parser
+
+        Args:
+            parser: ProjectInputParser shared by all workers (default: new parser)
+            max_workers: Specifications parsed concurrently
+            retries: Extra attempts when the Gemini request for a specification fails
+        """
+        self.parser = parser or ProjectInputParser()
+        self.max_workers = max(1, max_workers)
+        self.retries = retries
+
+    def parse_one(self, pdf_path: str) -> Dict:
+        """
+        Parse one specification into a result record
+
+        Args:
+            pdf_path: Path to project specification (PDF or text)
+
+        Returns:
+            {"source", "status": "ok", "project", "required_documents", "extracted", "seconds"},
+            or {"source", "status": "error", "stage", "error", "seconds"} if the file failed
+        """
+        started = time.perf_counter()
+        record = {"source": str(pdf_path)}
+
+        for attempt in range(self.retries + 1):
+            try:
+                extracted = self.parser.parse_project_file(str(pdf_path))
+                break
+            except Exception as e:
+                if attempt == self.retries:
+                    return {**record, "status": "error", "stage": "extract",
+                            "error": f"{type(e).__name__}: {e}",
+                            "seconds": round(time.perf_counter() - started, 2)}
+                print(f"🔁 Retrying {Path(pdf_path).name} (attempt {attempt + 2}): {e}")
+
+        try:
+            project = self.parser.create_building_project(extracted)
+            required = self.parser.determine_required_documents(project.fire_classification)
+        except Exception as e:
+            # Missing or invalid fields - not worth another Gemini request
+            return {**record, "status": "error", "stage": "project",
+                    "error": f"{type(e).__name__}: {e}", "extracted": extracted,
+                    "seconds": round(time.perf_counter() - started, 2)}
+
+        return {
+            **record,
+            "status": "ok",
+            "project": project.model_dump(mode="json"),
+            "required_documents": [doc_type.value for doc_type in required],
+            "extracted": extracted,
+            "seconds": round(time.perf_counter() - started, 2)
+        }
+
+    def parse_many(self, pdf_paths: Iterable[str]) -> Iterator[Dict]:
+        """
+        Parse specifications concurrently
+
+        At most max_workers files are in flight, so long (or streamed) inputs are
+        read lazily.
+
+        Args:
+            pdf_paths: Paths to project specifications
+
+        Yields:
+            One parse_one() record per file, in completion order
+        """
+        paths = iter(pdf_paths)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            in_flight = set()
+            for path in paths:
+                in_flight.add(pool.submit(self.parse_one, path))
+                if len(in_flight) >= self.max_workers:
+                    break
+            while in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+                    next_path = next(paths, None)
+                    if next_path is not None:
+                        in_flight.add(pool.submit(self.parse_one, next_path))
+
+
+def find_specifications(inputs: List[str], pattern: str = "*.pdf") -> List[Path]:
+    """Expand files and directories (searched recursively for pattern) into a sorted, de-duplicated list"""
+    paths = []
+    for item in inputs:
+        path = Path(item)
+        paths.extend(sorted(path.rglob(pattern)) if path.is_dir() else [path])
+    return list(dict.fromkeys(paths))
+
+
+def write_jsonl(records: Iterable[Dict], output: TextIO) -> Dict[str, int]:
+    """
+    Write records as JSON lines, flushing after each one
+
+    Returns:
+        Counts of "ok" and "error" records
+    """
+    counts = {"ok": 0, "error": 0}
+    for record in records:
+        output.write(json.dumps(record, ensure_ascii=False) + "\n")
+        output.flush()
+        counts[record["status"]] += 1
+    return counts
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Parse project specifications concurrently into JSONL")
+    arg_parser.add_argument("inputs", nargs="+", help="Specification files or directories")
+    arg_parser.add_argument("--pattern", default="*.pdf", help="File name pattern in directories (default: *.pdf)")
+    arg_parser.add_argument("--workers", type=int, default=PROJECT_BATCH_WORKERS)
+    arg_parser.add_argument("--retries", type=int, default=PROJECT_BATCH_RETRIES)
+    arg_parser.add_argument("--output", default="-", help="JSONL output file (default: stdout)")
+    args = arg_parser.parse_args()
+
+    specifications = find_specifications(args.inputs, args.pattern)
+    output = sys.stdout if args.output == "-" else open(args.output, "a", encoding="utf-8")
+    started = time.perf_counter()
+    try:
+        # Progress output goes to stderr so stdout stays valid JSONL
+        with redirect_stdout(sys.stderr):
+            print(f"📂 Parsing {len(specifications)} specifications with {args.workers} workers")
+            batch = BatchProjectParser(max_workers=args.workers, retries=args.retries)
+            counts = write_jsonl(batch.parse_many(map(str, specifications)), output)
+            elapsed = time.perf_counter() - started
+            print(f"\n✅ {counts['ok']} parsed, {counts['error']} failed in {elapsed:.1f}s "
+                  f"({len(specifications) / elapsed if elapsed else 0:.1f} files/s)")
+    finally:
+        if output is not sys.stdout:
+            output.close()
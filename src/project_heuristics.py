@@ -0,0 +1,297 @@
+"""
+Project Heuristics - Local regex/lexicon extraction of project specification fields
+
+Project specifications usually state area, floors, fire classification,
+municipality and address explicitly ("Total areal: 1.355 m²", "Forventet
+brandklasse: BK2"). extract_project_fields() reads those from the text with
+labelled regexes and a Danish keyword lexicon, each with a confidence, so
+ProjectInputParser only asks Gemini for what is missing or uncertain.
+
+Confidence guide:
+- 0.95  labelled value in the expected format ("Antal etager: 3")
+- 0.8   labelled value whose end had to be guessed, or an unambiguous unlabelled mention
+- 0.6   derived or bounded values ("Under 400 MJ/m²", municipality from the postcode city)
+- 0.4   lexicon guesses and conflicting mentions (never used without Gemini by default)
+"""
+
+import re
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+# Field -> labels that introduce it, most specific first
+FIELD_LABELS: Dict[str, List[str]] = {
+    "project_name": ["Projektnavn", "Projekttitel", "Projekt", "Byggesag"],
+    "address": ["Adresse", "Byggeadresse", "Beliggenhed", "Ejendommens adresse"],
+    "municipality": ["Kommune"],
+    "building_type": ["Bygningstype", "Bygningsanvendelse", "Byggeriets art", "Bygning"],
+    "total_area_m2": ["Total areal", "Samlet areal", "Bruttoetageareal", "Bruttoareal", "Etageareal"],
+    "floors": ["Antal etager", "Etager", "Etageantal"],
+    "occupancy": ["Maksimalt personantal", "Maks\\. personantal", "Personantal", "Antal personer"],
+    "fire_load_mj_m2": ["Brandbelastning"],
+    "application_category": ["Anvendelseskategori"],
+    "risk_class": ["Risikoklasse"],
+    "fire_classification": ["Forventet brandklasse", "Brandklasse"],
+    "consultant_name": ["Certificeret brandrådgiver", "Brandteknisk rådgiver", "Brandrådgiver", "Brandteknisk ansvarlig"],
+    "consultant_certificate": ["Certifikatnummer", "Certifikat nr\\.", "Certifikat"],
+    "client_name": ["Bygherre", "Ejer"],
+}
+
+# Labels that are not extracted but end the value before them (flattened PDF text has no line breaks)
+OTHER_LABELS = [
+    "Dato", "Anvendelse", "Grundareal", "Bebygget areal", "Bygningshøjde", "Brandkonstruktion",
+    "Personkendskab til flugtveje", "Kontaktperson", "E-?mail", "Telefon", "Tlf\\.", "Arkitekt",
+    "Ingeniør", "Matrikel(?:nummer|nr\\.)?", "CVR",
+]
+
+# Fallback areas, used only when none of the total-area labels is present
+SECONDARY_AREA_LABELS = ["Bebygget areal", "Grundareal"]
+
+DANISH_NUMBERS = {
+    "en": 1, "én": 1, "et": 1, "to": 2, "tre": 3, "fire": 4, "fem": 5,
+    "seks": 6, "syv": 7, "otte": 8, "ni": 9, "ti": 10,
+}
+
+# Building-type keywords -> (application category, risk class); lexicon guesses only
+BUILDING_LEXICON = [
+    (("hospital", "sygehus", "fængsel", "arresthus"), 6, 3),
+    (("hotel", "forsamling", "institution", "skole", "daginstitution", "plejehjem", "kollegium"), 5, 2),
+    (("lager", "industri", "fabrik", "produktion", "værksted", "hal"), 4, 2),
+    (("kontor", "butik", "erhverv", "administration"), 3, 2),
+    (("etagebolig", "lejlighed", "rækkehus", "boligblok"), 2, 1),
+    (("enfamiliehus", "parcelhus", "villa", "garage", "carport", "sommerhus", "udhus"), 1, 1),
+]
+
+NUMBER = r"\d{1,3}(?:\.\d{3})+(?:,\d+)?|\d+(?:[.,]\d+)?"
+_ALL_CAPS_HEADING = r"[A-ZÆØÅ]{5,}\b"
+
+
+class LocalField(BaseModel):
+    """A field value found in the text, with how sure the extractor is about it"""
+    value: Any
+    confidence: float
+    label: Optional[str] = None
+
+
+def _alternation(labels: List[str]) -> str:
+    return "|".join(labels)
+
+
+_KNOWN_LABEL = _alternation(sorted(
+    [label for labels in FIELD_LABELS.values() for label in labels] + OTHER_LABELS + SECONDARY_AREA_LABELS,
+    key=len, reverse=True
+))
+# A value ends at a line break, before the next known label, or (less certainly) before an
+# all-caps section heading or any other "Label:" - whichever comes first
+_VALUE_END = (
+    rf"(?P<end>\n|\s(?i:{_KNOWN_LABEL})\s*:|\s{_ALL_CAPS_HEADING}|\s[A-ZÆØÅ][\wæøå]+(?: [a-zæøå]+)*\s*:|$)"
+)
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalise whitespace; text layers that put every word on its own line are flattened
+
+    PyPDF2 renders some PDFs as one word per line (" \\n" between all words), which
+    makes line breaks meaningless. Such text is joined into one line and values are
+    then delimited by labels only.
+    """
+    text = text.replace("\r", "").replace("\xa0", " ")
+    lines = [re.sub(r"[ \t]+", " ", line).strip() for line in text.split("\n")]
+    non_empty = [line for line in lines if line]
+    if non_empty and sum(len(line.split()) for line in non_empty) / len(non_empty) < 1.5:
+        return " ".join(non_empty)
+    return "\n".join(lines)
+
+
+def parse_danish_number(text: str) -> Optional[float]:
+    """Parse "1.355", "3,2" or "1.600,5" (Danish separators) or a number word ("tre")"""
+    text = text.strip().lower()
+    if text in DANISH_NUMBERS:
+        return float(DANISH_NUMBERS[text])
+    if re.fullmatch(r"\d{1,3}(?:\.\d{3})+(?:,\d+)?", text):
+        text = text.replace(".", "")
+    try:
+        return float(text.replace(",", "."))
+    except ValueError:
+        return None
+
+
+def _labelled(text: str, labels: List[str]) -> Optional[LocalField]:
+    """First labelled value for any of the labels, with a confidence for how its end was found"""
+    pattern = re.compile(
+        rf"(?:^|(?<=\s))(?P<label>(?i:{_alternation(labels)}))\s*:\s*(?P<value>.+?){_VALUE_END}",
+        re.MULTILINE
+    )
+    for match in pattern.finditer(text):
+        value = match.group("value").strip(" .,;")
+        if not value:
+            continue
+        end = match.group("end")
+        clean_end = end == "" or end == "\n" or re.fullmatch(rf"\s(?i:{_KNOWN_LABEL})\s*:", end)
+        return LocalField(value=value, confidence=0.95 if clean_end else 0.8, label=match.group("label"))
+    return None
+
+
+def _number_field(text: str, labels: List[str], unit: str = "", integer: bool = False,
+                  unit_optional: bool = False) -> Optional[LocalField]:
+    """Labelled number, optionally followed by a unit (missing it lowers confidence unless unit_optional)"""
+    found = _labelled(text, labels)
+    if not found:
+        return None
+    match = re.match(rf"(?:ca\.?\s*|cirka\s*|max\.?\s*|maks\.?\s*)?({NUMBER}|{_alternation(list(DANISH_NUMBERS))})\b\s*({unit})?",
+                     found.value, re.IGNORECASE)
+    if not match:
+        return None
+    number = parse_danish_number(match.group(1))
+    if number is None:
+        return None
+    # The number leads the value, so where the value ends does not matter
+    confidence = 0.95
+    if re.match(r"ca|cirka", found.value, re.IGNORECASE):
+        confidence = min(confidence, 0.8)
+    if unit and not unit_optional and not match.group(2):
+        confidence = min(confidence, 0.8)
+    return LocalField(value=int(number) if integer else number, confidence=confidence, label=found.label)
+
+
+def _fire_classification(text: str) -> Optional[LocalField]:
+    found = _labelled(text, FIELD_LABELS["fire_classification"])
+    if found:
+        match = re.search(r"\bBK\s?([1-4])\b|^([1-4])\b", found.value, re.IGNORECASE)
+        if match:
+            return LocalField(value=f"BK{match.group(1) or match.group(2)}", confidence=0.95, label=found.label)
+
+    mentions = {f"BK{digit}" for digit in re.findall(r"\bBK\s?([1-4])\b", text)}
+    mentions |= {f"BK{digit}" for digit in re.findall(r"\bbrandklasse\s+([1-4])\b", text, re.IGNORECASE)}
+    if len(mentions) == 1:
+        return LocalField(value=mentions.pop(), confidence=0.8)
+    if mentions:
+        return LocalField(value=sorted(mentions)[-1], confidence=0.4)  # Conflicting mentions
+    return None
+
+
+def _fire_load(text: str) -> Optional[LocalField]:
+    found = _labelled(text, FIELD_LABELS["fire_load_mj_m2"])
+    if not found:
+        return None
+    match = re.search(rf"(under|over|op til|mindst|ca\.?|cirka)?\s*({NUMBER})\s*MJ\s*/\s*m", found.value, re.IGNORECASE)
+    if not match:
+        return None
+    value = parse_danish_number(match.group(2))
+    # "Under 400 MJ/m²" is a bound, not a value
+    confidence = 0.6 if match.group(1) and match.group(1).lower() in ("under", "over", "op til", "mindst") else 0.95
+    return LocalField(value=value, confidence=confidence, label=found.label)
+
+
+def _municipality(text: str, address: Optional[LocalField]) -> Optional[LocalField]:
+    found = _labelled(text, FIELD_LABELS["municipality"])
+    if found:
+        name = re.sub(r"\s+Kommune$", "", found.value, flags=re.IGNORECASE).strip()
+        if name:
+            # A single place name is complete however the value ended
+            single_name = re.fullmatch(r"[A-ZÆØÅ][a-zæøå]+(?:[- ][A-ZÆØÅ][a-zæøå]+)?", name)
+            return LocalField(value=name, confidence=0.95 if single_name else found.confidence, label=found.label)
+
+    mentions = set(re.findall(r"\b([A-ZÆØÅ][a-zæøå]+(?:-[A-ZÆØÅ]?[a-zæøå]+)?) Kommune\b", text))
+    if len(mentions) == 1:
+        return LocalField(value=mentions.pop(), confidence=0.8)
+
+    if address:
+        # Postcode city ("8200 Aarhus N") usually, but not always, names the municipality
+        match = re.search(r"\b\d{4}\s+([A-ZÆØÅ][a-zæøå]+)", address.value)
+        if match:
+            return LocalField(value=match.group(1), confidence=0.6)
+    return None
+
+
+def _lexicon_classes(building_type: Optional[LocalField], text: str) -> Dict[str, LocalField]:
+    """Application category and risk class guessed from building-type keywords"""
+    haystack = (building_type.value if building_type else text).lower()
+    for keywords, category, risk in BUILDING_LEXICON:
+        if any(keyword in haystack for keyword in keywords):
+            return {
+                "application_category": LocalField(value=category, confidence=0.4),
+                "risk_class": LocalField(value=risk, confidence=0.4),
+            }
+    return {}
+
+
+def extract_project_fields(text: str) -> Dict[str, LocalField]:
+    """
+    Extract project fields from specification text without an LLM
+
+    Args:
+        text: Specification text (.txt content or a PDF text layer)
+
+    Returns:
+        Field name (as in ProjectData) -> LocalField, for every field found
+    """
+    text = normalize_text(text)
+    fields: Dict[str, LocalField] = {}
+
+    for name in ("project_name", "address", "building_type", "consultant_name", "consultant_certificate", "client_name"):
+        found = _labelled(text, FIELD_LABELS[name])
+        if found:
+            fields[name] = found
+    if "address" in fields and not re.search(r"\b\d{4}\b", fields["address"].value):
+        fields["address"].confidence = min(fields["address"].confidence, 0.6)  # No postcode
+    if "project_name" not in fields:
+        # Title line under a "PROJEKTBESKRIVELSE"-style heading
+        match = re.match(r"\s*[A-ZÆØÅ ]{6,}\n+([^\n:]{3,80})\n", text)
+        if match:
+            fields["project_name"] = LocalField(value=match.group(1).strip(), confidence=0.6)
+
+    area = _number_field(text, FIELD_LABELS["total_area_m2"], unit=r"m²|m2|kvm")
+    if not area:
+        area = _number_field(text, SECONDARY_AREA_LABELS, unit=r"m²|m2|kvm")
+        if area:
+            area.confidence = min(area.confidence, 0.6)
+    if area:
+        fields["total_area_m2"] = area
+
+    # The label already says what is counted ("Antal etager: 3"), so no unit is needed
+    floors = _number_field(text, FIELD_LABELS["floors"], unit="etager?|plan", integer=True, unit_optional=True)
+    if not floors:
+        match = re.findall(rf"\b(\d+|{_alternation(list(DANISH_NUMBERS))})\s+etager?\b", text, re.IGNORECASE)
+        values = {parse_danish_number(value) for value in match}
+        if len(values) == 1:
+            floors = LocalField(value=int(values.pop()), confidence=0.8)
+    if floors:
+        fields["floors"] = floors
+
+    occupancy = _number_field(text, FIELD_LABELS["occupancy"], unit="personer|pers\\.?", integer=True,
+                              unit_optional=True)
+    if not occupancy:
+        match = re.findall(r"\b(?:max\.?|maks\.?|maksimalt|op til)\s+(\d+)\s+(?:personer|ansatte|brugere)\b",
+                           text, re.IGNORECASE)
+        if len(set(match)) == 1:
+            occupancy = LocalField(value=int(match[0]), confidence=0.8)
+    if occupancy:
+        fields["occupancy"] = occupancy
+
+    for name in ("application_category", "risk_class"):
+        found = _labelled(text, FIELD_LABELS[name])
+        match = re.match(r"([1-6])\b", found.value) if found else None
+        if match and (name == "application_category" or int(match.group(1)) <= 4):
+            fields[name] = LocalField(value=int(match.group(1)), confidence=0.95, label=found.label)
+    for name, guess in _lexicon_classes(fields.get("building_type"), text).items():
+        fields.setdefault(name, guess)
+
+    for name, found in (("fire_classification", _fire_classification(text)),
+                        ("fire_load_mj_m2", _fire_load(text)),
+                        ("municipality", _municipality(text, fields.get("address")))):
+        if found:
+            fields[name] = found
+
+    return fields
+
+
+if __name__ == "__main__":
+    import sys
+    from pathlib import Path
+
+    for path in sys.argv[1:]:
+        print(f"\n📄 {Path(path).name}")
+        for name, found in extract_project_fields(Path(path).read_text(encoding="utf-8")).items():
+            print(f"  {name:24} {found.confidence:.2f}  {found.value}")
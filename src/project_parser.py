@@ -2,17 +2,17 @@
 Project Input Parser - Extracts building data from project specification PDFs
 
 This module handles Del 1: Intelligent Template System med Projektdata Integration
-- Parses project specification documents (architectural plans, building specs)
-- Extracts building parameters automatically using Gemini
+- Parses project specification documents (architectural plans, building specs),
+  as PDF or plain text; PDFs with a text layer are sent to Gemini as text
+- Extracts building parameters automatically: explicitly stated fields locally
+  (src/project_heuristics.py), the rest using Gemini
 - Determines required document types based on fire classification
 """
 
 import os
 from google import genai
-from google.genai import types
 from pathlib import Path
 from typing import Dict, List, Optional, Any
-import json
 import re
 
 from src.models import (
@@ -22,105 +22,279 @@ from src.models import (
     RiskClass,
     DocumentType
 )
-from config.settings import GEMINI_API_KEY, GEMINI_MODEL
+from config.settings import (
+    GEMINI_API_KEY,
+    GEMINI_MODEL,
+    LOCAL_PROJECT_EXTRACTION,
+    LOCAL_EXTRACTION_MIN_CONFIDENCE,
+    TEXT_LAYER_FIRST
+)
+from src.gemini_files import create_file_registry
+from src.extraction_schemas import ProjectData
+from src.project_heuristics import extract_project_fields, normalize_text
+from src.structured_output import json_config, parse_structured
+from src.rate_limiter import get_rate_limiter
+
+# Extraction prompt line per field; the full prompt asks for all of them
+FIELD_PROMPTS = {
+    "project_name": "Name of the building project",
+    "address": "Full address of the building",
+    "municipality": "Which Danish municipality (e.g., Aarhus, København, Aalborg)",
+    "building_type": 'Type of building (e.g., "Office Building", "Shopping Center", "Residential")',
+    "total_area_m2": "Total area in square meters (number)",
+    "floors": "Number of floors (number)",
+    "occupancy": "Maximum number of people (number)",
+    "fire_load_mj_m2": "Fire load in MJ/m² (number, estimate if not explicitly stated)",
+    "application_category": """Building usage category 1-6 (number):
+   - 1: Single-family residential (enfamiliehuse)
+   - 2: Multi-family residential (etageboliger)
+   - 3: Commercial/Office buildings
+   - 4: Industrial buildings (fabrikker, lagerhaller)
+   - 5: Assembly buildings (forsamlingslokaler, hoteller, institutioner)
+   - 6: Special buildings (hospitals, prisons, etc.)""",
+    "risk_class": """Fire risk class 1-4 (number):
+   - 1: Low risk (residential, small offices)
+   - 2: Medium risk (larger offices, schools)
+   - 3: High risk (hospitals, large public buildings)
+   - 4: Very high risk (special facilities)""",
+    "fire_classification": 'BR18 fire classification (string: "BK1", "BK2", "BK3", or "BK4")',
+    "consultant_name": 'Fire safety consultant name (if mentioned, otherwise "TBD")',
+    "consultant_certificate": 'Consultant certificate number (if mentioned, otherwise "TBD")',
+    "client_name": 'Client/owner name (if mentioned, otherwise "TBD")',
+}
+
+# Specifications read as plain text
+TEXT_EXTENSIONS = ['.txt', '.text', '.md']
+
+# Fields create_building_project() cannot do without
+REQUIRED_FIELDS = [
+    "project_name", "address", "municipality", "building_type", "total_area_m2",
+    "floors", "occupancy", "application_category", "risk_class", "fire_classification"
+]
+
+OPTIONAL_FIELD_DEFAULTS = {
+    "fire_load_mj_m2": None,
+    "consultant_name": "TBD",
+    "consultant_certificate": "TBD",
+    "client_name": "TBD",
+}
 
 
 class ProjectInputParser:
     """Extracts building project data from specification documents"""
 
-    def __init__(self):
-        """Initialize the parser with Gemini API"""
+    def __init__(self, use_files_api: Optional[bool] = None,
+                 min_confidence: float = LOCAL_EXTRACTION_MIN_CONFIDENCE):
+        """
+        Initialize the parser with Gemini API
+
+        Args:
+            use_files_api: Reference PDFs through the Gemini Files API (default: setting)
+            min_confidence: Locally extracted values below this confidence are asked from Gemini
+        """
         self.client = genai.Client(api_key=GEMINI_API_KEY)
         self.model = GEMINI_MODEL
+        self.files = create_file_registry(self.client, use_files_api)
+        self.min_confidence = min_confidence
+        self.rate_limiter = get_rate_limiter()  # Shared with every other concurrent caller
 
-    def parse_project_pdf(self, pdf_path: str) -> Dict[str, Any]:
+    def parse_project_file(self, path: str, local_first: Optional[bool] = None) -> Dict[str, Any]:
+        """
+        Parse a project specification, PDF or plain text (.txt/.text/.md)
+
+        Args:
+            path: Path to project specification
+            local_first: Extract fields locally first (default: LOCAL_PROJECT_EXTRACTION setting)
+
+        Returns:
+            Dictionary with extracted project data (see parse_project_pdf)
+        """
+        if Path(path).suffix.lower() in TEXT_EXTENSIONS:
+            text = Path(path).read_text(encoding='utf-8')
+            return self.parse_project_text(text, source_name=Path(path).name, local_first=local_first)
+        return self.parse_project_pdf(path, local_first=local_first)
+
+    def parse_project_pdf(self, pdf_path: str, local_first: Optional[bool] = None,
+                          text_first: Optional[bool] = None) -> Dict[str, Any]:
         """
         Parse a project specification PDF and extract building data.
 
+        Fields stated explicitly in the PDF's text layer are read locally; Gemini is
+        only called (with a prompt for just those fields) when required fields are
+        missing or uncertain. If every page has a usable text layer, Gemini gets
+        that text instead of the PDF.
+
         Args:
             pdf_path: Path to project specification PDF
+            local_first: Extract fields locally first (default: LOCAL_PROJECT_EXTRACTION setting)
+            text_first: Send the text layer instead of the PDF where possible (default: TEXT_LAYER_FIRST setting)
 
         Returns:
-            Dictionary with extracted project data
+            Dictionary with extracted project data, plus "field_confidence" (local
+            fields) and "gemini_fields" (fields Gemini supplied)
         """
         print(f"\n📄 Parsing project specification: {Path(pdf_path).name}")
         print("=" * 80)
 
-        # Read PDF file
-        print("📖 Reading PDF file...")
-        with open(pdf_path, 'rb') as f:
-            pdf_data = f.read()
+        if local_first is None:
+            local_first = LOCAL_PROJECT_EXTRACTION
+        if text_first is None:
+            text_first = TEXT_LAYER_FIRST
+        text = self._read_text_layer(pdf_path) if (local_first or text_first) else ""
+        if text:
+            print(f"📖 Using the PDF's text layer ({len(text)} characters)")
+        return self._parse(text if local_first else "", text if text_first else "", pdf_path)
+
+    def parse_project_text(self, text: str, source_name: str = "text input",
+                           local_first: Optional[bool] = None) -> Dict[str, Any]:
+        """
+        Parse project specification text (e.g. a .txt description or extracted PDF text)
+
+        Args:
+            text: Specification text
+            source_name: Name shown in the output
+            local_first: Extract fields locally first (default: LOCAL_PROJECT_EXTRACTION setting)
+
+        Returns:
+            Dictionary with extracted project data (see parse_project_pdf)
+        """
+        print(f"\n📄 Parsing project specification: {source_name}")
+        print("=" * 80)
+
+        if local_first is None:
+            local_first = LOCAL_PROJECT_EXTRACTION
+        text = normalize_text(text)
+        return self._parse(text if local_first else "", text, None)
+
+    def _parse(self, local_text: str, prompt_text: str, pdf_path: Optional[str]) -> Dict[str, Any]:
+        """
+        Extract fields locally from local_text, then the rest with Gemini
+
+        Gemini reads prompt_text if given, otherwise the PDF.
+        """
+        local = extract_project_fields(local_text) if local_text else {}
+
+        known = {name: found.value for name, found in local.items() if found.confidence >= self.min_confidence}
+        missing = [name for name in REQUIRED_FIELDS if name not in known]
+        if local and not missing:
+            print(f"⚡ All required fields found locally ({len(known)} fields) - no Gemini call")
+            # Uncertain optional values (e.g. "Under 400 MJ/m²") still beat no value
+            extracted_data = {**OPTIONAL_FIELD_DEFAULTS,
+                              **{name: found.value for name, found in local.items()}, **known}
+            gemini_fields = []
+        else:
+            # Ask only for what is missing or uncertain; everything else stays local
+            gemini_fields = [name for name in FIELD_PROMPTS if name not in known]
+            if known:
+                print(f"⚡ {len(known)} fields found locally - asking Gemini for {len(gemini_fields)}: "
+                      f"{', '.join(gemini_fields)}")
+            extracted_data = {**self._extract_with_gemini(prompt_text, pdf_path, gemini_fields, known), **known}
+
+        extracted_data["field_confidence"] = {
+            name: found.confidence for name, found in local.items() if name not in gemini_fields
+        }
+        extracted_data["gemini_fields"] = gemini_fields
+        print("\n✅ Extraction complete!")
+        self._print_extracted_data(extracted_data)
+        return extracted_data
+
+    def _read_text_layer(self, pdf_path: str) -> str:
+        """Normalised text layer of the PDF ("" unless every page has a usable one)"""
+        from src.pdf_processing.pdf_extractor import PDFExtractor
 
+        try:
+            pages = [text for _, text in PDFExtractor.iter_pages_pypdf(pdf_path)]
+        except Exception as e:
+            print(f"⚠️  Could not read text layer: {e}")
+            return ""
+        if not pages or not all(PDFExtractor.is_text_page(text) for text in pages):
+            return ""  # Scanned pages: only the PDF has all of the content
+        return normalize_text("\n".join(pages))
+
+    def _extract_with_gemini(self, text: str, pdf_path: Optional[str], fields: List[str],
+                             known: Dict[str, Any]) -> Dict[str, Any]:
+        """Extract fields with Gemini, from the text if given, otherwise from the PDF"""
         # Create extraction prompt
-        prompt = self._create_extraction_prompt()
-
-        # Extract data using Gemini
-        print("\n🤖 Extracting building data with Gemini...")
-        response = self.client.models.generate_content(
-            model=self.model,
-            contents=[
-                types.Part.from_bytes(
-                    data=pdf_data,
-                    mime_type='application/pdf',
-                ),
-                prompt
-            ]
-        )
+        prompt = self._create_extraction_prompt(fields if known else None, known)
+
+        def extract(contents):
+            with self.rate_limiter:
+                return self.client.models.generate_content(
+                    model=self.model,
+                    contents=contents,
+                    config=json_config(ProjectData)
+                )
+
+        if text:
+            # Send as text prompt - far fewer input tokens than the rendered PDF
+            print(f"📝 Sending {len(text)} characters of text instead of the document")
+            print("\n🤖 Extracting building data with Gemini...")
+            response = extract([prompt + f"\n\nDocument content:\n{text}"])
+        else:
+            # Reference the PDF (uploaded once per content hash)
+            print("📖 Reading PDF file...")
+            print("\n🤖 Extracting building data with Gemini...")
+            response = self.files.with_part(
+                pdf_path, lambda part: extract([part, prompt]), mime_type='application/pdf'
+            )
 
         # Parse JSON response
         try:
             extracted_data = self._parse_gemini_response(response.text)
-            print("\n✅ Extraction complete!")
-            self._print_extracted_data(extracted_data)
-            return extracted_data
         except Exception as e:
             print(f"\n❌ Error parsing Gemini response: {e}")
             print(f"Raw response: {response.text}")
             raise
+        return {name: extracted_data[name] for name in fields if name in extracted_data}
 
-    def _create_extraction_prompt(self) -> str:
-        """Create prompt for Gemini to extract project data"""
-        return """
-Extract building project information from this document and return it as JSON.
-
-Required fields:
-1. project_name: Name of the building project
-2. address: Full address of the building
-3. municipality: Which Danish municipality (e.g., Aarhus, København, Aalborg)
-4. building_type: Type of building (e.g., "Office Building", "Shopping Center", "Residential")
-5. total_area_m2: Total area in square meters (number)
-6. floors: Number of floors (number)
-7. occupancy: Maximum number of people (number)
-8. fire_load_mj_m2: Fire load in MJ/m² (number, estimate if not explicitly stated)
-9. application_category: Building usage category 1-6 (number):
-   - 1: Single-family residential (enfamiliehuse)
-   - 2: Multi-family residential (etageboliger)
-   - 3: Commercial/Office buildings
-   - 4: Industrial buildings (fabrikker, lagerhaller)
-   - 5: Assembly buildings (forsamlingslokaler, hoteller, institutioner)
-   - 6: Special buildings (hospitals, prisons, etc.)
-10. risk_class: Fire risk class 1-4 (number):
-   - 1: Low risk (residential, small offices)
-   - 2: Medium risk (larger offices, schools)
-   - 3: High risk (hospitals, large public buildings)
-   - 4: Very high risk (special facilities)
-11. fire_classification: BR18 fire classification (string: "BK1", "BK2", "BK3", or "BK4")
-12. consultant_name: Fire safety consultant name (if mentioned, otherwise "TBD")
-13. consultant_certificate: Consultant certificate number (if mentioned, otherwise "TBD")
-14. client_name: Client/owner name (if mentioned, otherwise "TBD")
+    def _create_extraction_prompt(self, fields: Optional[List[str]] = None,
+                                  known: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Create prompt for Gemini to extract project data
 
-IMPORTANT:
-- Return ONLY valid JSON, no markdown or explanation
-- Use null for unknown numeric values
-- Make reasonable estimates based on building type if exact values not stated
+        Args:
+            fields: Fields to extract (default: all, with an example)
+            known: Values already extracted locally, given as context
+        """
+        requested = fields or list(FIELD_PROMPTS)
+        field_lines = "\n".join(
+            f"{i}. {name}: {FIELD_PROMPTS[name]}" for i, name in enumerate(requested, 1)
+        )
+        classification_help = """
 - For fire_classification, use:
   * BK1: Simple buildings, low rise residential
   * BK2: Standard commercial/office buildings
   * BK3: Large buildings, high rise
-  * BK4: Special buildings requiring extra safety
+  * BK4: Special buildings requiring extra safety""" if "fire_classification" in requested else ""
+        rules = f"""IMPORTANT:
+- Return ONLY valid JSON, no markdown or explanation
+- Use null for unknown numeric values
+- Make reasonable estimates based on building type if exact values not stated{classification_help}"""
+
+        if fields is not None:
+            known_lines = "\n".join(f"- {name}: {value}" for name, value in (known or {}).items())
+            return f"""
+Extract the following building project fields from this document and return them as JSON.
+
+Already known (for context only, do not return):
+{known_lines}
+
+Fields to extract:
+{field_lines}
+
+{rules}
+"""
+
+        return f"""
+Extract building project information from this document and return it as JSON.
+
+Required fields:
+{field_lines}
+
+{rules}
 
 Example JSON format:
-{
+{{
   "project_name": "Kontorhus Aarhus C",
   "address": "Åboulevarden 23, 8000 Aarhus C",
   "municipality": "Aarhus",
@@ -135,25 +309,14 @@ Example JSON format:
   "consultant_name": "TBD",
   "consultant_certificate": "TBD",
   "client_name": "TBD"
-}
+}}
 
 Return only the JSON object.
 """
 
     def _parse_gemini_response(self, response_text: str) -> Dict[str, Any]:
-        """Parse Gemini's JSON response"""
-        # Remove markdown code blocks if present
-        text = response_text.strip()
-        if text.startswith("```json"):
-            text = text[7:]
-        if text.startswith("```"):
-            text = text[3:]
-        if text.endswith("```"):
-            text = text[:-3]
-        text = text.strip()
-
-        # Parse JSON
-        return json.loads(text)
+        """Parse and validate Gemini's JSON response (repaired with a text-only request if invalid)"""
+        return parse_structured(self.client, response_text, ProjectData, model=self.model)
 
     def _print_extracted_data(self, data: Dict[str, Any]):
         """Pretty print extracted data"""
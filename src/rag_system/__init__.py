@@ -1,4 +1,5 @@
 from .embeddings import EmbeddingGenerator
 from .vector_store import VectorStore
+from .remote_store import RemoteVectorStore, create_vector_store
 
-__all__ = ['EmbeddingGenerator', 'VectorStore']
+__all__ = ['EmbeddingGenerator', 'VectorStore', 'RemoteVectorStore', 'create_vector_store']
@@ -0,0 +1,347 @@
+"""
+Bulk Ingest - Resumable, concurrent ingestion of a directory of example documents
+
+BR18DemoSystem.step1_extract_example_documents processes PDFs one after
+another and only writes to the vector store at the very end, so one failing
+file loses the whole run. BulkIngestor instead:
+- extracts files concurrently in a process pool (one PDFExtractor per process;
+  text-layer parsing and chunking are CPU-bound, Gemini calls overlap)
+- embeds chunks in a thread pool and writes them to the vector store in
+  batches as soon as they are ready, from a single writer (this process)
+- records every file in a checkpoint manifest (content sha256 -> status), so a
+  rerun skips finished files and re-ingests failed or interrupted ones
+
+Usage:
+    python -m src.rag_system.bulk_ingest data/example_pdfs
+    python -m src.rag_system.bulk_ingest data/example_pdfs --processes 4 --no-insights
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from config.settings import (
+    EXAMPLE_PDFS_DIR,
+    INGEST_MANIFEST,
+    BULK_INGEST_PROCESSES,
+    BULK_INGEST_EMBED_THREADS,
+    BULK_INGEST_BATCH_SIZE
+)
+from src.models import KnowledgeChunk
+from src.pdf_processing.extraction_cache import file_sha256
+
+# PDFExtractor of the current worker process (set by _init_worker)
+_extractor = None
+
+
+def _init_worker(debug_mode: bool, processes: int):
+    global _extractor
+    from src.pdf_processing.pdf_extractor import PDFExtractor
+    from src.rate_limiter import share_rate_limiter
+    share_rate_limiter(processes)  # The workers together stay within the Gemini limits
+    _extractor = PDFExtractor(debug_mode=debug_mode)
+
+
+def _extract_file(pdf_path: str, extract_insights: bool) -> Dict:
+    """Run the extraction pipeline on one file (in a worker process)"""
+    started = time.perf_counter()
+    result = _extractor.process_br18_example(pdf_path, extract_insights=extract_insights)
+    if _extractor.debug_writer:
+        # Worker processes exit without atexit handlers - write queued debug records now
+        _extractor.debug_writer.flush()
+    return {
+        "metadata": result["metadata"],
+        "insights": result.get("insights"),
+        "chunks": result["chunks"],
+        "content_chars": len(result["content"] or ""),
+        "seconds": time.perf_counter() - started
+    }
+
+
+class BulkIngestor:
+    """Ingest a directory of documents concurrently, checkpointing per file"""
+
+    def __init__(
+        self,
+        vector_store,
+        manifest_path: Path = INGEST_MANIFEST,
+        processes: int = BULK_INGEST_PROCESSES,
+        embed_threads: int = BULK_INGEST_EMBED_THREADS,
+        batch_size: int = BULK_INGEST_BATCH_SIZE,
+        extract_insights: bool = True,
+        debug_mode: bool = True
+    ):
+        """
+        Initialize the ingestor
+
+        Args:
+            vector_store: VectorStore or RemoteVectorStore (written from this process only)
+            manifest_path: Checkpoint manifest (JSON)
+            processes: Extraction worker processes
+            embed_threads: Concurrent embedding requests
+            batch_size: Chunks per embedding request and vector store write
+            extract_insights: Extract document-type-specific insights
+            debug_mode: Write extraction debug output in the workers
+        """
+        from src.rag_system.embeddings import EmbeddingGenerator
+
+        self.vector_store = vector_store
+        self.embedder = EmbeddingGenerator()
+        self.manifest_path = Path(manifest_path)
+        self.processes = max(1, processes)
+        self.embed_threads = max(1, embed_threads)
+        self.batch_size = max(1, batch_size)
+        self.extract_insights = extract_insights
+        self.debug_mode = debug_mode
+        self.manifest = self._load_manifest()
+
+    # ------------------------------------------------------------------
+    # Manifest
+    # ------------------------------------------------------------------
+
+    def _load_manifest(self) -> Dict[str, Dict]:
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def _save_manifest(self):
+        """Persist the manifest (written atomically, so an interrupted run never corrupts it)"""
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.manifest_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _mark(self, content_sha256: str, **fields):
+        record = self.manifest.setdefault(content_sha256, {})
+        record.update(fields, updated_at=datetime.now().isoformat())
+        self._save_manifest()
+
+    @staticmethod
+    def _chunk_id_prefix(content_sha256: str) -> str:
+        return f"bulk-{content_sha256[:16]}-"
+
+    def _remove_partial(self, pdf_path: Path, content_sha256: str):
+        """Delete chunks an earlier, interrupted or forced run wrote for this file"""
+        prefix = self._chunk_id_prefix(content_sha256)
+        stored = self.vector_store.get_source_metadata(pdf_path.name, source_type="approved_doc")
+        stale = [chunk_id for chunk_id in stored if chunk_id.startswith(prefix)]
+        if stale:
+            self.vector_store.delete_chunks(stale)
+            print(f"🧹 Removed {len(stale)} chunks of an earlier run for {pdf_path.name}")
+
+    # ------------------------------------------------------------------
+    # Ingestion
+    # ------------------------------------------------------------------
+
+    def _knowledge_chunks(self, pdf_path: Path, content_sha256: str, extracted: Dict) -> List[KnowledgeChunk]:
+        metadata = extracted["metadata"] or {}
+        prefix = self._chunk_id_prefix(content_sha256)
+        chunks = []
+        for i, structured_chunk in enumerate(extracted["chunks"]):
+            # Insights and the chunk's § / heading path are merged into metadata (as in the GUI)
+            chunk_metadata = {**metadata, **structured_chunk.chunk_metadata()}
+            if extracted.get("insights"):
+                chunk_metadata['insights'] = extracted["insights"]
+            chunks.append(KnowledgeChunk(
+                chunk_id=f"{prefix}{i:04d}",
+                source_type="approved_doc",
+                source_reference=pdf_path.name,
+                municipality=metadata.get('municipality'),
+                document_type=metadata.get('document_type'),
+                content=structured_chunk.content,
+                metadata=chunk_metadata
+            ))
+        return chunks
+
+    def _embed(self, batch: List[Tuple[str, KnowledgeChunk]]) -> List[Tuple[str, KnowledgeChunk]]:
+        """Embed one batch of chunks (in a thread)"""
+        embeddings = self.embedder.generate_embeddings_batch(
+            [chunk.content for _, chunk in batch],
+            task_type="retrieval_document"
+        )
+        for (_, chunk), embedding in zip(batch, embeddings):
+            chunk.embedding = embedding
+        return batch
+
+    def ingest_directory(self, directory: Path, pattern: str = "*.pdf", force: bool = False) -> Dict:
+        """
+        Ingest every matching file below a directory
+
+        Args:
+            directory: Directory to walk (recursively)
+            pattern: File name pattern
+            force: Re-ingest files the manifest marks as done
+
+        Returns:
+            Report with file/chunk counts, failures and throughput
+        """
+        started = time.perf_counter()
+        paths = sorted(Path(directory).rglob(pattern))
+        todo: List[Tuple[Path, str]] = []
+        skipped = 0
+        seen = set()
+        for path in paths:
+            content_sha256 = file_sha256(path)
+            if content_sha256 in seen:
+                skipped += 1  # Same file twice in the directory
+                continue
+            seen.add(content_sha256)
+            record = self.manifest.get(content_sha256, {})
+            if record.get("status") == "done" and not force:
+                skipped += 1
+                continue
+            if record:
+                self._remove_partial(path, content_sha256)
+            todo.append((path, content_sha256))
+
+        print(f"📂 {len(paths)} files in {directory}: {len(todo)} to ingest, {skipped} already done")
+        report = {"files": len(paths), "skipped": skipped, "ingested": 0, "failed": [],
+                  "chunks": 0, "bytes": 0, "elapsed_seconds": 0.0}
+        if not todo:
+            return report
+
+        remaining: Dict[str, int] = {}  # content sha256 -> chunks not yet written
+        names: Dict[str, str] = {}
+        pending: List[Tuple[str, KnowledgeChunk]] = []
+        futures: Dict = {}  # future -> ("extract", (path, sha)) or ("embed", None)
+        queue = list(reversed(todo))
+
+        def file_failed(content_sha256: str, error: Exception):
+            nonlocal pending
+            print(f"❌ {names[content_sha256]}: {error}")
+            report["failed"].append(names[content_sha256])
+            remaining.pop(content_sha256, None)
+            pending = [(sha, chunk) for sha, chunk in pending if sha != content_sha256]
+            self._mark(content_sha256, status="failed", error=str(error))
+
+        def file_done(content_sha256: str):
+            report["ingested"] += 1
+            self._mark(content_sha256, status="done", error=None)
+            elapsed = time.perf_counter() - started
+            print(f"✅ [{report['ingested'] + len(report['failed'])}/{len(todo)}] {names[content_sha256]} "
+                  f"({report['chunks']} chunks, {report['chunks'] / elapsed:.1f} chunks/s)")
+
+        # spawn: the parent holds Chroma/HTTP threads that must not be forked
+        with ProcessPoolExecutor(self.processes, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_worker, initargs=(self.debug_mode, self.processes)) as processes, \
+                ThreadPoolExecutor(self.embed_threads) as threads:
+            while queue or futures or pending:
+                extracting = sum(1 for kind, _ in futures.values() if kind == "extract")
+                embedding = len(futures) - extracting
+
+                # Keep a bounded number of files in flight
+                while queue and extracting < self.processes * 2:
+                    path, content_sha256 = queue.pop()
+                    names[content_sha256] = path.name
+                    report["bytes"] += path.stat().st_size
+                    self._mark(content_sha256, path=str(path), status="extracting", error=None)
+                    try:
+                        future = processes.submit(_extract_file, str(path), self.extract_insights)
+                    except Exception as e:  # Broken pool (a worker crashed) - rerun retries the rest
+                        file_failed(content_sha256, e)
+                        continue
+                    futures[future] = ("extract", (path, content_sha256))
+                    extracting += 1
+
+                # Full batches go out immediately, the last partial one once extraction is done
+                while pending and embedding < self.embed_threads * 2 and (
+                        len(pending) >= self.batch_size or extracting == 0):
+                    batch, pending = pending[:self.batch_size], pending[self.batch_size:]
+                    futures[threads.submit(self._embed, batch)] = ("embed", batch)
+                    embedding += 1
+
+                if not futures:
+                    continue
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    kind, payload = futures.pop(future)
+
+                    if kind == "extract":
+                        path, content_sha256 = payload
+                        try:
+                            extracted = future.result()
+                            chunks = self._knowledge_chunks(path, content_sha256, extracted)
+                        except Exception as e:
+                            file_failed(content_sha256, e)
+                            continue
+                        print(f"📄 {path.name}: {extracted['content_chars']} chars, {len(chunks)} chunks "
+                              f"in {extracted['seconds']:.1f}s")
+                        self._mark(content_sha256, status="writing", chunks=len(chunks),
+                                   document_type=(extracted["metadata"] or {}).get('document_type'))
+                        if not chunks:
+                            file_done(content_sha256)
+                            continue
+                        remaining[content_sha256] = len(chunks)
+                        pending.extend((content_sha256, chunk) for chunk in chunks)
+                        continue
+
+                    # Embedded batch: write it, skipping files that failed meanwhile
+                    try:
+                        batch = [(sha, chunk) for sha, chunk in future.result() if sha in remaining]
+                        if batch:
+                            self.vector_store.add_chunks_batch([chunk for _, chunk in batch])
+                    except Exception as e:
+                        for content_sha256 in {sha for sha, _ in payload if sha in remaining}:
+                            file_failed(content_sha256, e)
+                        continue
+                    report["chunks"] += len(batch)
+                    for content_sha256, _ in batch:
+                        remaining[content_sha256] -= 1
+                        if remaining[content_sha256] == 0:
+                            del remaining[content_sha256]
+                            file_done(content_sha256)
+
+        report["elapsed_seconds"] = time.perf_counter() - started
+        return report
+
+
+def print_report(report: Dict):
+    """Print an ingestion report with throughput"""
+    elapsed = max(report["elapsed_seconds"], 1e-9)
+    print(f"\n{'='*80}")
+    print("BULK INGESTION")
+    print(f"{'='*80}")
+    print(f"  Files: {report['ingested']} ingested, {report['skipped']} skipped, {len(report['failed'])} failed")
+    print(f"  Chunks written: {report['chunks']}")
+    print(f"  Elapsed: {report['elapsed_seconds']:.1f}s")
+    if report["ingested"]:
+        print(f"  Throughput: {report['ingested'] / elapsed * 60:.1f} files/min, "
+              f"{report['chunks'] / elapsed:.1f} chunks/s, {report['bytes'] / elapsed / 1e6:.2f} MB/s")
+    for name in report["failed"]:
+        print(f"  ❌ {name} (rerun to retry)")
+
+
+if __name__ == "__main__":
+    from src.rag_system.remote_store import create_vector_store
+
+    arg_parser = argparse.ArgumentParser(description="Ingest a directory of example documents into the knowledge base")
+    arg_parser.add_argument("directory", nargs="?", default=str(EXAMPLE_PDFS_DIR))
+    arg_parser.add_argument("--pattern", default="*.pdf", help="File name pattern (default: *.pdf)")
+    arg_parser.add_argument("--processes", type=int, default=BULK_INGEST_PROCESSES)
+    arg_parser.add_argument("--threads", type=int, default=BULK_INGEST_EMBED_THREADS, help="Concurrent embedding requests")
+    arg_parser.add_argument("--batch-size", type=int, default=BULK_INGEST_BATCH_SIZE)
+    arg_parser.add_argument("--manifest", default=str(INGEST_MANIFEST))
+    arg_parser.add_argument("--no-insights", action="store_true", help="Skip document-type-specific insights")
+    arg_parser.add_argument("--no-debug", action="store_true", help="Skip extraction debug output")
+    arg_parser.add_argument("--force", action="store_true", help="Re-ingest files the manifest marks as done")
+    args = arg_parser.parse_args()
+
+    ingestor = BulkIngestor(
+        create_vector_store(),
+        manifest_path=Path(args.manifest),
+        processes=args.processes,
+        embed_threads=args.threads,
+        batch_size=args.batch_size,
+        extract_insights=not args.no_insights,
+        debug_mode=not args.no_debug
+    )
+    print_report(ingestor.ingest_directory(Path(args.directory), pattern=args.pattern, force=args.force))
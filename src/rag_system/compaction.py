@@ -0,0 +1,349 @@
+"""
+Knowledge Base Compaction - Remove orphaned, superseded and expired chunks
+
+Chunks are never removed by normal operation, so the collection keeps growing
+with chunks that no longer earn their search and storage cost:
+- Orphans: the source_reference file no longer exists
+- Superseded: the same source was ingested again, older copies remain
+- Expired: old, unconfirmed low-confidence feedback/insight chunks
+
+Usage:
+    python -m src.rag_system.compaction --dry-run
+    python -m src.rag_system.compaction
+"""
+
+import argparse
+import sqlite3
+import statistics
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from config.settings import (
+    COMPACTION_SOURCE_DIRS,
+    COMPACTION_MIN_CONFIDENCE,
+    COMPACTION_MAX_AGE_DAYS,
+    COMPACTION_BATCH_SIZE,
+    TOP_K_RETRIEVAL
+)
+
+# Source types whose source_reference is a file name or path
+FILE_SOURCE_TYPES = ("approved_doc", "regulation", "feedback")
+
+# Source types that may expire when low-confidence and unconfirmed
+EXPIRING_SOURCE_TYPES = ("feedback", "insight")
+
+# Ingestions of the same source further apart than this are separate versions
+# (chunks stored before ingested_at existed only have per-chunk created_at)
+VERSION_GAP = timedelta(minutes=10)
+
+
+class ChunkCompactor:
+    """Find and delete chunks that no longer belong in a VectorStore"""
+
+    def __init__(
+        self,
+        vector_store,
+        source_dirs: Optional[Iterable[Path]] = None,
+        min_confidence: float = COMPACTION_MIN_CONFIDENCE,
+        max_age_days: int = COMPACTION_MAX_AGE_DAYS,
+        batch_size: int = COMPACTION_BATCH_SIZE
+    ):
+        """
+        Initialize the compactor
+
+        Args:
+            vector_store: VectorStore to compact
+            source_dirs: Directories searched for source_reference files
+            min_confidence: Confidence below which feedback/insight chunks can expire
+            max_age_days: Days without confirmation before low-confidence chunks expire
+            batch_size: Number of ids per Chroma get/delete/add call
+        """
+        self.vector_store = vector_store
+        self.source_dirs = [Path(d) for d in (source_dirs or COMPACTION_SOURCE_DIRS)]
+        self.min_confidence = min_confidence
+        self.max_age_days = max_age_days
+        self.batch_size = batch_size
+        self._known_files: Optional[Set[str]] = None
+
+    def _iter_metadata(self):
+        """Page through (id, metadata) of every chunk in the collection"""
+        collection = self.vector_store.collection
+        offset = 0
+        while True:
+            page = collection.get(include=["metadatas"], limit=self.batch_size, offset=offset)
+            if not page['ids']:
+                return
+            yield from zip(page['ids'], page['metadatas'])
+            offset += len(page['ids'])
+
+    def _source_exists(self, source_reference: str) -> bool:
+        """Check whether a source_reference still points at an existing file"""
+        path = Path(source_reference)
+        if path.is_absolute() or len(path.parts) > 1:
+            if path.exists():
+                return True
+
+        if self._known_files is None:
+            self._known_files = set()
+            for directory in self.source_dirs:
+                if directory.exists():
+                    self._known_files.update(p.name for p in directory.rglob("*") if p.is_file())
+        return path.name in self._known_files
+
+    @staticmethod
+    def _timestamp(metadata: Dict, *keys: str) -> Optional[datetime]:
+        for key in keys:
+            value = metadata.get(key)
+            if value:
+                try:
+                    return datetime.fromisoformat(value)
+                except (TypeError, ValueError):
+                    continue
+        return None
+
+    def find_candidates(self) -> Dict[str, List[str]]:
+        """
+        Scan the collection for chunks to remove
+
+        Returns:
+            Dictionary with "orphans", "superseded" and "expired" chunk id lists
+            (each id appears in at most one list) and the "scanned" count
+        """
+        orphans, superseded, expired = [], [], []
+        versions: Dict[tuple, List[tuple]] = {}
+        expiry_cutoff = datetime.now() - timedelta(days=self.max_age_days)
+        scanned = 0
+
+        for chunk_id, metadata in self._iter_metadata():
+            scanned += 1
+            metadata = metadata or {}
+            source_type = metadata.get("source_type")
+            source_reference = metadata.get("source_reference") or "unknown"
+
+            # 1. Orphans (insight chunks reference an insight id, not a file)
+            if (
+                source_type in FILE_SOURCE_TYPES
+                and source_reference != "unknown"
+                and not self._source_exists(source_reference)
+            ):
+                orphans.append(chunk_id)
+                continue
+
+            # 2. Expired low-confidence chunks (negative constraints are kept on purpose)
+            if (
+                source_type in EXPIRING_SOURCE_TYPES
+                and metadata.get("approval_status") != "rejected"
+                and float(metadata.get("confidence_score", 1.0)) < self.min_confidence
+            ):
+                last_seen = self._timestamp(metadata, "meta_last_confirmed_at", "created_at")
+                if last_seen and last_seen < expiry_cutoff:
+                    expired.append(chunk_id)
+                    continue
+
+            # 3. Collect ingestion times to detect superseded versions below
+            # (fingerprinted regulation chunks are diffed on re-ingestion, so older
+            # ingested_at values there are unchanged sections, not old versions)
+            if (
+                source_type in FILE_SOURCE_TYPES
+                and source_reference != "unknown"
+                and not metadata.get("meta_segment_fingerprint")
+            ):
+                ingested = self._timestamp(metadata, "ingested_at", "created_at")
+                if ingested:
+                    versions.setdefault((source_type, source_reference), []).append((ingested, chunk_id))
+
+        for rows in versions.values():
+            rows.sort()
+            # Walk back from the newest chunk until there is a gap between ingestions
+            newest_start = len(rows) - 1
+            while newest_start > 0 and rows[newest_start][0] - rows[newest_start - 1][0] <= VERSION_GAP:
+                newest_start -= 1
+            superseded.extend(chunk_id for _, chunk_id in rows[:newest_start])
+
+        return {
+            "scanned": scanned,
+            "orphans": orphans,
+            "superseded": superseded,
+            "expired": expired
+        }
+
+    def _delete(self, ids: List[str]):
+        """Delete chunk ids in batches"""
+        collection = self.vector_store.collection
+        for start in range(0, len(ids), self.batch_size):
+            collection.delete(ids=ids[start:start + self.batch_size])
+
+    def rebuild_index(self):
+        """
+        Rebuild the collection's vector index by copying it into a fresh collection
+
+        Deleting from Chroma leaves holes in the HNSW index; a copy is packed.
+        If interrupted, the data is left in "<name>_rebuild".
+        """
+        store = self.vector_store
+        client = store.client
+        old = store.collection
+        name = old.name
+        rebuild_name = f"{name}_rebuild"
+
+        try:
+            client.delete_collection(name=rebuild_name)
+        except Exception:
+            pass
+        new = client.create_collection(name=rebuild_name, metadata=old.metadata)
+
+        offset = 0
+        while True:
+            page = old.get(
+                include=["embeddings", "documents", "metadatas"],
+                limit=self.batch_size,
+                offset=offset
+            )
+            if not page['ids']:
+                break
+            new.add(
+                ids=page['ids'],
+                embeddings=page['embeddings'],
+                documents=page['documents'],
+                metadatas=page['metadatas']
+            )
+            offset += len(page['ids'])
+
+        client.delete_collection(name=name)
+        new.modify(name=name)
+        store.collection = new
+
+    def _vacuum(self):
+        """Return freed SQLite pages to the file system (best effort)"""
+        directory = getattr(self.vector_store, "persist_directory", None)
+        database = Path(directory) / "chroma.sqlite3" if directory else None
+        if not database or not database.exists():
+            return
+        try:
+            connection = sqlite3.connect(str(database), timeout=5)
+            try:
+                connection.execute("VACUUM")
+            finally:
+                connection.close()
+        except sqlite3.Error as e:
+            print(f"⚠️  Could not vacuum {database.name}: {e}")
+
+    def _disk_usage(self) -> int:
+        directory = getattr(self.vector_store, "persist_directory", None)
+        if not directory or not Path(directory).exists():
+            return 0
+        return sum(p.stat().st_size for p in Path(directory).rglob("*") if p.is_file())
+
+    def _sample_embeddings(self, count: int = 20) -> List:
+        page = self.vector_store.collection.get(include=["embeddings"], limit=count)
+        embeddings = page.get('embeddings')
+        return list(embeddings) if embeddings is not None else []
+
+    def _measure_latency(self, query_embeddings: List, top_k: int = TOP_K_RETRIEVAL) -> Optional[float]:
+        """Median query latency in milliseconds (stored embeddings, no API calls)"""
+        collection = self.vector_store.collection
+        count = collection.count()
+        if not query_embeddings or count == 0:
+            return None
+
+        timings = []
+        for embedding in query_embeddings:
+            start = time.perf_counter()
+            collection.query(query_embeddings=[embedding], n_results=min(top_k, count))
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
+
+    def compact(self, dry_run: bool = False, rebuild: bool = True) -> Dict:
+        """
+        Delete orphaned, superseded and expired chunks and rebuild the index
+
+        Args:
+            dry_run: Only report what would be deleted
+            rebuild: Rebuild the vector index after deleting
+
+        Returns:
+            Report with candidate counts, reclaimed disk and latency before/after
+        """
+        print("\n🧹 Scanning knowledge base for compaction candidates...")
+        candidates = self.find_candidates()
+        to_delete = candidates["orphans"] + candidates["superseded"] + candidates["expired"]
+
+        report = {
+            "dry_run": dry_run,
+            "scanned": candidates["scanned"],
+            "orphans": len(candidates["orphans"]),
+            "superseded": len(candidates["superseded"]),
+            "expired": len(candidates["expired"]),
+            "deleted": 0,
+            "rebuilt": False,
+            "disk_before_bytes": self._disk_usage(),
+            "disk_after_bytes": None,
+            "reclaimed_bytes": None,
+            "latency_before_ms": None,
+            "latency_after_ms": None
+        }
+
+        if dry_run or not to_delete:
+            return report
+
+        probes = self._sample_embeddings()
+        report["latency_before_ms"] = self._measure_latency(probes)
+
+        print(f"🗑️  Deleting {len(to_delete)} chunks in batches of {self.batch_size}...")
+        self._delete(to_delete)
+        report["deleted"] = len(to_delete)
+
+        if rebuild:
+            print("🔧 Rebuilding vector index...")
+            self.rebuild_index()
+            report["rebuilt"] = True
+        self._vacuum()
+
+        # Deleted chunks must not be matched as near-duplicates anymore
+        self.vector_store._dedup_index = None
+
+        report["latency_after_ms"] = self._measure_latency(probes)
+        report["disk_after_bytes"] = self._disk_usage()
+        report["reclaimed_bytes"] = report["disk_before_bytes"] - report["disk_after_bytes"]
+        return report
+
+
+def print_report(report: Dict):
+    """Pretty print a compaction report"""
+    print(f"\n{'='*80}")
+    print(f"🧹 COMPACTION REPORT{' (dry run)' if report['dry_run'] else ''}")
+    print(f"{'='*80}")
+    print(f"  Chunks scanned:       {report['scanned']}")
+    print(f"  Orphans:              {report['orphans']}")
+    print(f"  Superseded versions:  {report['superseded']}")
+    print(f"  Expired (low conf.):  {report['expired']}")
+    print(f"  Deleted:              {report['deleted']}")
+    print(f"  Index rebuilt:        {'Yes' if report['rebuilt'] else 'No'}")
+    if report["reclaimed_bytes"] is not None:
+        print(f"  Disk:                 {report['disk_before_bytes'] / 1024:.1f} KB → "
+              f"{report['disk_after_bytes'] / 1024:.1f} KB "
+              f"(reclaimed {report['reclaimed_bytes'] / 1024:.1f} KB)")
+    if report["latency_before_ms"] is not None and report["latency_after_ms"] is not None:
+        print(f"  Query latency:        {report['latency_before_ms']:.2f} ms → "
+              f"{report['latency_after_ms']:.2f} ms (median)")
+    print(f"{'='*80}\n")
+
+
+if __name__ == "__main__":
+    from src.rag_system.vector_store import VectorStore
+
+    arg_parser = argparse.ArgumentParser(description="Compact the BR18 knowledge base")
+    arg_parser.add_argument("--dry-run", action="store_true", help="Only report what would be deleted")
+    arg_parser.add_argument("--no-rebuild", action="store_true", help="Skip rebuilding the vector index")
+    arg_parser.add_argument("--min-confidence", type=float, default=COMPACTION_MIN_CONFIDENCE)
+    arg_parser.add_argument("--max-age-days", type=int, default=COMPACTION_MAX_AGE_DAYS)
+    args = arg_parser.parse_args()
+
+    compactor = ChunkCompactor(
+        VectorStore(),
+        min_confidence=args.min_confidence,
+        max_age_days=args.max_age_days
+    )
+    print_report(compactor.compact(dry_run=args.dry_run, rebuild=not args.no_rebuild))
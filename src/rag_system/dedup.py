@@ -0,0 +1,158 @@
+"""
+Near-Duplicate Detection - MinHash signatures with LSH banding
+
+Feedback and insight chunks are often paraphrases of the same lesson
+("Missing §508 reference" restated per project, identical golden patterns
+from several approvals). This index lets the vector store recognise them
+before insert so they can be merged into the existing chunk instead of
+adding new rows.
+"""
+
+import hashlib
+import random
+import re
+from typing import Dict, Hashable, List, Optional, Set, Tuple
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_NON_WORD = re.compile(r"[^\w§]+")
+
+
+class MinHashIndex:
+    """In-memory MinHash/LSH index for near-duplicate text lookup"""
+
+    def __init__(
+        self,
+        threshold: float = 0.7,
+        num_perm: int = 64,
+        bands: int = 16,
+        shingle_size: int = 5,
+        seed: int = 1
+    ):
+        """
+        Initialize the index
+
+        Args:
+            threshold: Minimum estimated Jaccard similarity to count as a duplicate
+            num_perm: Number of MinHash permutations (signature length)
+            bands: Number of LSH bands (num_perm must be divisible by bands)
+            shingle_size: Character shingle length
+            seed: Seed for the permutation parameters (keeps signatures stable)
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+
+        rng = random.Random(seed)
+        self._perms = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+
+        self._signatures: Dict[str, Tuple[int, ...]] = {}
+        self._scopes: Dict[str, Hashable] = {}
+        self._buckets: Dict[Tuple[Hashable, int, Tuple[int, ...]], Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def _shingles(self, text: str) -> Set[str]:
+        """Normalize text and split into overlapping character shingles"""
+        normalized = _NON_WORD.sub(" ", text.lower()).strip()
+        if len(normalized) <= self.shingle_size:
+            return {normalized}
+        return {
+            normalized[i:i + self.shingle_size]
+            for i in range(len(normalized) - self.shingle_size + 1)
+        }
+
+    def signature(self, text: str) -> Tuple[int, ...]:
+        """
+        Compute the MinHash signature of a text
+
+        Args:
+            text: Input text
+
+        Returns:
+            Tuple of num_perm minimum hash values
+        """
+        hashes = [
+            int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest(), "little")
+            for shingle in self._shingles(text)
+        ]
+        return tuple(
+            min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+            for a, b in self._perms
+        )
+
+    def similarity(self, sig_a: Tuple[int, ...], sig_b: Tuple[int, ...]) -> float:
+        """Estimate Jaccard similarity from two signatures"""
+        return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / self.num_perm
+
+    def _band_keys(self, signature: Tuple[int, ...], scope: Hashable) -> List[Tuple]:
+        return [
+            (scope, band, signature[band * self.rows:(band + 1) * self.rows])
+            for band in range(self.bands)
+        ]
+
+    def find_duplicate(self, text: str, scope: Hashable = None) -> Optional[str]:
+        """
+        Find the most similar indexed entry above the threshold
+
+        Args:
+            text: Candidate text
+            scope: Only entries added with the same scope are compared
+
+        Returns:
+            Key of the best matching entry, or None if there is no near-duplicate
+        """
+        return self.query(self.signature(text), scope)
+
+    def query(self, signature: Tuple[int, ...], scope: Hashable = None) -> Optional[str]:
+        """Same as find_duplicate, for a precomputed signature"""
+        candidates = set()
+        for band_key in self._band_keys(signature, scope):
+            candidates.update(self._buckets.get(band_key, ()))
+
+        best_key, best_score = None, self.threshold
+        for key in candidates:
+            score = self.similarity(signature, self._signatures[key])
+            if score >= best_score:
+                best_key, best_score = key, score
+        return best_key
+
+    def add(self, key: str, text: str, scope: Hashable = None, signature: Optional[Tuple[int, ...]] = None):
+        """
+        Index a text under a key
+
+        Args:
+            key: Identifier returned by find_duplicate (e.g., chunk_id)
+            text: Text to index
+            scope: Scope the entry belongs to
+            signature: Precomputed signature (optional)
+        """
+        if key in self._signatures:
+            self.remove(key)
+        signature = signature or self.signature(text)
+        self._signatures[key] = signature
+        self._scopes[key] = scope
+        for band_key in self._band_keys(signature, scope):
+            self._buckets.setdefault(band_key, set()).add(key)
+
+    def remove(self, key: str):
+        """Remove an entry from the index (no-op if missing)"""
+        signature = self._signatures.pop(key, None)
+        if signature is None:
+            return
+        scope = self._scopes.pop(key)
+        for band_key in self._band_keys(signature, scope):
+            bucket = self._buckets.get(band_key)
+            if bucket:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band_key]
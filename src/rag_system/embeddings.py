@@ -1,7 +1,15 @@
 from google import genai
 from google.genai import types
 from typing import List, Optional
-from config.settings import GEMINI_API_KEY, EMBEDDING_MODEL, EMBEDDING_DIMENSION
+from config.settings import (
+    GEMINI_API_KEY,
+    EMBEDDING_MODEL,
+    EMBEDDING_DIMENSION,
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_BATCH_MAX_TOKENS,
+    EMBEDDING_MAX_INPUT_TOKENS
+)
+from src.token_budget import estimate_tokens, pack_by_tokens
 
 class EmbeddingGenerator:
     """Generate embeddings for text chunks using Gemini"""
@@ -65,14 +73,21 @@ class EmbeddingGenerator:
             "task_type": task_type
         }
 
-        # If no titles provided, process as a single batch
+        # If no titles provided, process in batches sized by count and estimated tokens
         if not titles:
-            result = self.client.models.embed_content(
-                model=EMBEDDING_MODEL,
-                contents=texts,
-                config=types.EmbedContentConfig(**config_params)
-            )
-            return [emb.values for emb in result.embeddings]
+            oversized = sum(1 for text in texts if estimate_tokens(text) > EMBEDDING_MAX_INPUT_TOKENS)
+            if oversized:
+                print(f"⚠️  {oversized} texts exceed ~{EMBEDDING_MAX_INPUT_TOKENS} tokens and will be truncated by the embedding model")
+
+            embeddings = []
+            for batch in pack_by_tokens(texts, EMBEDDING_BATCH_MAX_TOKENS, EMBEDDING_BATCH_SIZE):
+                result = self.client.models.embed_content(
+                    model=EMBEDDING_MODEL,
+                    contents=[texts[i] for i in batch],
+                    config=types.EmbedContentConfig(**config_params)
+                )
+                embeddings.extend(emb.values for emb in result.embeddings)
+            return embeddings
 
         # If titles provided, process individually (API limitation)
         embeddings = []
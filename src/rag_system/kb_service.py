@@ -0,0 +1,154 @@
+"""
+Knowledge Base Service - Single-writer / multi-reader access to one knowledge base
+
+Chroma's PersistentClient must not be opened by several processes writing the
+same KNOWLEDGE_BASE_DIR. This service is the one process that owns the
+VectorStore; generator workers talk to it over a small JSON-over-HTTP protocol
+through RemoteVectorStore (set KB_SERVICE_URL, see remote_store.py).
+
+Protocol:
+    GET  /health -> {"status": "ok", "chunks": <count>}
+    POST /rpc    {"method": "<name>", "params": {...}} -> {"result": ...} or {"error": "..."}
+
+Usage:
+    python -m src.rag_system.kb_service --host 127.0.0.1 --port 8765
+"""
+
+import argparse
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+
+from config.settings import KB_SERVICE_HOST, KB_SERVICE_PORT
+from src.models import KnowledgeChunk
+
+# Methods workers may call (name -> whether it writes to the store)
+SERVICE_METHODS = {
+    "search": False,
+    "search_with_confidence": False,
+    "retrieve_context": False,
+    "get_golden_records": False,
+    "get_negative_constraints": False,
+    "get_stats": False,
+    "count": False,
+    "get_source_metadata": False,
+    "add_chunks_batch": True,
+    "delete_by_source": True,
+    "delete_chunks": True,
+    "clear": True,
+}
+
+
+def serialize_chunks(chunks: List[KnowledgeChunk]) -> List[Dict]:
+    """Convert chunks to JSON-safe dicts (projected chunks may leave fields unset)"""
+    return [chunk.model_dump(mode="json", warnings=False) for chunk in chunks]
+
+
+class KnowledgeBaseService:
+    """Owns the VectorStore and executes worker requests against it"""
+
+    def __init__(self, vector_store):
+        """
+        Initialize the service
+
+        Args:
+            vector_store: The VectorStore this process owns
+        """
+        self.vector_store = vector_store
+        self._write_lock = threading.Lock()  # Writes are serialized, reads run concurrently
+
+    def dispatch(self, method: str, params: Dict[str, Any]) -> Any:
+        """
+        Execute one request
+
+        Args:
+            method: Name from SERVICE_METHODS
+            params: Keyword arguments for the VectorStore method
+
+        Returns:
+            JSON-safe result
+        """
+        if method not in SERVICE_METHODS:
+            raise ValueError(f"Unknown method: {method}")
+
+        if method == "count":
+            return self.vector_store.collection.count()
+
+        if method == "add_chunks_batch":
+            params = dict(params)
+            params["chunks"] = [KnowledgeChunk.model_validate(c) for c in params.get("chunks", [])]
+
+        handler = getattr(self.vector_store, method)
+        if SERVICE_METHODS[method]:
+            with self._write_lock:
+                result = handler(**params)
+        else:
+            result = handler(**params)
+
+        if isinstance(result, list) and result and isinstance(result[0], KnowledgeChunk):
+            return serialize_chunks(result)
+        return result
+
+    def serve(self, host: str = KB_SERVICE_HOST, port: int = KB_SERVICE_PORT):
+        """Serve requests until interrupted"""
+        server = ThreadingHTTPServer((host, port), _RequestHandler)
+        server.daemon_threads = True
+        server.service = self
+        print(f"📡 Knowledge base service listening on http://{host}:{port} "
+              f"({self.vector_store.collection.count()} chunks)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\nKnowledge base service stopped")
+        finally:
+            server.server_close()
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    """HTTP handler translating requests to KnowledgeBaseService.dispatch"""
+
+    def _send_json(self, status: int, body: Dict):
+        payload = json.dumps(body, ensure_ascii=False, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if self.path != "/health":
+            self._send_json(404, {"error": f"Unknown path: {self.path}"})
+            return
+        self._send_json(200, {"status": "ok", "chunks": self.server.service.dispatch("count", {})})
+
+    def do_POST(self):
+        if self.path != "/rpc":
+            self._send_json(404, {"error": f"Unknown path: {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length))
+            result = self.server.service.dispatch(request["method"], request.get("params") or {})
+        except (KeyError, TypeError, ValueError) as e:
+            self._send_json(400, {"error": f"{type(e).__name__}: {e}"})
+        except Exception as e:
+            self._send_json(500, {"error": f"{type(e).__name__}: {e}"})
+        else:
+            self._send_json(200, {"result": result})
+
+    def log_message(self, format, *args):
+        # Keep the console quiet - one line per query would drown the service output
+        pass
+
+
+if __name__ == "__main__":
+    from src.rag_system.vector_store import VectorStore
+
+    arg_parser = argparse.ArgumentParser(description="Serve the BR18 knowledge base to worker processes")
+    arg_parser.add_argument("--host", default=KB_SERVICE_HOST)
+    arg_parser.add_argument("--port", type=int, default=KB_SERVICE_PORT)
+    arg_parser.add_argument("--collection", default="br18_knowledge")
+    args = arg_parser.parse_args()
+
+    KnowledgeBaseService(VectorStore(collection_name=args.collection)).serve(args.host, args.port)
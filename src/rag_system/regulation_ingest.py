@@ -0,0 +1,234 @@
+"""
+Regulation Ingest - Incremental (re-)ingestion of BR18 by page and section diff
+
+Uploading a new BR18 version used to delete every regulation chunk and
+re-extract and re-embed the whole document. Here each regulation chunk carries
+fingerprints:
+- page_fingerprints: hash of each page's text layer (or raw content for scanned pages)
+- segment_fingerprint: hash of the chunk's normalized content and embedding model
+
+A new version is extracted page by page (text pages locally; scanned pages via
+Gemini, cached by page fingerprint so unchanged pages are never re-extracted),
+chunked on § paragraphs with a fresh chunk at every heading (so a change only
+re-chunks its own section), and diffed against the stored chunks: unchanged
+segments are kept as they are, changed/added ones are embedded and added,
+removed ones are deleted.
+"""
+
+import hashlib
+import json
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+
+import PyPDF2
+
+from config.settings import EMBEDDING_MODEL, EMBEDDING_DIMENSION, REGULATION_CHUNK_MAX_TOKENS
+from src.models import KnowledgeChunk
+from src.pdf_processing.chunker import StructureAwareChunker
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def _normalize(text: str) -> str:
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class RegulationIngestor:
+    """Ingest a regulation PDF into the vector store, re-processing only what changed"""
+
+    def __init__(self, pdf_extractor, vector_store, max_tokens: int = REGULATION_CHUNK_MAX_TOKENS):
+        """
+        Initialize the ingestor
+
+        Args:
+            pdf_extractor: PDFExtractor (text layer + Gemini fallback)
+            vector_store: VectorStore or RemoteVectorStore
+            max_tokens: Token budget per regulation chunk
+        """
+        self.pdf_extractor = pdf_extractor
+        self.vector_store = vector_store
+        # min_tokens=0: every heading starts a chunk, so edits don't shift later chunk boundaries
+        self.chunker = StructureAwareChunker(max_tokens=max_tokens, min_tokens=0)
+
+    @staticmethod
+    def _page_fingerprint(page, text: str, is_text: bool) -> str:
+        """Fingerprint of one page: its text layer, or its raw content and images if scanned"""
+        if is_text:
+            return _sha256(_normalize(text).encode('utf-8'))
+
+        sha = hashlib.sha256()
+        contents = page.get_contents()
+        if contents is not None:
+            sha.update(contents.get_data())
+        resources = page.get("/Resources")
+        xobjects = resources.get_object().get("/XObject") if resources else None
+        if xobjects:
+            xobjects = xobjects.get_object()
+            for name in sorted(xobjects):
+                try:
+                    sha.update(xobjects[name].get_object().get_data())
+                except Exception:
+                    sha.update(str(xobjects[name].get_object()).encode('utf-8'))
+        return sha.hexdigest()
+
+    def extract_pages(self, pdf_path: str, extraction_prompt: Optional[str] = None) -> Tuple[List[str], List[str], int]:
+        """
+        Extract every page's text and fingerprint
+
+        Args:
+            pdf_path: Regulation PDF
+            extraction_prompt: Prompt for scanned pages sent to Gemini
+
+        Returns:
+            (page texts, page fingerprints, number of pages sent to Gemini)
+        """
+        reader = PyPDF2.PdfReader(pdf_path)
+        texts: List[str] = []
+        fingerprints: List[str] = []
+        scanned: List[int] = []
+        for page_index, text in self.pdf_extractor.iter_pages_pypdf(pdf_path):
+            is_text = self.pdf_extractor.is_text_page(text)
+            texts.append(text)
+            fingerprints.append(self._page_fingerprint(reader.pages[page_index], text, is_text))
+            if not is_text:
+                scanned.append(page_index)
+
+        if scanned:
+            ranges = [(page_index, page_index + 1) for page_index in scanned]
+            identities = {page_range: fingerprints[page_range[0]] for page_range in ranges}
+            results = self.pdf_extractor.extract_page_ranges(
+                pdf_path, ranges, extraction_prompt, len(texts), cache_identities=identities
+            )
+            for (start, _), text in results.items():
+                texts[start] = text
+        return texts, fingerprints, len(scanned)
+
+    @staticmethod
+    def segment_fingerprint(content: str) -> str:
+        """Fingerprint of a chunk: changes when its text or the embedding model changes"""
+        material = f"{EMBEDDING_MODEL}:{EMBEDDING_DIMENSION}\n{_normalize(content)}"
+        return _sha256(material.encode('utf-8'))
+
+    def build_segments(self, page_texts: List[str], page_fingerprints: List[str]) -> List[Dict]:
+        """
+        Chunk the pages and fingerprint each chunk
+
+        Returns:
+            Segments in document order: chunk, fingerprint and the fingerprints of its pages
+        """
+        # Line number -> page, to record which pages each chunk came from
+        lines: List[str] = []
+        line_pages: List[int] = []
+        for page_index, text in enumerate(page_texts):
+            page_lines = text.splitlines()
+            lines.extend(page_lines)
+            line_pages.extend([page_index] * len(page_lines))
+        full_text = "\n".join(lines)
+
+        segments, seen = [], set()
+        for chunk in self.chunker.chunk(full_text):
+            fingerprint = self.segment_fingerprint(chunk.content)
+            if fingerprint in seen:
+                continue  # Identical text twice (e.g. a repeated note) is stored once
+            seen.add(fingerprint)
+            first_page = line_pages[min(chunk.first_line, len(line_pages) - 1)] if line_pages else 0
+            last_page = line_pages[min(chunk.last_line, len(line_pages) - 1)] if line_pages else 0
+            segments.append({
+                "chunk": chunk,
+                "fingerprint": fingerprint,
+                "page_fingerprints": page_fingerprints[first_page:last_page + 1]
+            })
+        return segments
+
+    def ingest(
+        self,
+        pdf_path: str,
+        source_reference: str = "BR18.pdf",
+        extraction_prompt: Optional[str] = None,
+        regulation_metadata: Optional[Dict] = None
+    ) -> Dict:
+        """
+        Ingest a regulation version, adding/deleting only the chunks that changed
+
+        Args:
+            pdf_path: Regulation PDF
+            source_reference: Source name the chunks are stored under
+            extraction_prompt: Prompt for scanned pages sent to Gemini
+            regulation_metadata: Extra metadata for every chunk (e.g. regulation_name)
+
+        Returns:
+            Report with page and segment counts and elapsed time
+        """
+        started = time.perf_counter()
+        stored = self.vector_store.get_source_metadata(source_reference, source_type="regulation")
+        stored_by_fingerprint = {
+            metadata.get("meta_segment_fingerprint"): chunk_id
+            for chunk_id, metadata in stored.items()
+            if metadata.get("meta_segment_fingerprint")
+        }
+        stored_pages = set()
+        for metadata in stored.values():
+            try:
+                stored_pages.update(json.loads(metadata.get("meta_page_fingerprints") or "[]"))
+            except (TypeError, json.JSONDecodeError):
+                continue
+
+        print("📄 Fingerprinting pages...")
+        page_texts, page_fingerprints, gemini_pages = self.extract_pages(pdf_path, extraction_prompt)
+        unchanged_pages = sum(1 for fingerprint in page_fingerprints if fingerprint in stored_pages)
+
+        segments = self.build_segments(page_texts, page_fingerprints)
+        new_fingerprints = {segment["fingerprint"] for segment in segments}
+        added = [segment for segment in segments if segment["fingerprint"] not in stored_by_fingerprint]
+        # Everything not matching a current segment goes: removed/changed sections and
+        # chunks from full ingestions that had no fingerprints
+        removed_ids = [
+            chunk_id for chunk_id, metadata in stored.items()
+            if metadata.get("meta_segment_fingerprint") not in new_fingerprints
+        ]
+
+        print(f"🔍 Pages: {unchanged_pages}/{len(page_fingerprints)} unchanged, {gemini_pages} scanned")
+        print(f"🔍 Sections: {len(segments) - len(added)} unchanged, {len(added)} new/changed, "
+              f"{len(removed_ids)} removed")
+
+        if removed_ids:
+            self.vector_store.delete_chunks(removed_ids)
+
+        if added:
+            knowledge_chunks = []
+            for segment in added:
+                chunk = segment["chunk"]
+                knowledge_chunks.append(KnowledgeChunk(
+                    chunk_id=f"regulation-{segment['fingerprint'][:32]}",
+                    source_type="regulation",
+                    source_reference=source_reference,
+                    municipality=None,  # Applies to all municipalities
+                    document_type=None,  # Not a specific doc type
+                    content=chunk.content,
+                    metadata={
+                        **(regulation_metadata or {}),
+                        **chunk.chunk_metadata(),
+                        "segment_fingerprint": segment["fingerprint"],
+                        "page_fingerprints": segment["page_fingerprints"]
+                    }
+                ))
+            self.vector_store.add_chunks_batch(knowledge_chunks, deduplicate=False)
+
+        report = {
+            "pages": len(page_fingerprints),
+            "unchanged_pages": unchanged_pages,
+            "gemini_pages": gemini_pages,
+            "segments": len(segments),
+            "unchanged_segments": len(segments) - len(added),
+            "added_segments": len(added),
+            "removed_chunks": len(removed_ids),
+            "first_ingestion": not stored,
+            "elapsed_seconds": time.perf_counter() - started
+        }
+        print(f"✅ Regulation ingested in {report['elapsed_seconds']:.1f}s")
+        return report
@@ -0,0 +1,180 @@
+"""
+Remote Vector Store - VectorStore API backed by the knowledge base service
+
+Worker processes use RemoteVectorStore instead of opening the Chroma
+directory themselves, so any number of generator workers can share one
+knowledge base owned by a single writer (see kb_service.py).
+"""
+
+from typing import Dict, List, Optional, Sequence
+
+import httpx
+
+from config.settings import KB_SERVICE_URL, TOP_K_RETRIEVAL
+from src.models import KnowledgeChunk
+from .vector_store import DEFAULT_INCLUDE, INCLUDE_METADATA
+
+
+class RemoteVectorStore:
+    """Client for the knowledge base service with the same interface as VectorStore"""
+
+    def __init__(self, url: Optional[str] = None, read_only: bool = False, timeout: float = 120.0):
+        """
+        Initialize the client
+
+        Args:
+            url: Service URL (defaults to KB_SERVICE_URL)
+            read_only: Refuse write calls instead of forwarding them to the service
+            timeout: Request timeout in seconds
+        """
+        self.url = (url or KB_SERVICE_URL or "").rstrip("/")
+        if not self.url:
+            raise ValueError("No knowledge base service URL configured (set KB_SERVICE_URL)")
+        self.read_only = read_only
+        self._http = httpx.Client(base_url=self.url, timeout=timeout)
+
+        health = self._http.get("/health").json()
+        print(f"Connected to knowledge base service at {self.url} ({health.get('chunks', 0)} chunks)")
+
+    def _call(self, method: str, write: bool = False, **params):
+        if write and self.read_only:
+            raise PermissionError(f"{method} is not allowed on a read-only knowledge base client")
+        response = self._http.post("/rpc", json={"method": method, "params": params})
+        body = response.json()
+        if response.status_code != 200:
+            raise RuntimeError(f"Knowledge base service error ({method}): {body.get('error')}")
+        return body["result"]
+
+    @staticmethod
+    def _chunks(rows: List[Dict], include: Sequence[str] = DEFAULT_INCLUDE) -> List[KnowledgeChunk]:
+        if INCLUDE_METADATA not in include:
+            # Content-only rows have no source fields to validate
+            return [KnowledgeChunk.model_construct(**row) for row in rows]
+        return [KnowledgeChunk.model_validate(row) for row in rows]
+
+    def search(
+        self,
+        query: str,
+        top_k: int = TOP_K_RETRIEVAL,
+        municipality: Optional[str] = None,
+        document_type: Optional[str] = None,
+        include: Sequence[str] = DEFAULT_INCLUDE
+    ) -> List[KnowledgeChunk]:
+        """See VectorStore.search"""
+        return self._chunks(self._call(
+            "search", query=query, top_k=top_k, municipality=municipality,
+            document_type=document_type, include=list(include)
+        ), include)
+
+    def search_with_confidence(
+        self,
+        query: str,
+        top_k: int = TOP_K_RETRIEVAL,
+        municipality: Optional[str] = None,
+        document_type: Optional[str] = None,
+        exclude_rejected: bool = True,
+        prioritize_approved: bool = True,
+        include: Sequence[str] = DEFAULT_INCLUDE
+    ) -> List[KnowledgeChunk]:
+        """See VectorStore.search_with_confidence"""
+        return self._chunks(self._call(
+            "search_with_confidence", query=query, top_k=top_k, municipality=municipality,
+            document_type=document_type, exclude_rejected=exclude_rejected,
+            prioritize_approved=prioritize_approved, include=list(include)
+        ), include)
+
+    def retrieve_context(
+        self,
+        query: str,
+        top_k: int = TOP_K_RETRIEVAL,
+        municipality: Optional[str] = None,
+        document_type: Optional[str] = None
+    ) -> List[str]:
+        """See VectorStore.retrieve_context"""
+        return self._call("retrieve_context", query=query, top_k=top_k,
+                          municipality=municipality, document_type=document_type)
+
+    def get_golden_records(
+        self,
+        municipality: Optional[str] = None,
+        document_type: Optional[str] = None,
+        min_confidence: float = 0.8,
+        include: Sequence[str] = DEFAULT_INCLUDE
+    ) -> List[KnowledgeChunk]:
+        """See VectorStore.get_golden_records"""
+        return self._chunks(self._call(
+            "get_golden_records", municipality=municipality, document_type=document_type,
+            min_confidence=min_confidence, include=list(include)
+        ), include)
+
+    def get_negative_constraints(
+        self,
+        municipality: Optional[str] = None,
+        document_type: Optional[str] = None,
+        include: Sequence[str] = DEFAULT_INCLUDE
+    ) -> List[KnowledgeChunk]:
+        """See VectorStore.get_negative_constraints"""
+        return self._chunks(self._call(
+            "get_negative_constraints", municipality=municipality,
+            document_type=document_type, include=list(include)
+        ), include)
+
+    def get_stats(self) -> Dict:
+        """See VectorStore.get_stats"""
+        return self._call("get_stats")
+
+    def add_chunks_batch(self, chunks: List[KnowledgeChunk], deduplicate: bool = True):
+        """Forward chunks to the writer (embeddings are generated there if missing)"""
+        if not chunks:
+            return
+        self._call(
+            "add_chunks_batch",
+            write=True,
+            chunks=[chunk.model_dump(mode="json") for chunk in chunks],
+            deduplicate=deduplicate
+        )
+        print(f"Sent {len(chunks)} chunks to knowledge base service")
+
+    def add_chunk(self, chunk: KnowledgeChunk, deduplicate: bool = True):
+        """See VectorStore.add_chunk"""
+        self.add_chunks_batch([chunk], deduplicate=deduplicate)
+
+    def delete_by_source(self, source_reference: str, source_type: Optional[str] = None):
+        """See VectorStore.delete_by_source"""
+        return self._call("delete_by_source", write=True,
+                          source_reference=source_reference, source_type=source_type)
+
+    def get_source_metadata(self, source_reference: str, source_type: Optional[str] = None) -> Dict[str, Dict]:
+        """See VectorStore.get_source_metadata"""
+        return self._call("get_source_metadata", source_reference=source_reference, source_type=source_type)
+
+    def delete_chunks(self, chunk_ids: List[str]) -> int:
+        """See VectorStore.delete_chunks"""
+        return self._call("delete_chunks", write=True, chunk_ids=list(chunk_ids))
+
+    def clear(self):
+        """See VectorStore.clear"""
+        self._call("clear", write=True)
+
+    def save(self):
+        """Persistence is handled by the service"""
+        print(f"Knowledge base service auto-saves. Current count: {self._call('count')} chunks")
+
+    def load(self):
+        """Persistence is handled by the service"""
+        print(f"Knowledge base service auto-loads. Current count: {self._call('count')} chunks")
+
+
+def create_vector_store(collection_name: str = "br18_knowledge"):
+    """
+    Open the knowledge base for this process
+
+    Returns a RemoteVectorStore when KB_SERVICE_URL is set (worker processes),
+    otherwise a local VectorStore (single process, or a Chroma server backend
+    via CHROMA_SERVER_HOST).
+    """
+    if KB_SERVICE_URL:
+        return RemoteVectorStore(KB_SERVICE_URL)
+
+    from .vector_store import VectorStore
+    return VectorStore(collection_name=collection_name)
@@ -0,0 +1,163 @@
+"""
+Streaming Ingest - Chunk and embed a document while Gemini is still extracting it
+
+process_br18_example runs extraction, chunking and embedding strictly one after
+another, so a document's ingestion takes extraction + embedding time.
+StreamingIngestor overlaps them:
+- content is streamed (PDFExtractor.stream_content, generate_content_stream)
+- StructureAwareChunker.chunk_stream emits each chunk as soon as it is final
+- a background thread embeds chunks in batches as they arrive
+- metadata and insights are extracted concurrently in a second request
+
+Only the last chunks are embedded after the stream ends, so ingestion takes
+little longer than the extraction call alone.
+"""
+
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from config.settings import CHUNK_MAX_TOKENS, EMBEDDING_BATCH_SIZE
+from src.models import KnowledgeChunk
+from src.pdf_processing.chunker import StructureAwareChunker, StructuredChunk
+
+
+class StreamingIngestor:
+    """Ingest one document with extraction, chunking and embedding overlapped"""
+
+    def __init__(self, pdf_extractor, vector_store, max_tokens: int = CHUNK_MAX_TOKENS,
+                 batch_size: int = EMBEDDING_BATCH_SIZE):
+        """
+        Initialize the ingestor
+
+        Args:
+            pdf_extractor: PDFExtractor
+            vector_store: VectorStore or RemoteVectorStore
+            max_tokens: Token budget per chunk
+            batch_size: Maximum chunks per embedding request
+        """
+        from src.rag_system.embeddings import EmbeddingGenerator
+
+        self.pdf_extractor = pdf_extractor
+        self.vector_store = vector_store
+        self.embedder = EmbeddingGenerator()
+        self.chunker = StructureAwareChunker(max_tokens=max_tokens)
+        self.batch_size = batch_size
+
+    def _embed_worker(self, chunks: "queue.Queue[Optional[StructuredChunk]]",
+                      embedded: List[tuple], errors: List[Exception]):
+        """Embed queued chunks in batches until the None sentinel arrives"""
+        done = False
+        while not done:
+            batch = [chunks.get()]
+            # Whatever queued up during the last request goes into this one
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(chunks.get_nowait())
+                except queue.Empty:
+                    break
+            if batch[-1] is None:
+                batch.pop()
+                done = True
+            if not batch or errors:
+                continue
+            try:
+                embeddings = self.embedder.generate_embeddings_batch(
+                    [chunk.content for chunk in batch],
+                    task_type="retrieval_document"
+                )
+                embedded.extend(zip(batch, embeddings))
+            except Exception as e:
+                errors.append(e)
+
+    def ingest(self, pdf_path: str, extract_insights: bool = True, text_first: Optional[bool] = None) -> Dict:
+        """
+        Extract, chunk, embed and store one example document
+
+        Args:
+            pdf_path: Path to PDF
+            extract_insights: Whether to extract document-type-specific insights
+            text_first: Read content from the PDF's text layer where usable (default: TEXT_LAYER_FIRST setting)
+
+        Returns:
+            Same dictionary as process_br18_example, plus "extraction_seconds" and "total_seconds"
+        """
+        print(f"\n{'='*80}")
+        print(f"📄 Streaming ingestion: {Path(pdf_path).name}")
+        print(f"{'='*80}\n")
+        started = time.perf_counter()
+
+        chunk_queue: "queue.Queue[Optional[StructuredChunk]]" = queue.Queue()
+        embedded: List[tuple] = []
+        errors: List[Exception] = []
+        embed_thread = threading.Thread(
+            target=self._embed_worker, args=(chunk_queue, embedded, errors), daemon=True
+        )
+        embed_thread.start()
+
+        with ThreadPoolExecutor(max_workers=1) as background:
+            analysis = background.submit(self.pdf_extractor.analyze_document, pdf_path, extract_insights)
+
+            pieces: List[str] = []
+
+            def content_pieces():
+                for piece in self.pdf_extractor.stream_content(pdf_path, text_first=text_first):
+                    pieces.append(piece)
+                    yield piece
+
+            chunks: List[StructuredChunk] = []
+            try:
+                for chunk in self.chunker.chunk_stream(content_pieces()):
+                    chunks.append(chunk)
+                    chunk_queue.put(chunk)
+            finally:
+                chunk_queue.put(None)
+            extraction_seconds = time.perf_counter() - started
+            content = "".join(pieces)
+            print(f"✅ Extracted {len(content)} characters in {extraction_seconds:.1f}s, {len(chunks)} chunks")
+
+            metadata, insights = analysis.result()
+            print(f"✅ Metadata extracted: {metadata.get('document_type', 'Unknown type')}")
+
+        embed_thread.join()
+        if errors:
+            raise errors[0]
+
+        knowledge_chunks = []
+        for structured_chunk, embedding in embedded:
+            chunk_metadata = {**metadata, **structured_chunk.chunk_metadata()}
+            if insights:
+                chunk_metadata['insights'] = insights
+            knowledge_chunks.append(KnowledgeChunk(
+                chunk_id=str(uuid.uuid4()),
+                source_type="approved_doc",
+                source_reference=Path(pdf_path).name,
+                municipality=metadata.get('municipality'),
+                document_type=metadata.get('document_type'),
+                content=structured_chunk.content,
+                metadata=chunk_metadata,
+                embedding=embedding
+            ))
+        if knowledge_chunks:
+            self.vector_store.add_chunks_batch(knowledge_chunks)
+
+        if self.pdf_extractor.debug_writer:
+            self.pdf_extractor.debug_writer.submit(pdf_path, content, metadata, chunks, insights)
+
+        total_seconds = time.perf_counter() - started
+        print(f"✅ Ingested {Path(pdf_path).name} in {total_seconds:.1f}s "
+              f"(extraction {extraction_seconds:.1f}s)\n")
+        return {
+            "pdf_path": pdf_path,
+            "content": content,
+            "metadata": metadata,
+            "insights": insights,
+            "chunks": chunks,
+            "chunk_count": len(chunks),
+            "extraction_seconds": extraction_seconds,
+            "total_seconds": total_seconds
+        }
@@ -1,32 +1,68 @@
 import chromadb
 from chromadb.config import Settings
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Sequence, Tuple
 from pathlib import Path
+from datetime import datetime
 import json
+import numpy as np
 from config.settings import (
     KNOWLEDGE_BASE_DIR,
-    TOP_K_RETRIEVAL
+    TOP_K_RETRIEVAL,
+    DEDUP_SOURCE_TYPES,
+    DEDUP_SIMILARITY_THRESHOLD,
+    CHROMA_SERVER_HOST,
+    CHROMA_SERVER_PORT,
+    QUERY_TIME_CONFIDENCE
 )
-from src.models import KnowledgeChunk
+from src.models import KnowledgeChunk, DocumentType
+from src.learning_engine.confidence_scorer import ConfidenceScorer
 from .embeddings import EmbeddingGenerator
+from .dedup import MinHashIndex
+
+# Result projections accepted by the search/get methods (include=...)
+INCLUDE_CONTENT = "content"
+INCLUDE_METADATA = "metadata"
+INCLUDE_EMBEDDINGS = "embeddings"
+DEFAULT_INCLUDE = (INCLUDE_CONTENT, INCLUDE_METADATA)
+
+_CHROMA_FIELDS = {
+    INCLUDE_CONTENT: "documents",
+    INCLUDE_METADATA: "metadatas",
+    INCLUDE_EMBEDDINGS: "embeddings"
+}
+_DOCUMENT_TYPES = {doc_type.value: doc_type for doc_type in DocumentType}
 
 class VectorStore:
     """Vector database using Chroma for similarity search with continuous learning support"""
 
     def __init__(self, collection_name: str = "br18_knowledge"):
-        # Ensure the knowledge base directory exists
-        KNOWLEDGE_BASE_DIR.mkdir(parents=True, exist_ok=True)
-
         self.embedding_generator = EmbeddingGenerator()
-
-        # Initialize Chroma client with persistent storage
-        self.client = chromadb.PersistentClient(
-            path=str(KNOWLEDGE_BASE_DIR),
-            settings=Settings(
-                anonymized_telemetry=False,
-                allow_reset=True
+        self.confidence_scorer = ConfidenceScorer()
+
+        if CHROMA_SERVER_HOST:
+            # Local Chroma server - safe for several processes sharing one knowledge base
+            self.persist_directory = None
+            self.client = chromadb.HttpClient(
+                host=CHROMA_SERVER_HOST,
+                port=CHROMA_SERVER_PORT,
+                settings=Settings(
+                    anonymized_telemetry=False,
+                    allow_reset=True
+                )
+            )
+        else:
+            # Ensure the knowledge base directory exists
+            KNOWLEDGE_BASE_DIR.mkdir(parents=True, exist_ok=True)
+            self.persist_directory = KNOWLEDGE_BASE_DIR
+
+            # Initialize Chroma client with persistent storage (single process only)
+            self.client = chromadb.PersistentClient(
+                path=str(KNOWLEDGE_BASE_DIR),
+                settings=Settings(
+                    anonymized_telemetry=False,
+                    allow_reset=True
+                )
             )
-        )
 
         # Get or create collection
         self.collection = self.client.get_or_create_collection(
@@ -34,27 +70,19 @@ class VectorStore:
             metadata={"description": "BR18 fire safety document knowledge base"}
         )
 
-        print(f"Chroma collection '{collection_name}' initialized with {self.collection.count()} existing chunks")
-
-    def add_chunk(self, chunk: KnowledgeChunk):
-        """
-        Add a knowledge chunk to the vector store
+        # Near-duplicate index for feedback/insight chunks (built on first insert)
+        self._dedup_index: Optional[MinHashIndex] = None
 
-        Args:
-            chunk: Knowledge chunk with content
-        """
-        # Generate embedding if not already present
-        if chunk.embedding is None:
-            chunk.embedding = self.embedding_generator.generate_embedding(
-                chunk.content,
-                task_type="retrieval_document"
-            )
+        print(f"Chroma collection '{collection_name}' initialized with {self.collection.count()} existing chunks")
 
+    def _prepare_metadata(self, chunk: KnowledgeChunk, ingested_at: str) -> Dict:
+        """Flatten chunk fields and metadata into a Chroma metadata dict"""
         # Prepare metadata (Chroma doesn't support nested dicts, so flatten)
         metadata = {
             "source_type": chunk.source_type,
             "source_reference": chunk.source_reference,
-            "created_at": chunk.created_at.isoformat()
+            "created_at": chunk.created_at.isoformat(),
+            "ingested_at": ingested_at  # Shared by every chunk of one insert (used by compaction)
         }
 
         if chunk.municipality:
@@ -73,93 +101,198 @@ class VectorStore:
         for key, value in chunk.metadata.items():
             if isinstance(value, (str, int, float, bool)):
                 metadata[f"meta_{key}"] = value
-            elif isinstance(value, dict):
-                # JSON-serialize dict values (e.g., confidence_breakdown)
+            elif isinstance(value, (dict, list)):
+                # JSON-serialize dict and list values (e.g., confidence_breakdown, heading_path)
                 metadata[f"meta_{key}"] = json.dumps(value)
 
-        # Add to Chroma
-        self.collection.add(
-            ids=[chunk.chunk_id],
-            embeddings=[chunk.embedding],
-            documents=[chunk.content],
-            metadatas=[metadata]
-        )
+        return metadata
+
+    @staticmethod
+    def _dedup_scope(source_type, approval_status, municipality, document_type) -> tuple:
+        """Chunks are only merged with chunks that share this scope"""
+        if hasattr(document_type, 'value'):
+            document_type = document_type.value
+        return (source_type, approval_status or "unknown", municipality, document_type)
+
+    def _get_dedup_index(self) -> MinHashIndex:
+        """Lazily build the near-duplicate index from the chunks already stored"""
+        if self._dedup_index is None:
+            self._dedup_index = MinHashIndex(threshold=DEDUP_SIMILARITY_THRESHOLD)
+            results = self.collection.get(
+                where={"source_type": {"$in": list(DEDUP_SOURCE_TYPES)}},
+                include=["documents", "metadatas"]
+            )
+            for chunk_id, document, metadata in zip(results['ids'], results['documents'], results['metadatas']):
+                scope = self._dedup_scope(
+                    metadata.get('source_type'),
+                    metadata.get('approval_status'),
+                    metadata.get('municipality'),
+                    metadata.get('document_type')
+                )
+                self._dedup_index.add(chunk_id, document, scope)
+        return self._dedup_index
 
-    def add_chunks_batch(self, chunks: List[KnowledgeChunk]):
+    def _split_near_duplicates(self, chunks: List[KnowledgeChunk]) -> Tuple[List[KnowledgeChunk], Dict[str, int]]:
         """
-        Add multiple knowledge chunks efficiently
+        Separate near-duplicate feedback/insight chunks from new ones
+
+        Duplicates within the batch are folded into the first occurrence (a copy
+        with a higher confirmation_count; the caller's chunks are left unchanged).
+        Duplicates of stored chunks are returned as confirmations, which callers
+        apply with _record_confirmations() once the new chunks are stored, so a
+        retried write never counts them twice. New chunks are indexed right away
+        (so later chunks of the batch match them); callers remove them with
+        _unindex() if storing them fails.
 
         Args:
-            chunks: List of knowledge chunks
+            chunks: Chunks about to be inserted
+
+        Returns:
+            (chunks that still need to be inserted, stored chunk_id -> new confirmations)
         """
-        if not chunks:
+        index = None
+        new_chunks = []
+        batch_counts = {}
+        confirmations = {}
+
+        for chunk in chunks:
+            if chunk.source_type not in DEDUP_SOURCE_TYPES:
+                new_chunks.append(chunk)
+                continue
+
+            index = index or self._get_dedup_index()
+            scope = self._dedup_scope(
+                chunk.source_type,
+                chunk.metadata.get("approval_status"),
+                chunk.municipality,
+                chunk.document_type
+            )
+            signature = index.signature(chunk.content)
+            duplicate_id = index.query(signature, scope)
+
+            if duplicate_id is None:
+                index.add(chunk.chunk_id, chunk.content, scope, signature=signature)
+                batch_counts[chunk.chunk_id] = 0
+                new_chunks.append(chunk)
+            elif duplicate_id in batch_counts:
+                batch_counts[duplicate_id] += 1
+            else:
+                confirmations[duplicate_id] = confirmations.get(duplicate_id, 0) + 1
+
+        new_chunks = [
+            chunk.model_copy(update={"metadata": {
+                **chunk.metadata,
+                "confirmation_count": chunk.metadata.get("confirmation_count", 0) + batch_counts[chunk.chunk_id]
+            }}) if batch_counts.get(chunk.chunk_id) else chunk
+            for chunk in new_chunks
+        ]
+        return new_chunks, confirmations
+
+    def _unindex(self, chunks: List[KnowledgeChunk]):
+        """Drop chunks that were never stored from the near-duplicate index"""
+        if self._dedup_index is not None:
+            for chunk in chunks:
+                self._dedup_index.remove(chunk.chunk_id)
+
+    def _record_confirmations(self, confirmations: Dict[str, int]):
+        """Bump confirmation_count on stored chunks (chunk_id -> number of new confirmations)"""
+        if not confirmations:
             return
+        ids = list(confirmations)
+        existing = self.collection.get(ids=ids, include=["metadatas"])
+        now = datetime.now().isoformat()
+        metadatas = []
+        for chunk_id, metadata in zip(existing['ids'], existing['metadatas']):
+            metadatas.append({
+                "meta_confirmation_count": int(metadata.get("meta_confirmation_count", 0)) + confirmations[chunk_id],
+                "meta_last_confirmed_at": now
+            })
+        if existing['ids']:
+            self.collection.update(ids=existing['ids'], metadatas=metadatas)
+        print(f"Merged {sum(confirmations.values())} near-duplicate chunks into {len(confirmations)} existing chunks")
+
+    def add_chunk(self, chunk: KnowledgeChunk, deduplicate: bool = True):
+        """
+        Add a knowledge chunk to the vector store
 
-        # Generate embeddings for chunks without them
-        texts_to_embed = []
-        chunk_indices = []
+        Args:
+            chunk: Knowledge chunk with content
+            deduplicate: Merge near-duplicate feedback/insight chunks into the existing chunk
+        """
+        confirmations = {}
+        if deduplicate:
+            new_chunks, confirmations = self._split_near_duplicates([chunk])
+            if not new_chunks:
+                self._record_confirmations(confirmations)
+                return
 
-        for i, chunk in enumerate(chunks):
+        try:
+            # Generate embedding if not already present
             if chunk.embedding is None:
-                texts_to_embed.append(chunk.content)
-                chunk_indices.append(i)
+                chunk.embedding = self.embedding_generator.generate_embedding(
+                    chunk.content,
+                    task_type="retrieval_document"
+                )
 
-        if texts_to_embed:
-            embeddings = self.embedding_generator.generate_embeddings_batch(
-                texts_to_embed,
-                task_type="retrieval_document"
+            # Add to Chroma
+            self.collection.add(
+                ids=[chunk.chunk_id],
+                embeddings=[chunk.embedding],
+                documents=[chunk.content],
+                metadatas=[self._prepare_metadata(chunk, datetime.now().isoformat())]
             )
-            for chunk_idx, embedding in zip(chunk_indices, embeddings):
-                chunks[chunk_idx].embedding = embedding
+        except Exception:
+            self._unindex([chunk])
+            raise
+        self._record_confirmations(confirmations)
 
-        # Prepare batch data
-        ids = []
-        embeddings = []
-        documents = []
-        metadatas = []
+    def add_chunks_batch(self, chunks: List[KnowledgeChunk], deduplicate: bool = True):
+        """
+        Add multiple knowledge chunks efficiently
 
-        for chunk in chunks:
-            ids.append(chunk.chunk_id)
-            embeddings.append(chunk.embedding)
-            documents.append(chunk.content)
-
-            # Prepare metadata
-            metadata = {
-                "source_type": chunk.source_type,
-                "source_reference": chunk.source_reference,
-                "created_at": chunk.created_at.isoformat()
-            }
+        Args:
+            chunks: List of knowledge chunks
+            deduplicate: Merge near-duplicate feedback/insight chunks into the existing chunk
+        """
+        confirmations = {}
+        if deduplicate:
+            chunks, confirmations = self._split_near_duplicates(chunks)
 
-            if chunk.municipality:
-                metadata["municipality"] = chunk.municipality
-            if chunk.document_type:
-                metadata["document_type"] = chunk.document_type.value if hasattr(chunk.document_type, 'value') else str(chunk.document_type)
-
-            # Add confidence score and approval status
-            confidence_score = chunk.metadata.get("confidence_score", 1.0)
-            approval_status = chunk.metadata.get("approval_status", "unknown")
-
-            metadata["confidence_score"] = float(confidence_score)
-            metadata["approval_status"] = approval_status
-
-            # Add additional metadata fields
-            for key, value in chunk.metadata.items():
-                if isinstance(value, (str, int, float, bool)):
-                    metadata[f"meta_{key}"] = value
-                elif isinstance(value, dict):
-                    # JSON-serialize dict values (e.g., confidence_breakdown)
-                    metadata[f"meta_{key}"] = json.dumps(value)
-
-            metadatas.append(metadata)
-
-        # Batch add to Chroma
-        self.collection.add(
-            ids=ids,
-            embeddings=embeddings,
-            documents=documents,
-            metadatas=metadatas
-        )
+        if not chunks:
+            self._record_confirmations(confirmations)
+            return
+
+        try:
+            # Generate embeddings for chunks without them
+            texts_to_embed = []
+            chunk_indices = []
+
+            for i, chunk in enumerate(chunks):
+                if chunk.embedding is None:
+                    texts_to_embed.append(chunk.content)
+                    chunk_indices.append(i)
+
+            if texts_to_embed:
+                embeddings = self.embedding_generator.generate_embeddings_batch(
+                    texts_to_embed,
+                    task_type="retrieval_document"
+                )
+                for chunk_idx, embedding in zip(chunk_indices, embeddings):
+                    chunks[chunk_idx].embedding = embedding
+
+            # Batch add to Chroma
+            ingested_at = datetime.now().isoformat()
+            self.collection.add(
+                ids=[chunk.chunk_id for chunk in chunks],
+                embeddings=[chunk.embedding for chunk in chunks],
+                documents=[chunk.content for chunk in chunks],
+                metadatas=[self._prepare_metadata(chunk, ingested_at) for chunk in chunks]
+            )
+        except Exception:
+            self._unindex(chunks)
+            raise
 
+        self._record_confirmations(confirmations)
         print(f"Added {len(chunks)} chunks to vector store (total: {self.collection.count()})")
 
     def search_with_confidence(
@@ -169,7 +302,8 @@ class VectorStore:
         municipality: Optional[str] = None,
         document_type: Optional[str] = None,
         exclude_rejected: bool = True,
-        prioritize_approved: bool = True
+        prioritize_approved: bool = True,
+        include: Sequence[str] = DEFAULT_INCLUDE
     ) -> List[KnowledgeChunk]:
         """
         Search for similar chunks with confidence-based ranking (Del 2: Golden Records)
@@ -181,6 +315,7 @@ class VectorStore:
             document_type: Filter by document type (optional)
             exclude_rejected: Exclude chunks from rejected documents
             prioritize_approved: Boost ranking of approved documents
+            include: Result projection ("content", "metadata", "embeddings")
 
         Returns:
             List of similar knowledge chunks, sorted by confidence-weighted similarity
@@ -192,66 +327,64 @@ class VectorStore:
         )
 
         # Build where filter for Chroma
-        where_filter = {}
-        if municipality:
-            where_filter["municipality"] = municipality
-        if document_type:
-            where_filter["document_type"] = document_type
-        if exclude_rejected:
-            where_filter["approval_status"] = {"$ne": "rejected"}  # Exclude rejected
+        where_filter = self._build_where(
+            municipality=municipality,
+            document_type=document_type,
+            approval_status={"$ne": "rejected"} if exclude_rejected else None  # Exclude rejected
+        )
 
         # Query more results than needed (to allow re-ranking)
         query_count = top_k * 3 if prioritize_approved else top_k
+        collection_count = self.collection.count()
 
-        # Query Chroma
+        # Query Chroma (metadata is always fetched - ranking needs confidence_score)
         results = self.collection.query(
             query_embeddings=[query_embedding],
-            n_results=min(query_count, self.collection.count()) if self.collection.count() > 0 else top_k,
-            where=where_filter if where_filter else None
+            n_results=min(query_count, collection_count) if collection_count > 0 else top_k,
+            where=where_filter,
+            include=self._chroma_include(include, INCLUDE_METADATA)
         )
+        rows = self._result_rows(results, nested=True)
 
-        # Convert results to KnowledgeChunk objects
-        chunks = []
-        if results['ids'] and results['ids'][0]:
-            for i, chunk_id in enumerate(results['ids'][0]):
-                metadata = results['metadatas'][0][i]
-
-                # Reconstruct metadata dict from flattened format
-                chunk_metadata = {}
-                for key, value in metadata.items():
-                    if key.startswith('meta_'):
-                        chunk_metadata[key[5:]] = value
-
-                # Add confidence score and approval status to chunk metadata
-                chunk_metadata["confidence_score"] = metadata.get("confidence_score", 1.0)
-                chunk_metadata["approval_status"] = metadata.get("approval_status", "unknown")
-
-                chunk = KnowledgeChunk(
-                    chunk_id=chunk_id,
-                    source_type=metadata['source_type'],
-                    source_reference=metadata['source_reference'],
-                    municipality=metadata.get('municipality'),
-                    document_type=metadata.get('document_type'),
-                    content=results['documents'][0][i],
-                    metadata=chunk_metadata,
-                    embedding=results['embeddings'][0][i] if results['embeddings'] else None
-                )
-                chunks.append(chunk)
-
-        # Re-rank by confidence if prioritizing approved documents
-        if prioritize_approved and chunks:
-            # Sort by confidence_score (descending)
-            chunks.sort(key=lambda c: c.metadata.get("confidence_score", 1.0), reverse=True)
+        # Re-rank by confidence on the raw rows, so only the top K get decoded
+        order = range(len(rows["ids"]))
+        effective = self._effective_confidences(rows["metadatas"])
+        if prioritize_approved:
+            order = sorted(order, key=lambda i: effective[i], reverse=True)
 
         # Return top K after re-ranking
-        return chunks[:top_k]
+        return self._decode_rows(rows, include, indices=list(order)[:top_k], effective_confidences=effective)
+
+    def _effective_confidences(self, metadatas: List[Dict]) -> List[float]:
+        """
+        Query-time confidence for a candidate set: stored confidence_score adjusted
+        for confirmations and age (ConfidenceScorer.calculate_updated_confidence),
+        vectorized and without writing anything back. Rejected chunks stay at 0.0.
+        """
+        stored = [metadata.get("confidence_score", 1.0) for metadata in metadatas]
+        if not QUERY_TIME_CONFIDENCE or not metadatas:
+            return stored
+
+        now = np.datetime64(datetime.now(), "us")
+        created = np.array(
+            [metadata.get("created_at") or now for metadata in metadatas],
+            dtype="datetime64[us]"
+        )
+        age_days = (now - created) / np.timedelta64(1, "D")
+        confirmations = [int(metadata.get("meta_confirmation_count", 0)) for metadata in metadatas]
+
+        effective = self.confidence_scorer.calculate_updated_confidence_batch(stored, confirmations, age_days)
+        rejected = np.array([metadata.get("approval_status") == "rejected" for metadata in metadatas])
+        effective[rejected] = 0.0
+        return effective.tolist()
 
     def search(
         self,
         query: str,
         top_k: int = TOP_K_RETRIEVAL,
         municipality: Optional[str] = None,
-        document_type: Optional[str] = None
+        document_type: Optional[str] = None,
+        include: Sequence[str] = DEFAULT_INCLUDE
     ) -> List[KnowledgeChunk]:
         """
         Search for similar chunks with optional filtering
@@ -261,6 +394,7 @@ class VectorStore:
             top_k: Number of results to return
             municipality: Filter by municipality (optional)
             document_type: Filter by document type (optional)
+            include: Result projection ("content", "metadata", "embeddings")
 
         Returns:
             List of similar knowledge chunks
@@ -271,47 +405,15 @@ class VectorStore:
             task_type="retrieval_query"
         )
 
-        # Build where filter for Chroma
-        where_filter = None
-        if municipality or document_type:
-            where_filter = {}
-            if municipality:
-                where_filter["municipality"] = municipality
-            if document_type:
-                where_filter["document_type"] = document_type
-
         # Query Chroma
         results = self.collection.query(
             query_embeddings=[query_embedding],
             n_results=top_k,
-            where=where_filter if where_filter else None
+            where=self._build_where(municipality=municipality, document_type=document_type),
+            include=self._chroma_include(include)
         )
 
-        # Convert results to KnowledgeChunk objects
-        chunks = []
-        if results['ids'] and results['ids'][0]:
-            for i, chunk_id in enumerate(results['ids'][0]):
-                metadata = results['metadatas'][0][i]
-
-                # Reconstruct metadata dict from flattened format
-                chunk_metadata = {}
-                for key, value in metadata.items():
-                    if key.startswith('meta_'):
-                        chunk_metadata[key[5:]] = value
-
-                chunk = KnowledgeChunk(
-                    chunk_id=chunk_id,
-                    source_type=metadata['source_type'],
-                    source_reference=metadata['source_reference'],
-                    municipality=metadata.get('municipality'),
-                    document_type=metadata.get('document_type'),
-                    content=results['documents'][0][i],
-                    metadata=chunk_metadata,
-                    embedding=results['embeddings'][0][i] if results['embeddings'] else None
-                )
-                chunks.append(chunk)
-
-        return chunks
+        return self._decode_rows(self._result_rows(results, nested=True), include)
 
     def retrieve_context(
         self,
@@ -332,9 +434,139 @@ class VectorStore:
         Returns:
             List of context strings
         """
-        chunks = self.search(query, top_k, municipality, document_type)
+        chunks = self.search(query, top_k, municipality, document_type, include=(INCLUDE_CONTENT,))
         return [chunk.content for chunk in chunks]
 
+    @staticmethod
+    def _build_where(**conditions) -> Optional[Dict]:
+        """
+        Build a Chroma where filter from keyword conditions, skipping None values
+
+        Chroma only accepts a single condition per dict, so several conditions
+        are combined with $and.
+        """
+        clauses = [{key: value} for key, value in conditions.items() if value is not None]
+        if not clauses:
+            return None
+        if len(clauses) == 1:
+            return clauses[0]
+        return {"$and": clauses}
+
+    @staticmethod
+    def _chroma_include(include: Sequence[str], *required: str) -> List[str]:
+        """Map a result projection (plus fields needed internally) to Chroma's include list"""
+        fields = set(include) | set(required) | {INCLUDE_CONTENT}
+        unknown = fields - set(_CHROMA_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown include projection(s): {sorted(unknown)}")
+        return [_CHROMA_FIELDS[field] for field in (INCLUDE_CONTENT, INCLUDE_METADATA, INCLUDE_EMBEDDINGS) if field in fields]
+
+    @staticmethod
+    def _result_rows(results: Dict, nested: bool = False) -> Dict:
+        """
+        Normalize Chroma query (nested per query) and get (flat) results to flat row lists
+        """
+        rows = {}
+        for key in ("ids", "documents", "metadatas", "embeddings"):
+            values = results.get(key)
+            if nested and values is not None:
+                values = values[0] if len(values) else []
+            rows[key] = values
+        if rows["ids"] is None:
+            rows["ids"] = []
+        return rows
+
+    @staticmethod
+    def _decode_rows(
+        rows: Dict,
+        include: Sequence[str] = DEFAULT_INCLUDE,
+        indices: Optional[List[int]] = None,
+        default_confidence: float = 1.0,
+        default_approval_status: str = "unknown",
+        effective_confidences: Optional[List[float]] = None
+    ) -> List[KnowledgeChunk]:
+        """
+        Decode Chroma rows into KnowledgeChunk objects for the requested projection
+
+        Rows come from our own collection and were validated on insert, so chunks
+        are built with model_construct (no pydantic validation). Content-only rows
+        carry just chunk_id and content; metadata is un-flattened and parsed only
+        when "metadata" is projected, and embeddings only when "embeddings" is.
+
+        Args:
+            rows: Flat row lists from _result_rows
+            include: Result projection ("content", "metadata", "embeddings")
+            indices: Row indices to decode, in output order (default: all rows)
+            default_confidence: confidence_score for rows without one
+            default_approval_status: approval_status for rows without one
+            effective_confidences: Query-time confidence per row (stored as effective_confidence)
+
+        Returns:
+            List of knowledge chunks
+        """
+        ids = rows["ids"]
+        documents = rows["documents"]
+        metadatas = rows["metadatas"] if INCLUDE_METADATA in include else None
+        embeddings = rows["embeddings"] if INCLUDE_EMBEDDINGS in include else None
+        if indices is None:
+            indices = range(len(ids))
+
+        construct = KnowledgeChunk.model_construct
+        chunks = []
+        for i in indices:
+            embedding = None
+            if embeddings is not None:
+                embedding = embeddings[i]
+                if hasattr(embedding, "tolist"):
+                    embedding = embedding.tolist()
+
+            if metadatas is None:
+                chunks.append(construct(
+                    chunk_id=ids[i],
+                    source_type=None,
+                    source_reference=None,
+                    content=documents[i],
+                    embedding=embedding
+                ))
+                continue
+
+            metadata = metadatas[i] or {}
+
+            # Reconstruct metadata dict from flattened format
+            chunk_metadata = {}
+            for key, value in metadata.items():
+                if key.startswith("meta_"):
+                    # JSON-deserialize values that look like JSON (e.g., confidence_breakdown)
+                    if isinstance(value, str) and value[:1] in ("{", "["):
+                        try:
+                            value = json.loads(value)
+                        except json.JSONDecodeError:
+                            pass
+                    chunk_metadata[key[5:]] = value
+
+            # Add confidence score and approval status to chunk metadata
+            chunk_metadata["confidence_score"] = metadata.get("confidence_score", default_confidence)
+            chunk_metadata["approval_status"] = metadata.get("approval_status", default_approval_status)
+            if effective_confidences is not None:
+                chunk_metadata["effective_confidence"] = round(float(effective_confidences[i]), 4)
+
+            created_at = metadata.get("created_at")
+            extra = {"created_at": datetime.fromisoformat(created_at)} if created_at else {}
+
+            chunks.append(construct(
+                chunk_id=ids[i],
+                source_type=metadata.get("source_type"),
+                source_reference=metadata.get("source_reference"),
+                municipality=metadata.get("municipality"),
+                document_type=_DOCUMENT_TYPES.get(metadata.get("document_type")),
+                content=documents[i],
+                metadata=chunk_metadata,
+                embedding=embedding,
+                **extra
+            ))
+
+        return chunks
+
     def delete_by_source(self, source_reference: str, source_type: Optional[str] = None):
         """
         Delete all chunks from a specific source (e.g., old BR18 regulation)
@@ -364,6 +596,7 @@ class VectorStore:
             if results['ids']:
                 # Delete the chunks
                 self.collection.delete(ids=results['ids'])
+                self._dedup_index = None
                 print(f"✅ Deleted {len(results['ids'])} chunks from {source_reference}")
                 return len(results['ids'])
             else:
@@ -373,6 +606,39 @@ class VectorStore:
             print(f"⚠️  Error deleting chunks: {e}")
             return 0
 
+    def get_source_metadata(self, source_reference: str, source_type: Optional[str] = None) -> Dict[str, Dict]:
+        """
+        Stored metadata of every chunk from one source (no documents or embeddings)
+
+        Args:
+            source_reference: Source file (e.g., "BR18.pdf")
+            source_type: Optional source type filter (e.g., "regulation")
+
+        Returns:
+            Chunk id -> flattened Chroma metadata
+        """
+        conditions = {"source_reference": source_reference}
+        if source_type:
+            conditions["source_type"] = source_type
+        results = self.collection.get(where=self._build_where(**conditions), include=["metadatas"])
+        return dict(zip(results['ids'], (metadata or {} for metadata in results['metadatas'])))
+
+    def delete_chunks(self, chunk_ids: List[str]) -> int:
+        """
+        Delete chunks by id
+
+        Args:
+            chunk_ids: Ids to delete
+
+        Returns:
+            Number of ids deleted
+        """
+        if not chunk_ids:
+            return 0
+        self.collection.delete(ids=list(chunk_ids))
+        self._dedup_index = None
+        return len(chunk_ids)
+
     def clear(self):
         """Clear all data from the vector store (useful for clean runs)"""
         # Delete and recreate the collection
@@ -386,12 +652,14 @@ class VectorStore:
             name=self.collection.name,
             metadata={"description": "BR18 fire safety document knowledge base"}
         )
+        self._dedup_index = None
         print("Vector store cleared - ready for fresh data")
 
     def get_negative_constraints(
         self,
         municipality: Optional[str] = None,
-        document_type: Optional[str] = None
+        document_type: Optional[str] = None,
+        include: Sequence[str] = DEFAULT_INCLUDE
     ) -> List[KnowledgeChunk]:
         """
         Get rejected patterns to avoid (Del 2: Negative Constraints)
@@ -399,59 +667,33 @@ class VectorStore:
         Args:
             municipality: Filter by municipality
             document_type: Filter by document type
+            include: Result projection ("content", "metadata", "embeddings")
 
         Returns:
             List of rejected knowledge chunks (what NOT to do)
         """
-        where_filter = {"approval_status": "rejected"}
-
-        if municipality:
-            where_filter["municipality"] = municipality
-        if document_type:
-            where_filter["document_type"] = document_type
+        where_filter = self._build_where(
+            approval_status="rejected",
+            municipality=municipality,
+            document_type=document_type
+        )
 
         # Get all rejected chunks
-        results = self.collection.get(where=where_filter)
-
-        chunks = []
-        if results['ids']:
-            for i, chunk_id in enumerate(results['ids']):
-                metadata = results['metadatas'][i]
-
-                chunk_metadata = {}
-                for key, value in metadata.items():
-                    if key.startswith('meta_'):
-                        actual_key = key[5:]
-                        # Try to JSON-deserialize if it looks like JSON
-                        if isinstance(value, str) and (value.startswith('{') or value.startswith('[')):
-                            try:
-                                chunk_metadata[actual_key] = json.loads(value)
-                            except json.JSONDecodeError:
-                                chunk_metadata[actual_key] = value
-                        else:
-                            chunk_metadata[actual_key] = value
-
-                chunk_metadata["confidence_score"] = metadata.get("confidence_score", 0.0)
-                chunk_metadata["approval_status"] = metadata.get("approval_status", "rejected")
-
-                chunk = KnowledgeChunk(
-                    chunk_id=chunk_id,
-                    source_type=metadata['source_type'],
-                    source_reference=metadata['source_reference'],
-                    municipality=metadata.get('municipality'),
-                    document_type=metadata.get('document_type'),
-                    content=results['documents'][i],
-                    metadata=chunk_metadata
-                )
-                chunks.append(chunk)
+        results = self.collection.get(where=where_filter, include=self._chroma_include(include))
 
-        return chunks
+        return self._decode_rows(
+            self._result_rows(results),
+            include,
+            default_confidence=0.0,
+            default_approval_status="rejected"
+        )
 
     def get_golden_records(
         self,
         municipality: Optional[str] = None,
         document_type: Optional[str] = None,
-        min_confidence: float = 0.8
+        min_confidence: float = 0.8,
+        include: Sequence[str] = DEFAULT_INCLUDE
     ) -> List[KnowledgeChunk]:
         """
         Get approved high-confidence patterns (Del 2: Golden Records)
@@ -459,61 +701,43 @@ class VectorStore:
         Args:
             municipality: Filter by municipality
             document_type: Filter by document type
-            min_confidence: Minimum confidence score
+            min_confidence: Minimum stored confidence score
+            include: Result projection ("content", "metadata", "embeddings")
 
         Returns:
-            List of high-confidence approved chunks (best practices)
+            List of high-confidence approved chunks (best practices), ordered by
+            query-time (decayed and boosted) confidence
         """
         # Build filter - only filter by approval_status in ChromaDB
-        where_filter = {"approval_status": "approved"}
-
-        if municipality:
-            where_filter["municipality"] = municipality
-        if document_type:
-            where_filter["document_type"] = document_type
+        where_filter = self._build_where(
+            approval_status="approved",
+            municipality=municipality,
+            document_type=document_type
+        )
 
         # Get all approved chunks (filter by confidence in Python)
-        results = self.collection.get(where=where_filter)
-
-        chunks = []
-        if results['ids']:
-            for i, chunk_id in enumerate(results['ids']):
-                metadata = results['metadatas'][i]
-
-                chunk_metadata = {}
-                for key, value in metadata.items():
-                    if key.startswith('meta_'):
-                        actual_key = key[5:]
-                        # Try to JSON-deserialize if it looks like JSON
-                        if isinstance(value, str) and (value.startswith('{') or value.startswith('[')):
-                            try:
-                                chunk_metadata[actual_key] = json.loads(value)
-                            except json.JSONDecodeError:
-                                chunk_metadata[actual_key] = value
-                        else:
-                            chunk_metadata[actual_key] = value
-
-                chunk_metadata["confidence_score"] = metadata.get("confidence_score", 1.0)
-                chunk_metadata["approval_status"] = metadata.get("approval_status", "approved")
-
-                # Filter by confidence in Python
-                confidence = metadata.get("confidence_score", 1.0)
-                if confidence >= min_confidence:
-                    chunk = KnowledgeChunk(
-                        chunk_id=chunk_id,
-                        source_type=metadata['source_type'],
-                        source_reference=metadata['source_reference'],
-                        municipality=metadata.get('municipality'),
-                        document_type=metadata.get('document_type'),
-                        content=results['documents'][i],
-                        metadata=chunk_metadata
-                    )
-                    chunks.append(chunk)
-
-        # Sort by confidence (highest first)
-        chunks.sort(key=lambda c: c.metadata.get("confidence_score", 0.0), reverse=True)
-
-        return chunks
+        results = self.collection.get(
+            where=where_filter,
+            include=self._chroma_include(include, INCLUDE_METADATA)
+        )
+        rows = self._result_rows(results)
+
+        # Filter on the stored confidence (as get_stats reports it), then sort by
+        # query-time confidence (highest first) before decoding
+        confidences = self._effective_confidences(rows["metadatas"])
+        indices = [
+            i for i, metadata in enumerate(rows["metadatas"])
+            if metadata.get('confidence_score', 1.0) >= min_confidence
+        ]
+        indices.sort(key=lambda i: confidences[i], reverse=True)
+
+        return self._decode_rows(
+            rows,
+            include,
+            indices=indices,
+            default_approval_status="approved",
+            effective_confidences=confidences
+        )
 
     def get_stats(self) -> Dict:
         """Get statistics about the vector store"""
@@ -0,0 +1,88 @@
+"""
+Rate Limiter - Shared bound on concurrent Gemini requests and requests per minute
+
+Gemini generate requests (document generation, PDF extraction including parallel
+page ranges and streaming ingestion, project parsing and JSON repair) take a slot
+from the same process-wide limiter, so running more work at once never exceeds
+the API quota:
+
+    with get_rate_limiter():
+        response = client.models.generate_content(...)
+
+The limiter is per process: bulk ingestion workers each use share_rate_limiter()
+so that together they stay within the limits. Embedding requests are not limited.
+"""
+
+import threading
+import time
+from typing import Dict
+
+from config.settings import GEMINI_MAX_CONCURRENT_REQUESTS, GEMINI_REQUESTS_PER_MINUTE
+
+_limiters: Dict[str, "RateLimiter"] = {}
+_limiters_lock = threading.Lock()
+
+
+class RateLimiter:
+    """Limit requests in flight and space request starts evenly over each minute"""
+
+    def __init__(self, max_concurrent: int = GEMINI_MAX_CONCURRENT_REQUESTS,
+                 requests_per_minute: int = GEMINI_REQUESTS_PER_MINUTE):
+        """
+        Initialize the limiter
+
+        Args:
+            max_concurrent: Requests in flight at once
+            requests_per_minute: Request starts per minute (0 = unlimited)
+        """
+        self._slots = threading.BoundedSemaphore(max(1, max_concurrent))
+        self._interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self._lock = threading.Lock()
+        self._next_start = 0.0
+
+    def acquire(self):
+        """Wait for a free slot and this request's start time"""
+        self._slots.acquire()
+        if not self._interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self._interval
+        if start > now:
+            time.sleep(start - now)
+
+    def release(self):
+        """Free the slot taken by acquire()"""
+        self._slots.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+def get_rate_limiter(name: str = "gemini") -> RateLimiter:
+    """Process-wide limiter for an API (created with the settings' limits)"""
+    with _limiters_lock:
+        if name not in _limiters:
+            _limiters[name] = RateLimiter()
+        return _limiters[name]
+
+
+def share_rate_limiter(processes: int, name: str = "gemini") -> RateLimiter:
+    """
+    Give this process its share of the settings' limits
+
+    Called in each of `processes` worker processes, so that together they make
+    no more requests than one process would.
+    """
+    processes = max(1, processes)
+    requests_per_minute = GEMINI_REQUESTS_PER_MINUTE
+    if requests_per_minute:
+        requests_per_minute = max(1, requests_per_minute // processes)
+    with _limiters_lock:
+        _limiters[name] = RateLimiter(max(1, GEMINI_MAX_CONCURRENT_REQUESTS // processes), requests_per_minute)
+        return _limiters[name]
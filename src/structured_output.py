@@ -0,0 +1,263 @@
+"""
+Structured Output - Schema-constrained JSON responses with targeted repair
+
+Every JSON-producing Gemini call sends a response_schema built from a pydantic
+model (src/extraction_schemas.py) and validates the response against it. When
+a response still fails, parse_structured() repairs it as cheaply as it can:
+
+- Truncated output (cut off at max_output_tokens) is not repaired: the missing
+  part cannot be recovered, and closing it would pass off a partial result as
+  complete. StructuredOutputError is raised so the caller can fall back.
+- If only some fields of an object response are invalid, the repair request
+  carries just those fields and their errors, so a large valid field (e.g. the
+  document content of CombinedExtraction) is never sent back.
+- Only a response that is not even parseable JSON is sent back whole.
+
+The document itself is never re-sent and the extraction is not re-run.
+"""
+
+import json
+from typing import Any, Callable, Dict, List, Optional
+
+from google.genai import types
+from pydantic import BaseModel, TypeAdapter, ValidationError, create_model
+
+from config.settings import GEMINI_MODEL, JSON_REPAIR_ATTEMPTS
+from src.rate_limiter import get_rate_limiter
+
+REPAIR_PROMPT = """The JSON below does not match the required schema.
+
+Error:
+{error}
+
+Return the corrected JSON. Keep every valid value exactly as it is, fix only what the
+error describes, and use null for values that are missing. Do not add new information.
+
+JSON:
+{response_text}"""
+
+FIELD_REPAIR_PROMPT = """Some fields of a JSON object do not match the required schema.
+
+Errors:
+{error}
+
+Return a JSON object with corrected values for exactly these fields. Keep every valid
+value exactly as it is, fix only what the errors describe, and use null for values that
+are missing. Do not add new information.
+
+Fields:
+{fields}"""
+
+
+class StructuredOutputError(ValueError):
+    """A response that could not be parsed and validated, even after repair"""
+
+    def __init__(self, message: str, raw_response: str):
+        super().__init__(message)
+        self.raw_response = raw_response
+
+
+def json_config(schema: Any, temperature: float = 0.1, **config) -> types.GenerateContentConfig:
+    """
+    Generation config that constrains the response to a schema
+
+    Args:
+        schema: Pydantic model (or List[model]) describing the response
+        temperature: Sampling temperature
+        **config: Further GenerateContentConfig fields (e.g. max_output_tokens)
+
+    Returns:
+        GenerateContentConfig with JSON mime type and response_schema
+    """
+    return types.GenerateContentConfig(
+        temperature=temperature,
+        response_mime_type="application/json",
+        response_schema=schema,
+        **config
+    )
+
+
+def strip_code_fences(text: str) -> str:
+    """Remove a markdown ```json fence around a response"""
+    text = text.strip()
+    if text.startswith("```json"):
+        text = text[7:]
+    if text.startswith("```"):
+        text = text[3:]
+    if text.endswith("```"):
+        text = text[:-3]
+    return text.strip()
+
+
+def close_truncated_json(text: str) -> str:
+    """
+    Close a JSON text that was cut off (e.g. at max_output_tokens)
+
+    Open strings, arrays and objects are closed; a dangling comma, key or colon
+    at the end is dropped. Complete JSON is returned unchanged.
+    """
+    stack: List[str] = []
+    in_string = escaped = False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "[{":
+            stack.append("]" if char == "[" else "}")
+        elif char in "]}" and stack:
+            stack.pop()
+    if not stack and not in_string:
+        return text
+
+    if in_string:
+        text += ("\\" if escaped else "") + '"'
+    text = text.rstrip().rstrip(",:").rstrip()
+    # A key without a value
+    if stack and stack[-1] == "}" and text.endswith('"'):
+        key_start = text.rfind('"', 0, len(text) - 1)
+        if text[:key_start].rstrip().endswith(("{", ",")):
+            text = text[:key_start].rstrip().rstrip(",")
+    return text + "".join(reversed(stack))
+
+
+def _validate(adapter: TypeAdapter, data: Any) -> Any:
+    data = adapter.validate_python(data)
+    return adapter.dump_python(data, mode="json", exclude_none=True)
+
+
+def _load(response_text: str) -> Any:
+    """Parse a response as JSON"""
+    return json.loads(strip_code_fences(response_text))
+
+
+def _is_truncated(text: str) -> bool:
+    """Whether invalid JSON only fails because it was cut off (it parses once closed)"""
+    text = strip_code_fences(text)
+    try:
+        json.loads(text)
+        return False
+    except json.JSONDecodeError:
+        pass
+    try:
+        json.loads(close_truncated_json(text))
+        return True
+    except json.JSONDecodeError:
+        return False
+
+
+def _field_repair(schema: Any, data: Any, error: ValidationError) -> Optional[Dict]:
+    """
+    Failing top-level fields of an object response and a model covering just them
+
+    Returns:
+        {"fields": {name: value}, "model": partial model}, or None if the whole
+        response has to be repaired
+    """
+    if not (isinstance(schema, type) and issubclass(schema, BaseModel) and isinstance(data, dict)):
+        return None
+    names = []
+    for detail in error.errors():
+        name = detail["loc"][0] if detail["loc"] else None
+        if name not in schema.model_fields:
+            return None
+        if name not in names:
+            names.append(name)
+    partial = create_model(
+        f"{schema.__name__}Repair",
+        **{name: (schema.model_fields[name].annotation, schema.model_fields[name]) for name in names}
+    )
+    return {"fields": {name: data.get(name) for name in names}, "model": partial}
+
+
+def _repair_request(client, model: str, prompt: str, schema: Any) -> str:
+    print(f"🔧 Response does not match the schema - repairing JSON (text only, {len(prompt)} chars)")
+    with get_rate_limiter():
+        response = client.models.generate_content(
+            model=model,
+            contents=[prompt],
+            config=json_config(schema, temperature=0.0)
+        )
+    return response.text or ""
+
+
+def parse_structured(
+    client,
+    response_text: Optional[str],
+    schema: Any,
+    model: str = GEMINI_MODEL,
+    repair_attempts: int = JSON_REPAIR_ATTEMPTS,
+    on_repaired: Optional[Callable[[Any], None]] = None
+) -> Any:
+    """
+    Parse and validate a JSON response, repairing it with a text-only request if needed
+
+    Args:
+        client: genai.Client used for repair requests
+        response_text: Raw response text
+        schema: Pydantic model (or List[model]) the response must match
+        model: Model used for repairs
+        repair_attempts: Maximum repair requests
+        on_repaired: Called with the validated data if the response needed repair
+            (e.g. to cache it in place of the invalid response)
+
+    Returns:
+        Validated data as plain JSON types (dict or list); fields without a value are left out
+
+    Raises:
+        StructuredOutputError: If the response was truncated, or is still invalid
+            after all repair attempts
+    """
+    adapter = TypeAdapter(schema)
+    response_text = response_text or ""
+    if _is_truncated(response_text):
+        raise StructuredOutputError(
+            f"Response was truncated after {len(response_text)} chars (max_output_tokens reached)",
+            response_text
+        )
+
+    repaired = False
+    data = None
+    for attempt in range(repair_attempts + 1):
+        partial = None
+        try:
+            if data is None:
+                data = _load(response_text)
+            result = _validate(adapter, data)
+        except json.JSONDecodeError as e:
+            error = str(e)[:2000]
+        except ValidationError as e:
+            error = str(e)[:2000]
+            partial = _field_repair(schema, data, e)
+        else:
+            if repaired and on_repaired:
+                on_repaired(result)
+            return result
+        if attempt == repair_attempts:
+            break
+
+        repaired = True
+        if partial:
+            # Only the invalid fields go back to the model
+            repair_text = _repair_request(client, model, FIELD_REPAIR_PROMPT.format(
+                error=error,
+                fields=json.dumps(partial["fields"], ensure_ascii=False, indent=2)
+            ), partial["model"])
+            try:
+                fields = _load(repair_text)
+                data = {**data, **fields}
+            except (json.JSONDecodeError, TypeError):
+                pass  # Still invalid - validated again and, if attempts remain, repaired anew
+            response_text = json.dumps(data, ensure_ascii=False)
+        else:
+            response_text = _repair_request(client, model, REPAIR_PROMPT.format(
+                error=error, response_text=response_text
+            ), schema)
+            data = None
+
+    raise StructuredOutputError(f"Failed to parse JSON: {error}", response_text)
@@ -0,0 +1,101 @@
+"""
+Token Budget - Fast local token-count estimates for Gemini requests
+
+Word counts map poorly to Gemini tokens for our documents: Danish compounds
+("brandsikringsredegørelse") are several tokens, numbers are tokenized digit
+by digit, and § notation, stk. references and punctuation are tokens of their
+own. estimate_tokens() models those cases without an API round trip, so
+chunking, embedding batches and prompt assembly can be sized to token limits.
+
+The estimate is a model of the tokenizer, not the tokenizer itself.
+"""
+
+import re
+from typing import Iterable, List, Optional
+
+# Digits (one token each), letter runs, any other visible character, line breaks
+_TOKEN_PIECES = re.compile(r"(\d)|([^\W\d_]+)|(\n+)|(\S)")
+
+# Letters per token in a word: ASCII words split less than words with æ/ø/å
+_ASCII_LETTERS_PER_TOKEN = 4
+_NON_ASCII_LETTERS_PER_TOKEN = 3
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of Gemini tokens in a text
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        Estimated token count (at least 1 for non-empty text)
+    """
+    if not text:
+        return 0
+    tokens = 0
+    for piece in _TOKEN_PIECES.finditer(text):
+        word = piece.group(2)
+        if word:
+            per_token = _ASCII_LETTERS_PER_TOKEN if word.isascii() else _NON_ASCII_LETTERS_PER_TOKEN
+            tokens += 1 + (len(word) - 1) // per_token
+        else:
+            tokens += 1
+    return max(tokens, 1)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Cut text so that its estimate fits a token budget (at a line or word boundary)
+
+    Args:
+        text: Text to cut
+        max_tokens: Token budget
+
+    Returns:
+        The text itself if it fits, otherwise its longest fitting prefix
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    # Binary search on character length, then back off to a boundary
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if estimate_tokens(text[:middle]) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    prefix = text[:low]
+    boundary = max(prefix.rfind("\n"), prefix.rfind(" "))
+    return prefix[:boundary] if boundary > len(prefix) // 2 else prefix
+
+
+def pack_by_tokens(texts: Iterable[str], max_tokens: int, max_items: Optional[int] = None) -> List[List[int]]:
+    """
+    Group texts into consecutive batches that stay within a token budget
+
+    Args:
+        texts: Texts in order
+        max_tokens: Token budget per batch (a single larger text gets a batch of its own)
+        max_items: Maximum texts per batch
+
+    Returns:
+        Batches of indices into texts
+    """
+    batches: List[List[int]] = []
+    batch_tokens = 0
+    for index, text in enumerate(texts):
+        tokens = estimate_tokens(text)
+        if batches and batches[-1] and (
+            batch_tokens + tokens > max_tokens
+            or (max_items is not None and len(batches[-1]) >= max_items)
+        ):
+            batches.append([])
+            batch_tokens = 0
+        if not batches:
+            batches.append([])
+        batches[-1].append(index)
+        batch_tokens += tokens
+    return batches
+